@@ -1,8 +1,24 @@
-# Import this for compatibility
-from rpmautospec_core import specfile_uses_rpmautospec
-
-# Rename some stuff, also for compatibility
-from .subcommands.process_distgit import do_process_distgit as process_distgit
-from .subcommands.release import do_calculate_release as calculate_release
-from .subcommands.release import do_calculate_release_number as calculate_release_number
-from .version import __version__
+from importlib import import_module
+
+# These are imported lazily to keep startup fast. Some names are provided for compatibility.
+_LAZY_NAMES = {
+    "__version__": (".version", "__version__"),
+    "specfile_uses_rpmautospec": ("rpmautospec_core", "specfile_uses_rpmautospec"),
+    "process_distgit": (".subcommands.process_distgit", "do_process_distgit"),
+    "calculate_release": (".subcommands.release", "do_calculate_release"),
+    "calculate_release_number": (".subcommands.release", "do_calculate_release_number"),
+}
+
+
+def __getattr__(name: str):
+    try:
+        module_name, attr_name = _LAZY_NAMES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = globals()[name] = getattr(import_module(module_name, __name__), attr_name)
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(globals().keys() | _LAZY_NAMES.keys())
@@ -1,12 +1,14 @@
 import re
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from ctypes import CDLL
 from ctypes.util import find_library
-from typing import Optional
+from typing import Any, Optional
 from warnings import warn
 
 
-class LibError(Exception):
+class LibError(ImportError):
+    # Subclass ImportError: libraries used to be loaded on import and callers fall back to other
+    # backends if that fails.
     pass
 
 
@@ -97,8 +99,97 @@ def load_lib(
     return lib, soname, version, version_tuple
 
 
-def install_func_decls(lib: CDLL, decls: dict[str, tuple]) -> None:
-    for func_name, (restype, argtypes) in decls.items():
-        func = getattr(lib, func_name)
-        func.restype = restype
-        func.argtypes = argtypes
+class LazyLib:
+    """Library which is loaded and set up on demand.
+
+    The library is loaded when one of its functions is used first, or when
+    load() is called explicitly. Function declarations are installed only for
+    functions which are actually used.
+
+    If the library can’t be loaded, LibError (a subclass of ImportError) is
+    raised at that point.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        func_decls: Optional[dict[str, tuple]] = None,
+        known_versions: Optional[Sequence[tuple[int]]] = None,
+        load_unknown: bool = True,
+        init: Optional[Callable[["LazyLib"], None]] = None,
+    ) -> None:
+        """Set up the lazily loaded library.
+
+        :param name: Name of the library (without "lib")
+        :param func_decls: Function declarations, mapping function names to
+            tuples of return and argument types
+        :param known_versions: Sequence of version tuples which should be loaded
+            preferentially, ordered from old to new
+        :param load_unknown: If unknown newer versions than the known should be
+            loaded
+        :param init: Function initializing the library, called before the first
+            of its functions is used
+        """
+        self._name = name
+        self._func_decls = dict(func_decls or {})
+        self._known_versions = known_versions
+        self._load_unknown = load_unknown
+        self._init = init
+
+        self._lib: Optional[CDLL] = None
+        self.soname: Optional[str] = None
+        self.version: Optional[str] = None
+        self.version_tuple: Optional[tuple[int]] = None
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} lib{self._name} (soname={self.soname!r})>"
+
+    def load(self) -> CDLL:
+        """Load the library if it isn’t yet.
+
+        :return: The library object
+        """
+        if self._lib is None:
+            try:
+                self._lib, self.soname, self.version, self.version_tuple = load_lib(
+                    self._name, known_versions=self._known_versions, load_unknown=self._load_unknown
+                )
+            except LibError:
+                raise
+            except Exception as exc:
+                raise LibError(f"Can’t load lib{self._name}: {exc}") from exc
+        return self._lib
+
+    def add_func_decls(self, decls: dict[str, tuple]) -> None:
+        """Add function declarations.
+
+        :param decls: Function declarations, mapping function names to tuples
+            of return and argument types
+        """
+        self._func_decls.update(decls)
+        for func_name in decls.keys() & self.__dict__.keys():
+            # Declarations of functions already in use are installed right away.
+            restype, argtypes = decls[func_name]
+            func = self.__dict__[func_name]
+            func.restype = restype
+            func.argtypes = argtypes
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        lib = self.load()
+
+        if self._init:
+            init, self._init = self._init, None
+            init(self)
+
+        func = getattr(lib, name)
+        if name in self._func_decls:
+            func.restype, func.argtypes = self._func_decls[name]
+
+        # Subsequent lookups don’t end up here.
+        setattr(self, name, func)
+
+        return func
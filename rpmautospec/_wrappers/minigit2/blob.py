@@ -1,8 +1,9 @@
 """Minimal wrapper for libgit2 - Blob"""
 
-from ctypes import c_char, memmove
+import os
+from ctypes import c_char
 from functools import cached_property
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 
 from .native_adaptation import git_blob_p, git_object_t, lib
 from .object_ import Object
@@ -18,12 +19,39 @@ class Blob(Object):
 
     _real_native: Optional[git_blob_p] = None
 
-    @cached_property
-    def data(self) -> bytes:
+    def memoryview(self) -> memoryview:
+        """Get a read-only view of the blob content without copying it.
+
+        The view references the blob, i.e. the content stays valid as long as the view is used.
+        """
         rawsize = lib.git_blob_rawsize(self._native)
         rawcontent_p = lib.git_blob_rawcontent(self._native)
         self.raise_if_error(not rawcontent_p, "Error accessing blob content: {message}")
 
-        buf = (c_char * rawsize)()
-        memmove(buf, rawcontent_p, rawsize)
-        return bytes(buf)
+        buf = (c_char * rawsize).from_address(rawcontent_p)
+        # Keep the blob, and with it the libgit2 buffer, alive as long as the array is used.
+        buf._blob = self
+        return memoryview(buf).cast("B").toreadonly()
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return self.memoryview()
+
+    def write_to(self, file: Union[int, BinaryIO]) -> int:
+        """Write the blob content to a file without copying it first.
+
+        :param file: A file descriptor or a binary file object
+        :return: The number of bytes written
+        """
+        view = self.memoryview()
+
+        if isinstance(file, int):
+            written = 0
+            while written < len(view):
+                written += os.write(file, view[written:])
+            return written
+
+        return file.write(view)
+
+    @cached_property
+    def data(self) -> bytes:
+        return bytes(self.memoryview())
@@ -22,23 +22,45 @@ class Commit(Object):
 
     _real_native: Optional[git_commit_p] = None
 
+    @cached_property
+    def parent_ids(self) -> list[Oid]:
+        parent_ids = []
+        for n in range(lib.git_commit_parentcount(self._native)):
+            parent_id_p = lib.git_commit_parent_id(self._native, n)
+            self.raise_if_error(not parent_id_p, "Error getting parent id: {message}")
+            parent_ids.append(Oid(parent_id_p))
+        return parent_ids
+
     @cached_property
     def parents(self) -> list["Commit"]:
-        n_parents = lib.git_commit_parentcount(self._native)
         parents = []
-        for n in range(n_parents):
-            native = git_commit_p()
-            error_code = lib.git_commit_parent(native, self._native, n)
-            self.raise_if_error(error_code, "Error getting parent: {message}")
-            parents.append(Commit(_repo=self._repo, _native=native))
+        for n, parent_id in enumerate(self.parent_ids):
+            parent = self._repo._get_cached_object(parent_id.raw)
+            if parent is None:
+                native = git_commit_p()
+                error_code = lib.git_commit_parent(native, self._native, n)
+                self.raise_if_error(error_code, "Error getting parent: {message}")
+                parent = self._repo._cache_object(Commit(_repo=self._repo, _native=native))
+
+            parents.append(parent)
         return parents
 
+    @cached_property
+    def tree_id(self) -> Oid:
+        tree_id_p = lib.git_commit_tree_id(self._native)
+        self.raise_if_error(not tree_id_p, "Error getting tree id: {message}")
+        return Oid(tree_id_p)
+
     @cached_property
     def tree(self) -> "Tree":
-        native = git_tree_p()
-        error_code = lib.git_commit_tree(native, self._native)
-        self.raise_if_error(error_code, "Error retrieving tree: {message}")
-        return Tree(_repo=self._repo, _native=native)
+        tree = self._repo._get_cached_object(self.tree_id.raw)
+        if tree is None:
+            native = git_tree_p()
+            error_code = lib.git_commit_tree(native, self._native)
+            self.raise_if_error(error_code, "Error retrieving tree: {message}")
+            tree = self._repo._cache_object(Tree(_repo=self._repo, _native=native))
+
+        return tree
 
     @cached_property
     def commit_time(self) -> int:
@@ -1,4 +1,6 @@
 from enum import IntEnum, IntFlag
+from functools import cache
+from typing import Any
 
 from . import native_adaptation
 
@@ -14,13 +16,6 @@ class CheckoutStrategy(IntFlag):
     FORCE = native_adaptation.git_checkout_strategy_t.FORCE
 
 
-class ConfigLevel(IntEnum):
-    SYSTEM = native_adaptation.git_config_level_t.SYSTEM
-    XDG = native_adaptation.git_config_level_t.XDG
-    GLOBAL = native_adaptation.git_config_level_t.GLOBAL
-    LOCAL = native_adaptation.git_config_level_t.LOCAL
-
-
 class FileStatus(IntFlag):
     CURRENT = native_adaptation.git_status_t.CURRENT
     INDEX_NEW = native_adaptation.git_status_t.INDEX_NEW
@@ -40,3 +35,21 @@ class FileStatus(IntFlag):
 
 class RepositoryOpenFlag(IntFlag):
     NO_SEARCH = native_adaptation.git_repository_open_flag_t.NO_SEARCH
+
+
+@cache
+def _config_level() -> type[IntEnum]:
+    # The native config levels depend on the version of libgit2, which is loaded only when needed.
+    class ConfigLevel(IntEnum):
+        SYSTEM = native_adaptation.git_config_level_t.SYSTEM
+        XDG = native_adaptation.git_config_level_t.XDG
+        GLOBAL = native_adaptation.git_config_level_t.GLOBAL
+        LOCAL = native_adaptation.git_config_level_t.LOCAL
+
+    return ConfigLevel
+
+
+def __getattr__(name: str) -> Any:
+    if name == "ConfigLevel":
+        return _config_level()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,11 +6,11 @@ from os import PathLike, fspath
 from sys import getfilesystemencodeerrors, getfilesystemencoding
 from typing import TYPE_CHECKING, Optional, Union
 
+from . import native_adaptation
 from .constants import GIT_DIFF_OPTIONS_VERSION
 from .diff import Diff
 from .native_adaptation import (
     git_diff_option_t,
-    git_diff_options,
     git_diff_p,
     git_index_matched_path_cb,
     git_index_p,
@@ -86,7 +86,7 @@ class Index(WrapperOfWrappings):
         context_lines: int = 3,
         interhunk_lines: int = 0,
     ) -> Diff:
-        diff_options = git_diff_options()
+        diff_options = native_adaptation.git_diff_options()
         error_code = lib.git_diff_options_init(diff_options, GIT_DIFF_OPTIONS_VERSION)
         self.raise_if_error(error_code)
 
@@ -1,7 +1,6 @@
 """Minimal wrapper for libgit2 - Native Adaptation"""
 
 from ctypes import (
-    CDLL,
     CFUNCTYPE,
     POINTER,
     Structure,
@@ -18,23 +17,23 @@ from ctypes import (
     c_void_p,
 )
 from enum import IntEnum, IntFlag, auto
-from typing import Optional
+from functools import cache
+from typing import Any
 
-from ..common import IntEnumMixin, install_func_decls, load_lib
-
-lib: Optional[CDLL] = None
-soname: Optional[str] = None
-version: Optional[str] = None
-version_tuple: Optional[tuple[int]] = None
+from ..common import IntEnumMixin, LazyLib
 
 LIBGIT2_KNOWN_VERSIONS = tuple((1, minor) for minor in range(1, 10))
 
 
-try:
-    lib, soname, version, version_tuple = load_lib("git2", known_versions=LIBGIT2_KNOWN_VERSIONS)
+def _init_lib(lib: LazyLib) -> None:
+    lib.add_func_decls(_version_dependent_func_decls())
     lib.git_libgit2_init()
-except Exception as exc:  # pragma: no cover
-    raise ImportError from exc
+
+
+# The library is loaded, function declarations are installed and the library initialized only once
+# functions are used. Types which depend on its version are set up on first use as well, see
+# __getattr__().
+lib = LazyLib("git2", known_versions=LIBGIT2_KNOWN_VERSIONS, init=_init_lib)
 
 
 # Simple types
@@ -244,18 +243,6 @@ class git_delta_t(IntEnumMixin, IntEnum):
     CONFLICTED = auto()
 
 
-class git_config_level_t(IntEnumMixin, IntEnum):  # pragma: no cover
-    PROGRAMDATA = 1
-    SYSTEM = auto()
-    XDG = auto()
-    GLOBAL = auto()
-    LOCAL = auto()
-    if version_tuple >= (1, 8):
-        WORKTREE = auto()
-    APP = auto()
-    HIGHEST = -1
-
-
 class git_libgit2_opt_t(IntEnumMixin, IntEnum):
     # This is abridged.
     GET_SEARCH_PATH = 4
@@ -267,8 +254,7 @@ class git_diff_flag_t(IntEnumMixin, IntFlag):
     NOT_BINARY = auto()
     VALID_ID = auto()
     EXISTS = auto()
-    if version_tuple >= (1, 4):  # pragma: no cover
-        VALID_SIZE = auto()
+    VALID_SIZE = auto()  # Added in libgit2 v1.4.0, not set by older versions
 
 
 class git_checkout_notify_t(IntEnumMixin, IntFlag):
@@ -542,33 +528,6 @@ git_diff_notify_cb = CFUNCTYPE(c_int, git_diff_p, git_diff_delta_p, c_char_p, c_
 git_diff_progress_cb = CFUNCTYPE(c_int, git_diff_p, c_char_p, c_char_p, c_void_p)
 
 
-class git_diff_options(Structure):
-    _fields_ = tuple(
-        (fname, ftype)
-        for fname, ftype in (
-            ("version", c_uint),
-            ("flags", c_uint32),
-            ("ignore_submodules", c_int),
-            ("pathspec", git_strarray),
-            ("notify_cb", git_diff_notify_cb),
-            ("progress_cb", git_diff_progress_cb),
-            ("payload", c_void_p),
-            ("context_lines", c_uint32),
-            ("interhunk_lines", c_uint32),
-            ("oid_type", c_int),  # Added in libgit2 v1.7.0
-            ("id_abbrev", c_uint32),
-            ("max_size", git_off_t),
-            ("old_prefix", c_char_p),
-            ("new_prefix", c_char_p),
-        )
-        if fname != "oid_type" or version_tuple >= (1, 7)
-    )
-
-
-git_diff_options_p = POINTER(git_diff_options)
-git_diff_options_p_p = POINTER(git_diff_options_p)
-
-
 class git_index(Structure):
     pass
 
@@ -799,10 +758,12 @@ FUNC_DECLS = {
     "git_commit_message": (c_char_p, (git_commit_p,)),
     "git_commit_message_encoding": (c_char_p, (git_commit_p,)),
     "git_commit_parent": (c_int, (git_commit_p_p, git_commit_p, c_uint)),
+    "git_commit_parent_id": (git_oid_p, (git_commit_p, c_uint)),
     "git_commit_parentcount": (c_uint, (git_commit_p,)),
     "git_commit_time": (git_time_t, (git_commit_p,)),
     "git_commit_time_offset": (c_int, (git_commit_p,)),
     "git_commit_tree": (c_int, (git_tree_p_p, git_commit_p)),
+    "git_commit_tree_id": (git_oid_p, (git_commit_p,)),
     "git_config_delete_entry": (c_int, (git_config_p, c_char_p)),
     "git_config_entry_free": (None, (git_config_entry_p,)),
     "git_config_get_entry": (c_int, (git_config_entry_p_p, git_config_p, c_char_p)),
@@ -813,26 +774,9 @@ FUNC_DECLS = {
     "git_config_free": (None, (git_config_p,)),
     "git_diff_get_delta": (git_diff_delta_p, (git_diff_p, c_size_t)),
     "git_diff_get_stats": (c_int, (git_diff_stats_p_p, git_diff_p)),
-    "git_diff_index_to_workdir": (
-        c_int,
-        (git_diff_p_p, git_repository_p, git_index_p, git_diff_options_p),
-    ),
     "git_diff_num_deltas": (c_size_t, (git_diff_p,)),
-    "git_diff_options_init": (c_int, (git_diff_options_p, c_uint)),
     "git_diff_stats_free": (None, (git_diff_stats_p,)),
     "git_diff_to_buf": (c_int, (git_buf_p, git_diff_p, git_diff_format_t)),
-    "git_diff_tree_to_index": (
-        c_int,
-        (git_diff_p_p, git_repository_p, git_tree_p, git_index_p, git_diff_options_p),
-    ),
-    "git_diff_tree_to_tree": (
-        c_int,
-        (git_diff_p_p, git_repository_p, git_tree_p, git_tree_p, git_diff_options_p),
-    ),
-    "git_diff_tree_to_workdir": (
-        c_int,
-        (git_diff_p_p, git_repository_p, git_tree_p, git_diff_options_p),
-    ),
     "git_error_last": (git_error_p, ()),
     "git_index_add_all": (
         c_int,
@@ -911,6 +855,7 @@ FUNC_DECLS = {
     "git_tree_entry_dup": (c_int, (git_tree_entry_p_p, git_tree_entry_p)),
     "git_tree_entry_filemode": (git_filemode_t, (git_tree_entry_p,)),
     "git_tree_entry_free": (None, (git_tree_entry_p,)),
+    "git_tree_entry_id": (git_oid_p, (git_tree_entry_p,)),
     "git_tree_entry_name": (c_char_p, (git_tree_entry_p,)),
     "git_tree_entry_to_object": (c_int, (git_object_p_p, git_repository_p, git_tree_entry_p)),
     "git_tree_entrycount": (c_size_t, (git_tree_p,)),
@@ -918,10 +863,110 @@ FUNC_DECLS = {
 }
 
 
-# Set up native function argument types.
+# Set up native function argument types, these are installed when functions are first used.
+
+lib.add_func_decls(FUNC_DECLS)
+
+
+# Types and function declarations which depend on the version of libgit2
+
+
+@cache
+def _git_config_level_t() -> type[IntEnum]:
+    lib.load()
+
+    class git_config_level_t(IntEnumMixin, IntEnum):  # pragma: no cover
+        PROGRAMDATA = 1
+        SYSTEM = auto()
+        XDG = auto()
+        GLOBAL = auto()
+        LOCAL = auto()
+        if lib.version_tuple >= (1, 8):
+            WORKTREE = auto()
+        APP = auto()
+        HIGHEST = -1
+
+    return git_config_level_t
+
+
+@cache
+def _git_diff_options_types() -> tuple[type[Structure], type, type]:
+    lib.load()
+
+    class git_diff_options(Structure):
+        _fields_ = tuple(
+            (fname, ftype)
+            for fname, ftype in (
+                ("version", c_uint),
+                ("flags", c_uint32),
+                ("ignore_submodules", c_int),
+                ("pathspec", git_strarray),
+                ("notify_cb", git_diff_notify_cb),
+                ("progress_cb", git_diff_progress_cb),
+                ("payload", c_void_p),
+                ("context_lines", c_uint32),
+                ("interhunk_lines", c_uint32),
+                ("oid_type", c_int),  # Added in libgit2 v1.7.0
+                ("id_abbrev", c_uint32),
+                ("max_size", git_off_t),
+                ("old_prefix", c_char_p),
+                ("new_prefix", c_char_p),
+            )
+            if fname != "oid_type" or lib.version_tuple >= (1, 7)
+        )
+
+    git_diff_options_p = POINTER(git_diff_options)
+    git_diff_options_p_p = POINTER(git_diff_options_p)
+
+    return git_diff_options, git_diff_options_p, git_diff_options_p_p
+
+
+def _version_dependent_func_decls() -> dict[str, tuple]:
+    _, git_diff_options_p, _ = _git_diff_options_types()
+
+    return {
+        "git_diff_index_to_workdir": (
+            c_int,
+            (git_diff_p_p, git_repository_p, git_index_p, git_diff_options_p),
+        ),
+        "git_diff_options_init": (c_int, (git_diff_options_p, c_uint)),
+        "git_diff_tree_to_index": (
+            c_int,
+            (git_diff_p_p, git_repository_p, git_tree_p, git_index_p, git_diff_options_p),
+        ),
+        "git_diff_tree_to_tree": (
+            c_int,
+            (git_diff_p_p, git_repository_p, git_tree_p, git_tree_p, git_diff_options_p),
+        ),
+        "git_diff_tree_to_workdir": (
+            c_int,
+            (git_diff_p_p, git_repository_p, git_tree_p, git_diff_options_p),
+        ),
+    }
+
+
+def _lib_info(name: str) -> Any:
+    lib.load()
+    return getattr(lib, name)
+
+
+_LAZY_ATTRIBUTES = {
+    "soname": lambda: _lib_info("soname"),
+    "version": lambda: _lib_info("version"),
+    "version_tuple": lambda: _lib_info("version_tuple"),
+    "git_config_level_t": _git_config_level_t,
+    "git_diff_options": lambda: _git_diff_options_types()[0],
+    "git_diff_options_p": lambda: _git_diff_options_types()[1],
+    "git_diff_options_p_p": lambda: _git_diff_options_types()[2],
+}
+
 
+def __getattr__(name: str) -> Any:
+    # Accessing these loads the library.
+    try:
+        get_value = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
-try:
-    install_func_decls(lib, FUNC_DECLS)
-except Exception as exc:  # pragma: no cover
-    raise ImportError from exc
+    value = globals()[name] = get_value()
+    return value
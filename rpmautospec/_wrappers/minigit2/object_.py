@@ -84,13 +84,18 @@ class Object(WrapperOfWrappings):
         cls, repo: "Repository", oid: OidTypes, *, _must_free: Optional[bool] = None
     ) -> "Object":
         oid = Oid._from_oid(oid)
+
+        obj = repo._get_cached_object(oid.raw)
+        if obj is not None:
+            return obj
+
         native = git_object_p()
         error_code = lib.git_object_lookup_prefix(
             native, repo._native, oid._native, len(oid.hexb), git_object_t.ANY
         )
         cls.raise_if_error(error_code, "Can’t lookup object: {message}")
 
-        return cls._from_native(repo=repo, native=native, _must_free=_must_free)
+        return repo._cache_object(cls._from_native(repo=repo, native=native, _must_free=_must_free))
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(oid={self.id.hex!r})"
@@ -99,7 +104,7 @@ class Object(WrapperOfWrappings):
         return isinstance(other, Object) and self.id == other.id
 
     def __hash__(self) -> int:
-        return hash(self.id.hex)
+        return hash(self.id)
 
     @cached_property
     def id(self) -> Oid:
@@ -12,7 +12,18 @@ OidTypes = Union["Oid", str, bytes]
 
 
 class Oid(WrapperOfWrappings):
-    """Represent a git oid."""
+    """Represent a git oid.
+
+    Like in pygit2, Oids are hashed by their raw id. They compare equal
+    to their hexadecimal representation as str or bytes, but don’t hash
+    like it, i.e. don’t mix them in sets or as keys in mappings, convert
+    them first.
+    """
+
+    # The raw id is used for hashing and comparisons, keep it at hand.
+    __slots__ = ("raw",)
+
+    raw: bytes
 
     _real_native: Optional[git_oid] = None
 
@@ -25,6 +36,12 @@ class Oid(WrapperOfWrappings):
 
         super().__init__(native=native)
 
+        if isinstance(native, git_oid):
+            native = byref(native)
+        buf = (c_char * sizeof(git_oid))()
+        memmove(buf, native, sizeof(git_oid))
+        self.raw = buf.raw
+
     @classmethod
     def _from_oid(cls, oid: OidTypes) -> "Oid":
         if isinstance(oid, Oid):
@@ -40,11 +57,16 @@ class Oid(WrapperOfWrappings):
 
     def __eq__(self, other: Union["Oid", str, bytes]) -> bool:
         if isinstance(other, Oid):
-            return self._native.id == other._native.id
+            return self.raw == other.raw
         elif isinstance(other, str):
             return self.hex == other
-        else:  # isinstance(other, bytes)
+        elif isinstance(other, bytes):
             return self.hexb == other
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.raw)
 
     @cached_property
     def hexb(self) -> bytes:
@@ -1,5 +1,6 @@
 """Minimal wrapper for libgit2 - Repository"""
 
+from collections import OrderedDict
 from collections.abc import Sequence
 from ctypes import byref, c_char_p, c_uint, cast
 from functools import cached_property
@@ -63,6 +64,10 @@ class Repository(WrapperOfWrappings):
 
     _real_native: Optional[git_repository_p] = None
 
+    # Commits, trees and blobs are interned per repository, so the same object reached on different
+    # paths (e.g. the parent of several commits) is represented by only one wrapper.
+    _object_cache_size: int = 1024
+
     def __init__(self, path: Union[str, Path], flags: int = 0) -> None:
         if isinstance(path, Path):
             path = str(path)
@@ -133,6 +138,42 @@ class Repository(WrapperOfWrappings):
             return None
         return encoded.decode(encoding=getfilesystemencoding(), errors=getfilesystemencodeerrors())
 
+    @cached_property
+    def _object_cache(self) -> "OrderedDict[bytes, Object]":
+        return OrderedDict()
+
+    def _get_cached_object(self, oid_raw: bytes) -> Optional["Object"]:
+        """Look up an interned object wrapper by its raw oid.
+
+        :param oid_raw: The raw (binary) oid of the object
+        :return: The object, or None if it isn’t cached
+        """
+        try:
+            obj = self._object_cache[oid_raw]
+        except KeyError:
+            return None
+
+        self._object_cache.move_to_end(oid_raw)
+        return obj
+
+    def _cache_object(self, obj: "Object") -> "Object":
+        """Intern an object wrapper, evicting the least recently used.
+
+        Evicted objects (and their native counterparts) are freed as soon
+        as nothing else refers to them.
+
+        :param obj: The object to be interned
+        :return: The interned object
+        """
+        oid_raw = obj.id.raw
+        self._object_cache[oid_raw] = obj
+        self._object_cache.move_to_end(oid_raw)
+
+        while len(self._object_cache) > self._object_cache_size:
+            self._object_cache.popitem(last=False)
+
+        return obj
+
     def __getitem__(self, oid: OidTypes) -> "Object":
         return Object._from_oid(repo=self, oid=oid)
 
@@ -36,8 +36,12 @@ class RevWalk(WrapperOfWrappings, Iterator):
             raise StopIteration
         self.raise_if_error(error_code)
 
-        commit = git_commit_p()
-        error_code = lib.git_commit_lookup(commit, self._repo._native, oid_p)
+        commit = self._repo._get_cached_object(bytes(oid))
+        if commit is not None:
+            return commit
+
+        native = git_commit_p()
+        error_code = lib.git_commit_lookup(native, self._repo._native, oid_p)
         self.raise_if_error(error_code)
 
-        return Commit(_repo=self._repo, _native=commit)
+        return self._repo._cache_object(Commit(_repo=self._repo, _native=native))
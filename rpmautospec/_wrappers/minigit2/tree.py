@@ -3,12 +3,13 @@
 from ctypes import byref
 from typing import TYPE_CHECKING, Optional, Union
 
+from . import native_adaptation
 from .constants import GIT_DIFF_OPTIONS_VERSION
 from .diff import Diff
 from .native_adaptation import (
     git_diff_option_t,
-    git_diff_options,
     git_diff_p,
+    git_filemode_t,
     git_object_p,
     git_object_t,
     git_tree_entry_p,
@@ -16,6 +17,7 @@ from .native_adaptation import (
     lib,
 )
 from .object_ import Object
+from .oid import Oid
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
@@ -52,11 +54,30 @@ class Tree(Object):
             lib.git_tree_entry_free(entry)
             return True
 
+    def entry_id(self, path: Union[str, bytes]) -> tuple[Oid, git_filemode_t]:
+        """Look up the id and file mode of a tree entry without loading its object.
+
+        :param path: The path of the entry, relative to the tree
+        :return: The object id and file mode of the entry
+        :raises KeyError: If the tree has no entry for the path
+        """
+        entry = self._get_tree_entry_for_path(path)
+        try:
+            return Oid(lib.git_tree_entry_id(entry)), lib.git_tree_entry_filemode(entry)
+        finally:
+            lib.git_tree_entry_free(entry)
+
     def _object_from_tree_entry(self, entry: git_tree_entry_p) -> Object:
-        native = git_object_p()
-        error_code = lib.git_tree_entry_to_object(native, self._repo._native, entry)
-        self.raise_if_error(error_code)
-        return Object._from_native(repo=self._repo, native=native, _entry=entry)
+        obj = self._repo._get_cached_object(bytes(lib.git_tree_entry_id(entry).contents))
+        if obj is None:
+            native = git_object_p()
+            error_code = lib.git_tree_entry_to_object(native, self._repo._native, entry)
+            self.raise_if_error(error_code)
+            obj = self._repo._cache_object(Object._from_native(repo=self._repo, native=native))
+
+        # Name and file mode belong to the tree entry, not the object, so wrap the interned native
+        # object anew.
+        return Object._from_native(repo=self._repo, native=obj._native, _entry=entry)
 
     def __getitem__(self, path: Union[str, bytes]) -> Object:
         return self._object_from_tree_entry(self._get_tree_entry_for_path(path))
@@ -83,7 +104,7 @@ class Tree(Object):
         interhunk_lines: int = 0,
         swap: bool = False,
     ) -> Diff:
-        diff_options = git_diff_options()
+        diff_options = native_adaptation.git_diff_options()
         error_code = lib.git_diff_options_init(diff_options, GIT_DIFF_OPTIONS_VERSION)
         self.raise_if_error(error_code, "Can’t initialize diff options: {message}")
 
@@ -109,7 +130,7 @@ class Tree(Object):
         context_lines: int = 3,
         interhunk_lines: int = 0,
     ) -> Diff:
-        diff_options = git_diff_options()
+        diff_options = native_adaptation.git_diff_options()
         error_code = lib.git_diff_options_init(diff_options, GIT_DIFF_OPTIONS_VERSION)
         self.raise_if_error(error_code)
 
@@ -133,7 +154,7 @@ class Tree(Object):
         context_lines: int = 3,
         interhunk_lines: int = 0,
     ) -> Diff:
-        diff_options = git_diff_options()
+        diff_options = native_adaptation.git_diff_options()
         error_code = lib.git_diff_options_init(diff_options, GIT_DIFF_OPTIONS_VERSION)
         self.raise_if_error(error_code)
 
@@ -5,11 +5,13 @@ replacement for the `rpm` Python package, but only for the parts used in
 rpmautospec.
 """
 
+from typing import Any
+
 from ._rpm.header import Header as hdr
 from ._rpm.native_adaptation import rpmSourceFlags as _rpmSourceFlags
 from ._rpm.native_adaptation import rpmSpecFlags as _rpmSpecFlags
 from ._rpm.spec import Spec as spec
-from ._rpm.toplevel import addMacro, expandMacro, reloadConfig, setLogFile
+from ._rpm.toplevel import addMacro, expandMacro, getVersion, reloadConfig, setLogFile
 
 # Enums
 
@@ -24,3 +26,10 @@ RPMSPEC_FORCE = _rpmSpecFlags.FORCE
 RPMSPEC_NOLANG = _rpmSpecFlags.NOLANG
 RPMSPEC_NOUTF8 = _rpmSpecFlags.NOUTF8
 RPMSPEC_NOFINALIZE = _rpmSpecFlags.NOFINALIZE
+
+
+def __getattr__(name: str) -> Any:
+    # Like in the `rpm` package, but librpm is only loaded when the version is asked for.
+    if name == "__version__":
+        return getVersion()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
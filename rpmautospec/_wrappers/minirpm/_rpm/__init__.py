@@ -1,4 +1 @@
 from .exc import RpmError as error
-from .toplevel import reloadConfig as _reloadConfig
-
-_reloadConfig()
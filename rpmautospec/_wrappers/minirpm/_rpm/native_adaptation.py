@@ -1,40 +1,9 @@
-from ctypes import CDLL, POINTER, Structure, c_char_p, c_int, c_uint32, c_void_p
+import warnings
+from ctypes import POINTER, Structure, c_char_p, c_int, c_uint32, c_void_p
 from enum import IntFlag, auto
-from typing import Optional
-
-from ...common import IntEnumMixin, install_func_decls, load_lib
-
-libc: Optional[CDLL] = None
-libc_soname: Optional[str] = None
-libc_version: Optional[str] = None
-libc_version_tuple: Optional[tuple[int]] = None
-
-librpm: Optional[CDLL] = None
-librpm_soname: Optional[str] = None
-librpm_version: Optional[str] = None
-librpm_version_tuple: Optional[tuple[int]] = None
-
-librpmio: Optional[CDLL] = None
-librpmio_soname: Optional[str] = None
-librpmio_version: Optional[str] = None
-librpmio_version_tuple: Optional[tuple[int]] = None
-
-librpmbuild: Optional[CDLL] = None
-librpmbuild_soname: Optional[str] = None
-librpmbuild_version: Optional[str] = None
-librpmbuild_version_tuple: Optional[tuple[int]] = None
-
-
-try:
-    libc, libc_soname, libc_version, libc_version_tuple = load_lib("c")
-    librpm, librpm_soname, librpm_version, librpm_version_tuple = load_lib("rpm")
-    librpmio, librpmio_soname, librpmio_version, librpmio_version_tuple = load_lib("rpmio")
-    librpmbuild, librpmbuild_soname, librpmbuild_version, librpmbuild_version_tuple = load_lib(
-        "rpmbuild"
-    )
-except Exception as exc:  # pragma: no cover
-    raise ImportError from exc
+from typing import Any
 
+from ...common import IntEnumMixin, LazyLib
 
 # libc types
 
@@ -95,14 +64,14 @@ LIBRPM_FUNC_DECLS = {
     "headerFree": (None, (Header,)),
     "headerLink": (Header, (Header,)),
     "rpmFreeRpmrc": (None, ()),
-    "rpmPushMacro": (c_int, (c_void_p, c_char_p, c_char_p, c_char_p, c_int)),
     "rpmReadConfigFiles": (c_int, (c_char_p, c_char_p)),
-    "rpmlogSetFile": (FILE_p, (FILE_p,)),
 }
 
 LIBRPMIO_FUNC_DECLS = {
     "rpmExpandMacros": (c_int, (c_void_p, c_char_p, POINTER(c_char_p), c_int)),
     "rpmFreeMacros": (None, (c_void_p,)),
+    "rpmPushMacro": (c_int, (c_void_p, c_char_p, c_char_p, c_char_p, c_int)),
+    "rpmlogSetFile": (FILE_p, (FILE_p,)),
 }
 
 LIBRPMBUILD_FUNC_DECLS = {
@@ -112,10 +81,48 @@ LIBRPMBUILD_FUNC_DECLS = {
 }
 
 
-try:
-    install_func_decls(libc, LIBC_FUNC_DECLS)
-    install_func_decls(librpm, LIBRPM_FUNC_DECLS)
-    install_func_decls(librpmio, LIBRPMIO_FUNC_DECLS)
-    install_func_decls(librpmbuild, LIBRPMBUILD_FUNC_DECLS)
-except Exception as exc:  # pragma: no cover
-    raise ImportError from exc
+# Libraries are loaded and function declarations installed only once functions are used.
+
+_rpm_config_read = False
+
+
+def _read_rpm_config(lib: LazyLib) -> None:
+    """Read the RPM configuration before librpm or librpmio are used first."""
+    global _rpm_config_read
+
+    if not _rpm_config_read:
+        _rpm_config_read = True
+
+        from .toplevel import reloadConfig
+
+        reloadConfig()
+
+
+libc = LazyLib("c", func_decls=LIBC_FUNC_DECLS)
+librpm = LazyLib("rpm", func_decls=LIBRPM_FUNC_DECLS, init=_read_rpm_config)
+librpmio = LazyLib("rpmio", func_decls=LIBRPMIO_FUNC_DECLS, init=_read_rpm_config)
+librpmbuild = LazyLib("rpmbuild", func_decls=LIBRPMBUILD_FUNC_DECLS)
+
+
+# The sonames and versions of libraries used to be module attributes, set when loading them on
+# import.
+_DEPRECATED_LIB_ATTRIBUTES = {
+    f"{lib_name}_{attr}": (lib_name, attr)
+    for lib_name in ("libc", "librpm", "librpmio", "librpmbuild")
+    for attr in ("soname", "version", "version_tuple")
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        lib_name, attr = _DEPRECATED_LIB_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    warnings.warn(
+        f"{name} is deprecated, use {lib_name}.{attr} instead", DeprecationWarning, stacklevel=2
+    )
+
+    lib = globals()[lib_name]
+    lib.load()
+    return getattr(lib, attr)
@@ -6,6 +6,10 @@ from .exc import RpmError
 from .native_adaptation import FILE_p, libc, librpm, librpmio
 
 
+def getVersion() -> str:
+    return c_char_p.in_dll(librpm.load(), "RPMVERSION").value.decode("utf-8")
+
+
 def setLogFile(file: Optional[IOBase]) -> None:
     if file:
         fileno = file.fileno()
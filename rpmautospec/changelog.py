@@ -1,8 +1,15 @@
+import datetime as dt
 import locale
 import re
+import warnings
+from collections.abc import Iterable, Iterator
 from enum import Enum, auto
 from textwrap import TextWrapper
 
+# English abbreviations as used in RPM changelog dates, independent of the current locale
+WEEKDAY_ABBRS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTH_ABBRS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
 
 class CommitLogParseState(int, Enum):
     before_subject = auto()
@@ -13,7 +20,18 @@ class CommitLogParseState(int, Enum):
 
 
 class TimeLocaleManager:
+    """Switch the time locale temporarily.
+
+    Deprecated: changelog dates are formatted independently of the
+    current locale, use `format_changelog_date()` instead.
+    """
+
     def __init__(self, *localenames):
+        warnings.warn(
+            "TimeLocaleManager is deprecated, use format_changelog_date() instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         self.names = localenames
 
     def __enter__(self):
@@ -33,6 +51,22 @@ class TimeLocaleManager:
             pass
 
 
+def format_changelog_date(timestamp: dt.date) -> str:
+    """Format a date for the header of a changelog entry.
+
+    This is equivalent to `timestamp.strftime("%a %b %d %Y")` in an
+    English or the C locale, but doesn’t depend on or change the current
+    locale, and is thread-safe.
+
+    :param timestamp: The date or timestamp of the changelog entry
+    :return: The formatted date, e.g. "Thu Jan 01 1970"
+    """
+    return (
+        f"{WEEKDAY_ABBRS[timestamp.weekday()]} {MONTH_ABBRS[timestamp.month - 1]}"
+        + f" {timestamp.day:02d} {timestamp.year}"
+    )
+
+
 class ChangelogEntry(dict):
     """Dictionary holding changelog entry details."""
 
@@ -106,6 +140,48 @@ class ChangelogEntry(dict):
         # (stripped of prefixes and such). Merge these lines into a single one per item.
         return [" ".join(lines) for lines in changelog_items_lines]
 
+    @classmethod
+    def fill_changelog_item(cls, item: str) -> str:
+        """Format a changelog item as a list item, wrapped into lines.
+
+        The output is the same as from `linewrapper.fill()`, but plain
+        ASCII text without hyphens or excess whitespace is wrapped using a
+        simple, faster method. Other text is filled by `linewrapper`, for
+        its full semantics, e.g. breaking words on hyphens.
+
+        :param item: The changelog item
+        :return: The changelog item, prefixed with a dash and wrapped
+        """
+        text = f"- {item}"
+        width = cls.linewrapper.width
+        indent = cls.linewrapper.subsequent_indent
+
+        if (
+            not text.isascii()
+            or not text.isprintable()
+            or "-" in item
+            or "  " in text
+            or text.endswith(" ")
+        ):
+            return cls.linewrapper.fill(text)
+
+        words = text.split(" ")
+        if max(len(word) for word in words) > width - len(indent):
+            # Overlong words have to be broken up.
+            return cls.linewrapper.fill(text)
+
+        lines = []
+        line = words[0]
+        for word in words[1:]:
+            if len(line) + 1 + len(word) <= width:
+                line += " " + word
+            else:
+                lines.append(line)
+                line = indent + word
+        lines.append(line)
+
+        return "\n".join(lines)
+
     def format(self, **overrides):
         entry_info = self | overrides
 
@@ -118,9 +194,7 @@ class ChangelogEntry(dict):
             # verbatim data from the changed `changelog` file
             return entry_info["data"]
 
-        # WARNING: the following is NOT thread-safe
-        with TimeLocaleManager("en_US", "C"):
-            changelog_date = entry_info["timestamp"].strftime("%a %b %d %Y")
+        changelog_date = format_changelog_date(entry_info["timestamp"])
 
         if entry_info["epoch-version"]:
             changelog_evr = f" - {entry_info['epoch-version']}"
@@ -135,6 +209,35 @@ class ChangelogEntry(dict):
         else:
             changelog_items = self.commitlog_to_changelog_items(entry_info["commitlog"])
 
-        changelog_body = "\n".join(self.linewrapper.fill(f"- {item}") for item in changelog_items)
+        changelog_body = "\n".join(self.fill_changelog_item(item) for item in changelog_items)
 
         return f"{changelog_header}\n{changelog_body}"
+
+
+def iter_format_changelog(entries: Iterable[ChangelogEntry]) -> Iterator[str]:
+    """Format a sequence of changelog entries as a stream of chunks.
+
+    Entries are only formatted when the chunks are consumed. Verbatim data
+    of entries which isn’t valid UTF-8 is decoded with replacement
+    characters.
+
+    :param entries: The changelog entries, newest first
+    :return: An iterator over the chunks of the formatted changelog,
+        entries separated by empty lines
+    """
+    for idx, entry in enumerate(entries):
+        if idx:
+            yield "\n\n"
+        formatted = entry.format()
+        if isinstance(formatted, bytes):
+            formatted = formatted.decode("utf-8", errors="replace")
+        yield formatted
+
+
+def format_changelog(entries: Iterable[ChangelogEntry]) -> str:
+    """Format a sequence of changelog entries in one pass.
+
+    :param entries: The changelog entries, newest first
+    :return: The formatted changelog, entries separated by empty lines
+    """
+    return "".join(iter_format_changelog(entries))
@@ -1,19 +1,11 @@
 import locale
 import logging
-from typing import Any, Optional
+import os
+from typing import Any, Optional, TextIO
 
 import click
 
-from ..exc import SpecParseFailure
-from ..subcommands.changelog import do_generate_changelog
-from ..subcommands.convert import (
-    FileModifiedError,
-    FileUntrackedError,
-    PkgConverter,
-    SpecialFileError,
-)
-from ..subcommands.process_distgit import do_process_distgit
-from ..subcommands.release import do_calculate_release
+from ..exc import HistorySeedError, SpecParseFailure
 from ..util import handle_expected_exceptions
 from . import pager
 from .base import setup_logging
@@ -42,8 +34,20 @@ log = logging.getLogger(__name__)
     help="Throw an error if the current version of the spec file can’t be parsed",
     show_default=True,
 )
+@click.option(
+    "--history-seed",
+    type=click.File(encoding="utf-8"),
+    help="Use known results of commits from this file (release map format) instead of processing"
+    + " the history preceding them, e.g. in shallow clones",
+)
 @click.pass_context
-def cli(ctx: click.Context, pager: bool, log_level: Optional[int], error_on_unparseable_spec: bool):
+def cli(
+    ctx: click.Context,
+    pager: bool,
+    log_level: Optional[int],
+    error_on_unparseable_spec: bool,
+    history_seed: Optional[TextIO],
+):
     locale.setlocale(locale.LC_ALL, "")
 
     ctx.ensure_object(dict)
@@ -51,10 +55,23 @@ def cli(ctx: click.Context, pager: bool, log_level: Optional[int], error_on_unpa
     ctx.obj["log_level"] = log_level
     ctx.obj["error_on_unparseable_spec"] = error_on_unparseable_spec
 
+    if history_seed:
+        from ..subcommands.release_map import read_release_map
+
+        try:
+            ctx.obj["history_seed"] = read_release_map(history_seed)
+        except HistorySeedError as exc:
+            raise click.ClickException(f"{history_seed.name}: {exc}") from exc
+    else:
+        ctx.obj["history_seed"] = None
+
     setup_logging(log_level=log_level or logging.INFO)
 
 
 # Subcommands
+#
+# Their implementations are imported when they are run, so that the CLI starts quickly and only
+# loads the backends that are actually used.
 
 
 @cli.command()
@@ -63,11 +80,15 @@ def cli(ctx: click.Context, pager: bool, log_level: Optional[int], error_on_unpa
 @handle_expected_exceptions
 def generate_changelog(obj: dict[str, Any], spec_or_path: str) -> None:
     """Generate changelog entries from git commit logs"""
+    from ..subcommands.changelog import do_stream_changelog
+
     try:
-        changelog = do_generate_changelog(
-            spec_or_path, error_on_unparseable_spec=obj["error_on_unparseable_spec"]
+        changelog = do_stream_changelog(
+            spec_or_path,
+            error_on_unparseable_spec=obj["error_on_unparseable_spec"],
+            history_seed=obj["history_seed"],
         )
-    except SpecParseFailure as exc:
+    except (SpecParseFailure, HistorySeedError) as exc:
         raise click.ClickException(exc.args[0]) from exc
     pager.page(changelog, enabled=obj["pager"])
 
@@ -106,6 +127,13 @@ def convert(
     spec_or_path: str,
 ) -> None:
     """Convert a package repository to use rpmautospec"""
+    from ..subcommands.convert import (
+        FileModifiedError,
+        FileUntrackedError,
+        PkgConverter,
+        SpecialFileError,
+    )
+
     if commit and message == "":
         raise click.UsageError("Commit message cannot be empty")
 
@@ -146,11 +174,16 @@ def convert(
 @handle_expected_exceptions
 def process_distgit(obj: dict[str, Any], spec_or_path: str, target: str) -> None:
     """Work repository history and commit logs into a spec file"""
+    from ..subcommands.process_distgit import do_process_distgit
+
     try:
         do_process_distgit(
-            spec_or_path, target, error_on_unparseable_spec=obj["error_on_unparseable_spec"]
+            spec_or_path,
+            target,
+            error_on_unparseable_spec=obj["error_on_unparseable_spec"],
+            history_seed=obj["history_seed"],
         )
-    except SpecParseFailure as exc:
+    except (SpecParseFailure, HistorySeedError) as exc:
         raise click.ClickException(exc.args[0]) from exc
 
 
@@ -168,12 +201,101 @@ def process_distgit(obj: dict[str, Any], spec_or_path: str, target: str) -> None
 @handle_expected_exceptions
 def calculate_release(obj: dict[str, Any], complete_release: bool, spec_or_path: str) -> None:
     """Calculate the next release tag for a package build"""
+    from ..subcommands.release import do_calculate_release
+
     try:
         release = do_calculate_release(
             spec_or_path,
             complete_release=complete_release,
             error_on_unparseable_spec=obj["error_on_unparseable_spec"],
+            history_seed=obj["history_seed"],
         )
-    except SpecParseFailure as exc:
+    except (SpecParseFailure, HistorySeedError) as exc:
         raise click.ClickException(exc.args[0]) from exc
     print("Calculated release number:", release)
+
+
+@cli.command()
+@click.option(
+    "--changelog/--no-changelog",
+    default=False,
+    help="Include the changelog entry generated for each commit",
+    show_default=True,
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    help="Append entries for new commits to this file instead of printing all entries",
+)
+@click.argument("spec_or_path", type=click.Path(), default=".")
+@click.pass_obj
+@handle_expected_exceptions
+def release_map(
+    obj: dict[str, Any], changelog: bool, output: Optional[str], spec_or_path: str
+) -> None:
+    """Map commits to their releases in JSON Lines format"""
+    from ..subcommands.release_map import (
+        do_generate_release_map,
+        format_release_map_entry,
+        read_release_map,
+    )
+
+    known_entries = None
+    if output and os.path.exists(output):
+        with open(output, encoding="utf-8") as fp:
+            try:
+                known_entries = read_release_map(fp)
+            except HistorySeedError as exc:
+                raise click.ClickException(f"{output}: {exc}") from exc
+
+    try:
+        entries = do_generate_release_map(
+            spec_or_path,
+            known_entries=known_entries,
+            history_seed=obj["history_seed"],
+            changelog=changelog,
+        )
+    except (SpecParseFailure, HistorySeedError) as exc:
+        raise click.ClickException(exc.args[0]) from exc
+    except ValueError as exc:
+        raise click.ClickException(*exc.args) from exc
+
+    if known_entries:
+        entries = [entry for entry in entries if entry["commit-id"] not in known_entries]
+
+    if output:
+        with open(output, "a", encoding="utf-8") as fp:
+            for entry in entries:
+                print(format_release_map_entry(entry), file=fp)
+    else:
+        for entry in entries:
+            print(format_release_map_entry(entry))
+
+
+@cli.command()
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False),
+    help="Append the history seed to this file instead of printing it",
+)
+@click.argument("spec_or_path", type=click.Path(), default=".")
+@click.pass_obj
+@handle_expected_exceptions
+def history_seed(obj: dict[str, Any], output: Optional[str], spec_or_path: str) -> None:
+    """Generate a history seed for the current commit"""
+    from ..subcommands.release_map import do_generate_history_seed, format_release_map_entry
+
+    try:
+        entry = do_generate_history_seed(spec_or_path, history_seed=obj["history_seed"])
+    except (SpecParseFailure, HistorySeedError) as exc:
+        raise click.ClickException(exc.args[0]) from exc
+    except ValueError as exc:
+        raise click.ClickException(*exc.args) from exc
+
+    if output:
+        with open(output, "a", encoding="utf-8") as fp:
+            print(format_release_map_entry(entry), file=fp)
+    else:
+        print(format_release_map_entry(entry))
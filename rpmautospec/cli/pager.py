@@ -1,9 +1,66 @@
 import os
-import pydoc
-from typing import Optional
+import shutil
+import subprocess
+import sys
+from collections.abc import Iterable
+from typing import Optional, Union
 
 
-def page(text: str, enabled: Optional[bool] = False) -> None:
+def _get_pager_command() -> Optional[str]:
+    """Determine the pager command in the same way as pydoc.
+
+    :return: The pager command, or None if output shouldn’t be paged
+    """
+    if not sys.stdin.isatty() or not sys.stdout.isatty():
+        return None
+
+    command = os.getenv("MANPAGER") or os.getenv("PAGER")
+    if command:
+        return command
+
+    if os.getenv("TERM") in ("dumb", "emacs"):
+        return None
+
+    # Like pydoc, fall back to more, then to plain output.
+    for command in ("less", "more"):
+        if shutil.which(command):
+            return command
+
+    return None
+
+
+def _pipe_to_pager(chunks: Iterable[str], command: str) -> None:
+    proc = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, errors="backslashreplace")
+    try:
+        with proc.stdin as pipe:
+            for chunk in chunks:
+                pipe.write(chunk)
+            pipe.write("\n")
+    except (BrokenPipeError, KeyboardInterrupt):
+        # The pager was quit early, the remaining chunks needn’t be produced.
+        pass
+
+    while True:
+        try:
+            proc.wait()
+            break
+        except KeyboardInterrupt:  # pragma: no cover
+            # Let the pager handle ^C.
+            pass
+
+
+def page(text: Union[str, Iterable[str]], enabled: Optional[bool] = False) -> None:
+    """Show text, optionally in a pager.
+
+    Text can be passed as an iterable of chunks, these are written out as
+    they are produced, i.e. the pager can show the first screen before all
+    of the text is available.
+
+    :param text: The text, or an iterable of its chunks
+    :param enabled: Whether to use a pager if connected to a terminal
+    """
+    chunks = (text,) if isinstance(text, str) else text
+
     if enabled:
         # Initialize less options from $RPMAUTOSPEC_LESS or provide a suitable fallback.
         # F: don't page if one screen
@@ -11,7 +68,12 @@ def page(text: str, enabled: Optional[bool] = False) -> None:
         # M: verbose prompt
         # K: quit on ^C
         os.environ["LESS"] = os.getenv("RPMAUTOSPEC_LESS", "FXMK")
-        pydoc.pager(text)
 
-    else:
-        print(text)
+        command = _get_pager_command()
+        if command:
+            _pipe_to_pager(chunks, command)
+            return
+
+    for chunk in chunks:
+        sys.stdout.write(chunk)
+    sys.stdout.write("\n")
@@ -0,0 +1,237 @@
+"""Read git commit-graph files.
+
+A commit-graph file stores the parents, root tree ids and commit times of commits, which lets
+history be traversed without inflating commit objects. The format is documented in git’s
+`Documentation/gitformat-commit-graph.txt`, the files are written by `git commit-graph write`.
+"""
+
+import logging
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+log = logging.getLogger(__name__)
+
+SIGNATURE = b"CGPH"
+VERSION = 1
+HASH_VERSION_SHA1 = 1
+HASH_SIZE = 20
+
+CHUNK_OID_FANOUT = b"OIDF"
+CHUNK_OID_LOOKUP = b"OIDL"
+CHUNK_COMMIT_DATA = b"CDAT"
+CHUNK_EXTRA_EDGES = b"EDGE"
+
+PARENT_NONE = 0x70000000
+PARENT_OCTOPUS = 0x80000000
+EDGE_LAST = 0x80000000
+
+HEADER = struct.Struct(">4sBBBB")
+CHUNK_LOOKUP_ENTRY = struct.Struct(">4sQ")
+COMMIT_DATA = struct.Struct(f">{HASH_SIZE}sLLLL")
+
+
+class CommitGraphError(Exception):
+    """A commit-graph file can’t be read."""
+
+
+def git_common_dir(git_dir: Union[str, Path]) -> Path:
+    """Find the common git directory of a repository.
+
+    For linked worktrees, this is the git directory of the main worktree,
+    which contains objects, refs and the shallow file shared by all worktrees.
+
+    :param git_dir: The (possibly per-worktree) git directory
+    :return: The common git directory
+    """
+    git_dir = Path(git_dir)
+    try:
+        common_dir = (git_dir / "commondir").read_text().strip()
+    except FileNotFoundError:
+        return git_dir
+    return (git_dir / common_dir).resolve()
+
+
+def commit_graph_incompatibility(git_dir: Union[str, Path]) -> Optional[str]:
+    """Check whether the commit-graph of a repository can be trusted.
+
+    Like git, this considers the commit-graph unusable if the parents of
+    commits can differ from those stored in the commit objects, i.e. in
+    shallow clones, with grafts or replace refs.
+
+    :param git_dir: The git directory of the repository
+    :return: Why the commit-graph can’t be used, or None if it can
+    """
+    common_dir = git_common_dir(git_dir)
+
+    if (common_dir / "shallow").exists():
+        return "the repository is a shallow clone"
+
+    if (common_dir / "info" / "grafts").exists():
+        return "the repository has grafts"
+
+    replace_dir = common_dir / "refs" / "replace"
+    if replace_dir.is_dir() and any(path.is_file() for path in replace_dir.rglob("*")):
+        return "the repository has replace refs"
+    try:
+        packed_refs = (common_dir / "packed-refs").read_text(errors="replace")
+    except FileNotFoundError:
+        pass
+    else:
+        if " refs/replace/" in packed_refs:
+            return "the repository has replace refs"
+
+    return None
+
+
+class CommitGraphEntry(NamedTuple):
+    """Information about a commit stored in a commit-graph."""
+
+    tree_id: bytes
+    parent_ids: tuple[bytes, ...]
+    commit_time: int
+
+
+class CommitGraph:
+    """Commit-graph of a repository, possibly made up of a chain of several layers.
+
+    Commits are identified by their raw (binary) ids.
+    """
+
+    def __init__(self, layers: Iterable[bytes]) -> None:
+        """Parse the commit-graph layers.
+
+        :param layers: The contents of the commit-graph files, from the base
+            to the top layer
+        """
+        self._oids: list[bytes] = []
+        self._commit_data: list[memoryview] = []
+        self._extra_edges: list[memoryview] = []
+
+        for layer in layers:
+            self._parse_layer(memoryview(layer))
+
+        self._positions = {oid: pos for pos, oid in enumerate(self._oids)}
+
+    def _parse_layer(self, data: memoryview) -> None:
+        if len(data) < HEADER.size:
+            raise CommitGraphError("File too short")
+
+        signature, version, hash_version, n_chunks, _ = HEADER.unpack_from(data)
+        if signature != SIGNATURE:
+            raise CommitGraphError("Invalid signature")
+        if version != VERSION:
+            raise CommitGraphError(f"Unsupported version: {version}")
+        if hash_version != HASH_VERSION_SHA1:
+            raise CommitGraphError(f"Unsupported hash version: {hash_version}")
+
+        chunks = {}
+        offset = HEADER.size
+        entries = [
+            CHUNK_LOOKUP_ENTRY.unpack_from(data, offset + i * CHUNK_LOOKUP_ENTRY.size)
+            for i in range(n_chunks + 1)
+        ]
+        for (chunk_id, start), (_, end) in zip(entries, entries[1:]):
+            chunks[chunk_id] = data[start:end]
+
+        try:
+            oid_lookup = chunks[CHUNK_OID_LOOKUP]
+            commit_data = chunks[CHUNK_COMMIT_DATA]
+        except KeyError as exc:
+            raise CommitGraphError(f"Missing chunk: {exc.args[0].decode()}") from exc
+
+        n_commits = len(oid_lookup) // HASH_SIZE
+        if len(commit_data) != n_commits * COMMIT_DATA.size:
+            raise CommitGraphError("Commit data doesn’t match number of commits")
+
+        self._oids.extend(
+            bytes(oid_lookup[pos * HASH_SIZE : (pos + 1) * HASH_SIZE]) for pos in range(n_commits)
+        )
+        self._commit_data.append(commit_data)
+        self._extra_edges.append(chunks.get(CHUNK_EXTRA_EDGES, memoryview(b"")))
+
+    @classmethod
+    def from_git_dir(cls, git_dir: Union[str, Path]) -> Optional["CommitGraph"]:
+        """Load the commit-graph of a repository, if it has one.
+
+        :param git_dir: The git directory of the repository
+        :return: The commit-graph or None if it doesn’t exist, can’t be read
+            or can’t be used
+        """
+        if reason := commit_graph_incompatibility(git_dir):
+            log.debug("Not using commit-graph in %s: %s", git_dir, reason)
+            return None
+
+        info_dir = git_common_dir(git_dir) / "objects" / "info"
+
+        try:
+            graph_file = info_dir / "commit-graph"
+            if graph_file.exists():
+                layers = [graph_file.read_bytes()]
+            else:
+                graphs_dir = info_dir / "commit-graphs"
+                chain = (graphs_dir / "commit-graph-chain").read_text().split()
+                layers = [(graphs_dir / f"graph-{name}.graph").read_bytes() for name in chain]
+            return cls(layers)
+        except FileNotFoundError:
+            return None
+        except (OSError, CommitGraphError, struct.error) as exc:
+            log.debug("Can’t read commit-graph in %s: %s", git_dir, exc)
+            return None
+
+    def __len__(self) -> int:
+        return len(self._oids)
+
+    def __contains__(self, oid: bytes) -> bool:
+        return oid in self._positions
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self._oids)
+
+    def _locate(self, pos: int) -> tuple[int, int]:
+        """Find the layer in which a commit is stored and its position there."""
+        for layer, commit_data in enumerate(self._commit_data):
+            n_commits = len(commit_data) // COMMIT_DATA.size
+            if pos < n_commits:
+                return layer, pos
+            pos -= n_commits
+        raise CommitGraphError(f"Invalid commit position: {pos}")  # pragma: no cover
+
+    def __getitem__(self, oid: bytes) -> CommitGraphEntry:
+        layer, pos = self._locate(self._positions[oid])
+
+        tree_id, parent1, parent2, gen_time_high, time_low = COMMIT_DATA.unpack_from(
+            self._commit_data[layer], pos * COMMIT_DATA.size
+        )
+
+        parent_positions = []
+        if parent1 != PARENT_NONE:
+            parent_positions.append(parent1)
+        if parent2 & PARENT_OCTOPUS:
+            # Parents from the second on are in the extra edges list.
+            extra_edges = self._extra_edges[layer]
+            edge_index = parent2 & ~PARENT_OCTOPUS
+            while True:
+                (edge,) = struct.unpack_from(">L", extra_edges, edge_index * 4)
+                parent_positions.append(edge & ~EDGE_LAST)
+                if edge & EDGE_LAST:
+                    break
+                edge_index += 1
+        elif parent2 != PARENT_NONE:
+            parent_positions.append(parent2)
+
+        return CommitGraphEntry(
+            tree_id=tree_id,
+            parent_ids=tuple(self._oids[p] for p in parent_positions),
+            commit_time=((gen_time_high & 0x3) << 32) | time_low,
+        )
+
+    def parent_ids(self, oid: bytes) -> tuple[bytes, ...]:
+        """Get the ids of the parents of a commit.
+
+        :param oid: The raw id of the commit
+        :return: The raw ids of its parents
+        :raises KeyError: If the commit isn’t in the commit-graph
+        """
+        return self[oid].parent_ids
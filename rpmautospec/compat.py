@@ -1,6 +1,6 @@
 from enum import IntEnum, IntFlag
 from io import BytesIO
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 needs_minimal_pygit2_enums = False
 
@@ -77,9 +77,51 @@ if not uses_minigit2 and needs_minimal_pygit2_enums:  # pragma: no cover
 
 if TYPE_CHECKING:
     if uses_minigit2:
-        from .minigit2 import Blob, Oid
+        from .minigit2 import Blob, Oid, Tree
     else:
-        from pygit2 import Blob, Oid
+        from pygit2 import Blob, Oid, Tree
+
+
+def blob_memoryview(blob: "Blob") -> memoryview:
+    """Get a read-only view of the content of a blob without copying it.
+
+    :param blob: The blob
+    :return: A memoryview of the blob content
+    """
+    if uses_minigit2:  # pragma: has-no-pygit2
+        return blob.memoryview()
+    else:  # pragma: has-pygit2
+        return memoryview(blob)
+
+
+def oid_from_hex(hexid: str) -> "Oid":
+    """Create an object id from its hexadecimal representation.
+
+    :param hexid: The hexadecimal object id
+    :return: The object id
+    """
+    if uses_minigit2:  # pragma: has-no-pygit2
+        return pygit2.Oid._from_oid(hexid)
+    else:  # pragma: has-pygit2
+        return pygit2.Oid(hex=hexid)
+
+
+def tree_entry_id(tree: "Tree", path: str) -> Optional[tuple["Oid", int]]:
+    """Look up the id and file mode of a tree entry without reading its object.
+
+    :param tree: The tree
+    :param path: The path of the entry, relative to the tree
+    :return: The object id and file mode of the entry, or None if it doesn’t exist
+    """
+    try:
+        if uses_minigit2:  # pragma: has-no-pygit2
+            return tree.entry_id(path)
+        else:  # pragma: has-pygit2
+            # Objects looked up in trees are loaded lazily by pygit2.
+            entry = tree[path]
+            return entry.id, entry.filemode
+    except KeyError:
+        return None
 
 
 class MinimalBlobIO:
@@ -17,3 +17,7 @@ class RpmautospecException(Exception):
 
 class SpecParseFailure(RpmautospecException):
     """Failure parsing spec file."""
+
+
+class HistorySeedError(RpmautospecException):
+    """The history can’t be processed correctly with the passed seed."""
@@ -1,18 +1,47 @@
+import copy
 import datetime as dt
 import logging
+import operator
 import re
 import stat
-from collections import defaultdict
-from functools import reduce
+from collections import defaultdict, deque
+from collections.abc import MutableMapping
+from functools import cached_property, reduce
 from pathlib import Path, PurePath
-from shutil import SpecialFileError
+from shutil import SpecialFileError, copyfileobj
 from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import TYPE_CHECKING, Any, Optional, Sequence, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    Container,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Union,
+)
 
 from .changelog import ChangelogEntry
-from .compat import BlobIO, pygit2, rpm
-from .magic_comments import parse_magic_comments
+from .commit_graph import CommitGraph, git_common_dir
+from .compat import (
+    BlobIO,
+    blob_memoryview,
+    needs_minimal_blobio,
+    oid_from_hex,
+    pygit2,
+    rpm,
+    tree_entry_id,
+)
+from .exc import HistorySeedError
+from .magic_comments import MagicCommentResult, parse_magic_comments
 from .specparser import AutoSpecParser, SpecParserError
+from .specscanner import SpecScan, scan_specfile
 
 if TYPE_CHECKING:
     from .specparser import SpecParser
@@ -41,11 +70,199 @@ def _checkout_tree_files(
             if stat.S_ISLNK(entry.filemode):
                 fpath.symlink_to(entry.data)
             else:  # stat.S_ISREG(entry.filemode)
-                with BlobIO(entry, as_path=str(relpath), commit_id=commit.id) as f:
-                    fpath.write_bytes(f.read())
+                if needs_minimal_blobio:  # pragma: has-no-pygit2
+                    # No filters to apply, write out the blob content without copying it.
+                    with fpath.open("wb") as f:
+                        f.write(blob_memoryview(entry))
+                else:  # pragma: has-pygit2
+                    blobio = BlobIO(entry, as_path=str(relpath), commit_id=commit.id)
+                    with blobio as f, fpath.open("wb") as dst:
+                        copyfileobj(f, dst)
                 fpath.chmod(stat.S_IMODE(entry.filemode))
 
 
+class CommitFacts(NamedTuple):
+    """Facts about a commit, as used by the visitors.
+
+    Parents are referred to by their ids, so facts don’t keep commit objects
+    and their ancestors alive.
+    """
+
+    parent_ids: tuple[pygit2.Oid, ...]
+    tree_id: pygit2.Oid
+    spec_ids: dict[str, Optional[pygit2.Oid]]
+    changelog_id: Optional[pygit2.Oid]
+    message: str
+    authorblurb: str
+    timestamp: dt.datetime
+
+
+class _Record(MutableMapping):
+    """Base of slotted records whose fields can be accessed like in a dictionary.
+
+    Keys are the field names with dashes instead of underscores. Unset
+    fields are missing keys. Other keys, e.g. set by custom visitors, are
+    kept in an auxiliary dictionary.
+    """
+
+    __slots__ = ("_extra",)
+
+    # Maps keys to the names of the fields
+    _fields_by_key: ClassVar[dict[str, str]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields_by_key = {name.replace("_", "-"): name for name in cls.__slots__}
+
+    def __init__(self, items: Union[Mapping[str, Any], Iterable[tuple[str, Any]]] = ()):
+        self._extra = None
+        self.update(items)
+
+    def __getitem__(self, key: str) -> Any:
+        field = self._fields_by_key.get(key)
+        if field:
+            try:
+                return getattr(self, field)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        field = self._fields_by_key.get(key)
+        if field:
+            setattr(self, field, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        field = self._fields_by_key.get(key)
+        if field:
+            try:
+                delattr(self, field)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key, field in self._fields_by_key.items():
+            if hasattr(self, field):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def __or__(self, other: Mapping[str, Any]) -> "_Record":
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        record = self.copy()
+        record.update(other)
+        return record
+
+    def __ior__(self, other: Mapping[str, Any]) -> "_Record":
+        self.update(other)
+        return self
+
+    def copy(self) -> "_Record":
+        return type(self)(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the record, and records it contains, to plain dictionaries."""
+        return {
+            key: value.to_dict() if isinstance(value, _Record) else value
+            for key, value in self.items()
+        }
+
+
+class RPMVerFlags(_Record):
+    """The epoch/version and %autorelease flags of a spec file, or error information."""
+
+    __slots__ = (
+        "epoch_version",
+        "extraver",
+        "snapinfo",
+        "prerelease",
+        "base",
+        "error",
+        "error_detail",
+    )
+
+    epoch_version: Optional[str]
+    extraver: Optional[str]
+    snapinfo: Optional[str]
+    prerelease: Optional[bool]
+    base: Optional[int]
+    error: str
+    error_detail: Optional[str]
+
+
+class CommitResult(_Record):
+    """The result of processing a commit (or the worktree) with visitors."""
+
+    __slots__ = (
+        "commit_id",
+        "verflags",
+        "epoch_version",
+        "magic_comment_result",
+        "release_number",
+        "release_complete",
+        "changelog",
+    )
+
+    commit_id: Optional[pygit2.Oid]
+    verflags: RPMVerFlags
+    epoch_version: Optional[str]
+    magic_comment_result: MagicCommentResult
+    release_number: int
+    release_complete: str
+    changelog: tuple[ChangelogEntry, ...]
+
+
+class Visitor(Protocol):
+    """The protocol of visitors which process commits in the history.
+
+    Called with a commit and the information passed on from its children, a
+    visitor returns a generator (usually, it is a generator function) which:
+
+    1. Yields information to pass on to the parents of the commit. This
+       must contain `child_must_continue`, i.e. whether the results of the
+       parents are needed. Other keys need to be registered with their merge
+       semantics, see `PkgHistoryProcessor.register_info_key()`.
+    2. Is sent the partial result of the commit, as produced by the
+       preceding visitors, and the results of its parents as a tuple. The
+       partial result is a `CommitResult`, results of parents can also be
+       plain dictionaries, e.g. if they were known beforehand.
+    3. Yields the result of the commit, usually the partial result updated
+       in place.
+
+    Information from children is merged per key if a commit has several
+    children. The head commit gets only `child_must_continue` and possibly
+    `changelog_removed`, other keys can be missing. A missing key means the
+    same as a false value.
+
+    All visitors passed to `PkgHistoryProcessor.run()` are run in the same
+    traversal of the history.
+    """
+
+    def __call__(
+        self, commit: pygit2.Commit, child_info: dict[str, Any]
+    ) -> Generator[dict[str, Any], tuple[dict[str, Any], list[dict[str, Any]]], None]: ...
+
+
+VisitorOrName = Union[Visitor, str]
+
+
 class PkgHistoryProcessor:
     autorelease_flags_re = re.compile(
         r"^E(?P<extraver>[^_]*)_S(?P<snapinfo>[^_]*)_P(?P<prerelease>[01])_B(?P<base>\d*)$"
@@ -53,8 +270,31 @@ class PkgHistoryProcessor:
 
     specparser: "SpecParser"
 
-    def __init__(self, spec_or_path: Union[str, Path]):
-        self.specparser = AutoSpecParser()
+    # How information passed on by visitors is merged for commits with several children, by key
+    info_merge_registry: ClassVar[dict[str, Callable[[Any, Any], Any]]] = {
+        "child_must_continue": operator.or_,
+        "changelog_removed": operator.and_,
+    }
+
+    def __init__(
+        self,
+        spec_or_path: Union[str, Path],
+        *,
+        spec_names: Optional[Sequence[str]] = None,
+        enable_caching: bool = False,
+    ):
+        """Set up processing the history of a package repository.
+
+        :param spec_or_path: The spec file or directory it is located in.
+        :param spec_names: The names of further spec files in the
+            repository (without the `.spec` extension), to be processed in
+            the same traversal of the history, see `specs` and `run()`
+        :param enable_caching: Whether to cache scan and parse results of
+            spec files process-wide, see `scan_specfile()` and
+            `AutoSpecParser`
+        """
+        self.enable_caching = enable_caching
+        self.specparser = AutoSpecParser(enable_caching=enable_caching)
 
         if isinstance(spec_or_path, str):
             spec_or_path = Path(spec_or_path)
@@ -88,7 +328,49 @@ class PkgHistoryProcessor:
         except pygit2.GitError:
             self.repo = None
 
+        self._init_spec_caches()
+        self._commit_facts = {}
+
+        # Processors for all spec files, these share everything but the spec file and its caches.
+        self.specs = {self.name: self}
+        for name in spec_names or ():
+            if name not in self.specs:
+                self.specs[name] = self._for_spec(name)
+
+    def _init_spec_caches(self) -> None:
         self._rpmverflags_for_commits = {}
+        self._rpmverflags_for_spec_ids = {}
+        self._rpmverflags_for_tree_ids = {}
+
+    def _for_spec(self, name: str) -> "PkgHistoryProcessor":
+        """Create a processor for another spec file in the same repository.
+
+        :param name: The name of the spec file, without the extension
+        :return: The processor for the spec file
+        """
+        processor = copy.copy(self)
+        processor.name = name
+        processor.specfile = self.path / f"{name}.spec"
+        processor._init_spec_caches()
+        return processor
+
+    @cached_property
+    def commit_graph(self) -> Optional[CommitGraph]:
+        """The commit-graph of the repository, if it has one."""
+        if not self.repo:
+            return None
+        return CommitGraph.from_git_dir(self.repo.path)
+
+    @cached_property
+    def shallow_commits(self) -> frozenset[bytes]:
+        """The raw ids of commits whose parents are cut off in a shallow clone."""
+        if not self.repo:
+            return frozenset()
+        try:
+            lines = (git_common_dir(self.repo.path) / "shallow").read_text().split()
+        except FileNotFoundError:
+            return frozenset()
+        return frozenset(bytes.fromhex(line) for line in lines)
 
     @staticmethod
     def _get_rpm_packager() -> str:
@@ -99,9 +381,21 @@ class PkgHistoryProcessor:
             return fallback
 
     def _get_rpmverflags(
-        self, path: str, name: Optional[str] = None, log_error: bool = True
-    ) -> dict[str, Union[str, int]]:
-        """Retrieve the epoch/version and %autorelease flags set in spec file."""
+        self,
+        path: str,
+        name: Optional[str] = None,
+        log_error: bool = True,
+        spec_scan: Optional[SpecScan] = None,
+    ) -> RPMVerFlags:
+        """Retrieve the epoch/version and %autorelease flags set in spec file.
+
+        :param path: The directory containing the spec file
+        :param name: The name of the package, by default the name of the
+            directory
+        :param log_error: Whether to log failures to parse the spec file
+        :param spec_scan: The scanned spec file, if it was scanned already
+        :return: The epoch/version and flags, or error information
+        """
         path = Path(path)
 
         if not name:
@@ -111,22 +405,21 @@ class PkgHistoryProcessor:
 
         if not specfile.exists():
             log.debug("spec file missing: %s", specfile)
-            return {"error": "specfile-missing", "error-detail": "Spec file is missing."}
-
-        with (
-            specfile.open(mode="rb") as unabridged,
-            NamedTemporaryFile(
-                mode="wb", prefix=f"rpmautospec-abridged-{name}-", suffix=".spec"
-            ) as abridged,
-        ):
+            return RPMVerFlags(
+                {"error": "specfile-missing", "error-detail": "Spec file is missing."}
+            )
+
+        if not spec_scan:
+            spec_scan = scan_specfile(specfile, enable_caching=self.enable_caching)
+
+        with NamedTemporaryFile(
+            mode="wb", prefix=f"rpmautospec-abridged-{name}-", suffix=".spec"
+        ) as abridged:
             # Attempt to parse a shortened version of the spec file first, to speed up
             # processing in certain cases. This includes all lines before `%prep`, i.e. in most
             # cases everything which is needed to make RPM parsing succeed and contain the info
             # we want to extract.
-            for line in unabridged:
-                if line.strip() == b"%prep":
-                    break
-                abridged.write(line)
+            abridged.write(spec_scan.abridged())
             abridged.flush()
 
             candidates = (abridged.name, str(specfile))
@@ -146,7 +439,7 @@ class PkgHistoryProcessor:
         if error:
             if log_error:
                 log.debug("spec file query failed: %s", rpmerr_out)
-            return {"error": "specfile-parse-error", "error-detail": rpmerr_out}
+            return RPMVerFlags({"error": "specfile-parse-error", "error-detail": rpmerr_out})
 
         match = self.autorelease_flags_re.match(info)
         if match:
@@ -161,43 +454,102 @@ class PkgHistoryProcessor:
         else:
             extraver = snapinfo = prerelease = base = None
 
-        result = {
-            "epoch-version": epoch_version,
-            "extraver": extraver,
-            "snapinfo": snapinfo,
-            "prerelease": prerelease,
-            "base": base,
-        }
+        result = RPMVerFlags(
+            {
+                "epoch-version": epoch_version,
+                "extraver": extraver,
+                "snapinfo": snapinfo,
+                "prerelease": prerelease,
+                "base": base,
+            }
+        )
 
         return result
 
-    def _get_rpmverflags_for_commit(self, commit: pygit2.Commit) -> dict[str, Union[str, int]]:
-        if commit in self._rpmverflags_for_commits:
-            return self._rpmverflags_for_commits[commit]
+    def _get_commit_facts(self, commit: pygit2.Commit) -> CommitFacts:
+        """Get the facts about a commit, looking them up only once.
+
+        :param commit: The commit
+        :return: The facts about the commit
+        """
+        oid = commit.id.raw
+        try:
+            return self._commit_facts[oid]
+        except KeyError:
+            pass
+
+        tree = commit.tree
+        spec_ids = {}
+        for name in self.specs:
+            spec_entry_id = tree_entry_id(tree, f"{name}.spec")
+            spec_ids[name] = spec_entry_id[0] if spec_entry_id else None
+        changelog_entry_id = tree_entry_id(tree, "changelog")
+        author = commit.author
+
+        facts = self._commit_facts[oid] = CommitFacts(
+            # Parents of commits at the boundary of a shallow clone are missing.
+            parent_ids=tuple(commit.parent_ids) if oid not in self.shallow_commits else (),
+            tree_id=tree.id,
+            spec_ids=spec_ids,
+            changelog_id=changelog_entry_id[0] if changelog_entry_id else None,
+            message=commit.message,
+            authorblurb=f"{author.name} <{author.email}>",
+            timestamp=dt.datetime.fromtimestamp(commit.commit_time, dt.timezone.utc),
+        )
+
+        return facts
 
-        with TemporaryDirectory(prefix="rpmautospec-") as workdir:
-            workdir = Path(workdir)
+    def _get_rpmverflags_for_commit(self, commit: pygit2.Commit) -> RPMVerFlags:
+        """Retrieve the epoch/version and %autorelease flags of a commit.
 
-            # Only unpack spec file at first.
-            try:
-                specblob = commit.tree[self.specfile.name]
-            except KeyError:
-                # no spec file
-                error = {"error": "specfile-missing", "error-detail": "Spec file is missing."}
-                self._rpmverflags_for_commits[commit] = error
-                return error
+        The spec file is only parsed if no other commit with the same spec
+        file was processed before. If the spec file can’t be parsed on its
+        own, the results depend on other files it includes and are only
+        shared between commits with the same tree.
+
+        :param commit: The commit
+        :return: The epoch/version and flags, or error information
+        """
+        oid = commit.id.raw
+        if oid in self._rpmverflags_for_commits:
+            return self._rpmverflags_for_commits[oid]
 
-            specpath = workdir / self.specfile.name
-            specpath.write_bytes(specblob.data)
+        facts = self._get_commit_facts(commit)
+        spec_id = facts.spec_ids[self.name]
 
-            rpmverflags = self._get_rpmverflags(workdir, self.name, log_error=False)
+        if spec_id is None:
+            # no spec file
+            rpmverflags = RPMVerFlags(
+                {"error": "specfile-missing", "error-detail": "Spec file is missing."}
+            )
+        elif spec_id in self._rpmverflags_for_spec_ids:
+            rpmverflags = self._rpmverflags_for_spec_ids[spec_id]
+        elif facts.tree_id in self._rpmverflags_for_tree_ids:
+            rpmverflags = self._rpmverflags_for_tree_ids[facts.tree_id]
+        else:
+            with TemporaryDirectory(prefix="rpmautospec-") as workdir:
+                workdir = Path(workdir)
+
+                # Only unpack spec file at first.
+                specpath = workdir / self.specfile.name
+                spec_data = blob_memoryview(self.repo[spec_id])
+                with specpath.open("wb") as f:
+                    f.write(spec_data)
+                spec_scan = SpecScan(spec_data)
+
+                rpmverflags = self._get_rpmverflags(
+                    workdir, self.name, log_error=False, spec_scan=spec_scan
+                )
 
-            if "error" in rpmverflags:
-                # Provide all files for %include and %load directives.
-                _checkout_tree_files(commit, commit.tree, workdir)
-                rpmverflags = self._get_rpmverflags(workdir, self.name)
+                if "error" not in rpmverflags:
+                    self._rpmverflags_for_spec_ids[spec_id] = rpmverflags
+                else:
+                    # Provide all files for %include and %load directives.
+                    _checkout_tree_files(commit, commit.tree, workdir)
+                    rpmverflags = self._get_rpmverflags(workdir, self.name, spec_scan=spec_scan)
+                    self._rpmverflags_for_tree_ids[facts.tree_id] = rpmverflags
 
-        self._rpmverflags_for_commits[commit] = rpmverflags
+        self._rpmverflags_for_commits[oid] = rpmverflags
         return rpmverflags
 
     def release_number_visitor(self, commit: pygit2.Commit, child_info: dict[str, Any]):
@@ -207,10 +559,11 @@ class PkgHistoryProcessor:
         followed, i.e. if one parent has the same package epoch-version,
         suspends execution and yields that to the caller (usually the walk()
         method), who later sends the partial results for this commit (to be
-        modified) and full results of parents back (as dictionaries), resuming
+        modified) and full results of parents back (as mappings), resuming
         execution to process these and finally yield back the results for this
         commit.
         """
+        facts = self._get_commit_facts(commit)
         commit_verflags = verflags = self._get_rpmverflags_for_commit(commit)
 
         if "error" not in verflags:
@@ -229,8 +582,8 @@ class PkgHistoryProcessor:
             child_must_continue = True
         else:
             epoch_versions_to_check = []
-            for p in commit.parents:
-                verflags = self._get_rpmverflags_for_commit(p)
+            for parent_id in facts.parent_ids:
+                verflags = self._get_rpmverflags_for_commit(self.repo[parent_id])
                 if "error" in verflags:
                     child_must_continue = True
                     break
@@ -244,12 +597,12 @@ class PkgHistoryProcessor:
         log.debug("\tchild must continue: %s", child_must_continue)
 
         # Suspend execution, yield whether caller should continue, and get back the (partial) result
-        # for this commit and parent results as dictionaries on resume.
+        # for this commit and parent results as mappings on resume.
         commit_result, parent_results = yield {"child_must_continue": child_must_continue}
 
-        commit_result["verflags"] = commit_verflags
-        commit_result["epoch-version"] = epoch_version
-        commit_result["magic-comment-result"] = parse_magic_comments(commit.message)
+        commit_result.verflags = commit_verflags
+        commit_result.epoch_version = epoch_version
+        commit_result.magic_comment_result = parse_magic_comments(facts.message)
 
         log.debug("\tepoch_version: %s", epoch_version)
         log.debug(
@@ -276,18 +629,18 @@ class PkgHistoryProcessor:
         )
         release_number = max(parent_release_numbers, default=0)
 
-        if self.specfile.name in commit.tree:
+        if facts.spec_ids[self.name]:
             release_number += 1
 
-        release_number = max(release_number, commit_result["magic-comment-result"].bump_release)
+        release_number = max(release_number, commit_result.magic_comment_result.bump_release)
 
-        commit_result["release-number"] = release_number
+        commit_result.release_number = release_number
 
         log.debug("\trelease_number: %s", release_number)
 
         prerel_str = "0." if prerelease else ""
         release_number_with_base = release_number + base - 1
-        commit_result["release-complete"] = f"{prerel_str}{release_number_with_base}{tag_string}"
+        commit_result.release_complete = f"{prerel_str}{release_number_with_base}{tag_string}"
 
         yield commit_result
 
@@ -297,49 +650,47 @@ class PkgHistoryProcessor:
         It first determines if parent chain(s) must be followed, i.e. if the
         changelog file was modified in this commit and yields that to the
         caller, who later sends the partial results for this commit (to be
-        modified) and full results of parents back (as dictionaries), which
+        modified) and full results of parents back (as mappings), which
         get processed and the results for this commit yielded again.
         """
         child_must_continue = child_info["child_must_continue"]
+        facts = self._get_commit_facts(commit)
+        parents_facts = [
+            self._get_commit_facts(self.repo[parent_id]) for parent_id in facts.parent_ids
+        ]
+
         # Check if the spec file exists, if not, there will be no changelog.
-        specfile_present = f"{self.name}.spec" in commit.tree
+        specfile_present = bool(facts.spec_ids[self.name])
 
         # Find out if the changelog is different from every parent (or present, in the case of the
-        # root commit).
-        try:
-            changelog_blob = commit.tree["changelog"]
-        except KeyError:
-            changelog_blob = None
+        # root commit). Only compare object ids, the content is read only if needed.
+        changelog_id = facts.changelog_id
 
         child_changelog_removed = child_info.get("changelog_removed")
         our_changelog_removed = False
-        if commit.parents:
+        if parents_facts:
             changelog_changed = True
-            for parent in commit.parents:
-                try:
-                    par_changelog_blob = parent.tree["changelog"]
-                except KeyError:
-                    par_changelog_blob = None
-                else:
-                    our_changelog_removed = our_changelog_removed or not changelog_blob
-                if changelog_blob == par_changelog_blob:
+            for parent_facts in parents_facts:
+                if parent_facts.changelog_id:
+                    our_changelog_removed = our_changelog_removed or not changelog_id
+                if changelog_id == parent_facts.changelog_id:
                     changelog_changed = False
         else:
             # With root commits, changelog present means it was changed
-            changelog_changed = bool(changelog_blob)
+            changelog_changed = bool(changelog_id)
 
         # Establish which parent to follow (if any, and if we can).
-        parent_to_follow = None
+        parent_to_follow_id = None
         merge_unresolvable = False
-        if len(commit.parents) < 2:
-            if commit.parents:
-                parent_to_follow = commit.parents[0]
+        if len(parents_facts) < 2:
+            if parents_facts:
+                parent_to_follow_id = facts.parent_ids[0]
         else:
-            for parent in commit.parents:
-                if commit.tree == parent.tree:
+            for parent_id, parent_facts in zip(facts.parent_ids, parents_facts):
+                if facts.tree_id == parent_facts.tree_id:
                     # Merge done with strategy "ours" or equivalent, i.e. (at least) one parent has
                     # the same content. Follow this parent
-                    parent_to_follow = parent
+                    parent_to_follow_id = parent_id
                     break
             else:
                 # Didn't break out of loop => no parent with same tree found. If the changelog
@@ -348,7 +699,7 @@ class PkgHistoryProcessor:
                 merge_unresolvable = not changelog_changed
 
         our_child_must_continue = (
-            not (changelog_changed and changelog_blob or merge_unresolvable) and child_must_continue
+            not (changelog_changed and changelog_id or merge_unresolvable) and child_must_continue
         )
 
         log.debug("\tchangelog changed: %s", changelog_changed)
@@ -361,54 +712,56 @@ class PkgHistoryProcessor:
 
         commit_result, parent_results = yield {
             "child_must_continue": our_child_must_continue,
-            "changelog_removed": not (changelog_blob and changelog_changed)
+            "changelog_removed": not (changelog_id and changelog_changed)
             and (child_changelog_removed or our_changelog_removed),
         }
 
         changelog_entry = ChangelogEntry(
             {
                 "commit-id": commit.id,
-                "authorblurb": f"{commit.author.name} <{commit.author.email}>",
-                "timestamp": dt.datetime.fromtimestamp(commit.commit_time, dt.timezone.utc),
-                "commitlog": commit.message,
-                "epoch-version": commit_result["epoch-version"],
-                "release-complete": commit_result["release-complete"],
+                "authorblurb": facts.authorblurb,
+                "timestamp": facts.timestamp,
+                "commitlog": facts.message,
+                "epoch-version": commit_result.epoch_version,
+                "release-complete": commit_result.release_complete,
             }
         )
 
         skip_for_changelog = (
-            commit_result["magic-comment-result"].skip_changelog or not specfile_present
+            commit_result.magic_comment_result.skip_changelog or not specfile_present
         )
 
         if merge_unresolvable:
             log.debug("\tunresolvable merge")
             changelog_entry["error"] = "unresolvable merge"
             previous_changelog = ()
-            commit_result["changelog"] = (changelog_entry,)
-        elif changelog_changed and changelog_blob:
+            commit_result.changelog = (changelog_entry,)
+        elif changelog_changed and changelog_id:
             log.debug("\tchangelog file changed")
             if not child_changelog_removed:
+                changelog_blob = self.repo[changelog_id]
                 changelog_entry["data"] = changelog_blob.data.decode("utf-8", errors="replace")
-                commit_result["changelog"] = (changelog_entry,)
+                commit_result.changelog = (changelog_entry,)
             else:
                 # The `changelog` file was removed in a later commit, stop changelog generation.
                 log.debug("\t  skipping")
-                commit_result["changelog"] = ()
+                commit_result.changelog = ()
         else:
             # Pull previous changelog entries from parent result (if any).
-            if len(commit.parents) == 1:
-                log.debug("\tone parent: %s", commit.parents[0].short_id)
+            if len(facts.parent_ids) == 1:
+                log.debug("\tone parent: %s", facts.parent_ids[0])
                 previous_changelog = parent_results[0].get("changelog", ())
             else:
-                if parent_to_follow:
-                    log.debug("\tmultiple parents, follow: %s", parent_to_follow.short_id)
+                if parent_to_follow_id is not None:
+                    log.debug("\tmultiple parents, follow: %s", parent_to_follow_id)
                 else:
                     log.debug("\tno parent to follow")
                 previous_changelog = ()
                 for candidate in parent_results:
-                    if not candidate:
+                    if not candidate:  # pragma: no cover
+                        # The parent was only traversed, not processed.
                         continue
-                    if candidate["commit-id"] == parent_to_follow.id:
+                    if candidate["commit-id"] == parent_to_follow_id:
                         previous_changelog = candidate.get("changelog", ())
                         skip_for_changelog = True
                         break
@@ -418,14 +771,85 @@ class PkgHistoryProcessor:
             changelog_entry["skip"] = skip_for_changelog
 
             if not skip_for_changelog:
-                commit_result["changelog"] = (changelog_entry,) + previous_changelog
+                commit_result.changelog = (changelog_entry,) + previous_changelog
             else:
-                commit_result["changelog"] = previous_changelog
+                commit_result.changelog = previous_changelog
 
         yield commit_result
 
-    @staticmethod
-    def _merge_info(f1: dict[str, Any], f2: dict[str, Any]) -> dict[str, Any]:
+    def complete_history_visitor(self, commit: pygit2.Commit, child_info: dict[str, Any]):
+        """Visit a commit to have all of its ancestors processed.
+
+        Other visitors only request processing of as much of the history as
+        they need for the results of the head commit. Add this visitor to get
+        results for all commits instead.
+        """
+        commit_result, parent_results = yield {"child_must_continue": True}
+        yield commit_result
+
+    # Registered visitors by name, these take the processor as their first argument
+    visitor_registry: ClassVar[dict[str, Callable[..., Generator]]] = {
+        "release-number": release_number_visitor,
+        "changelog": changelog_visitor,
+        "complete-history": complete_history_visitor,
+    }
+
+    @classmethod
+    def register_info_key(cls, key: str, merge: Callable[[Any, Any], Any]) -> None:
+        """Register how information passed on by visitors is merged.
+
+        Registering on a subclass only affects it and its subclasses.
+
+        :param key: The key of the information
+        :param merge: The function merging values from two children
+        """
+        registered_merge = cls.info_merge_registry.get(key, merge)
+        if registered_merge is not merge:
+            raise ValueError(f"Information key is registered with other merge semantics: {key}")
+        if key not in cls.info_merge_registry:
+            # Don’t modify the registry of a base class in place.
+            cls.info_merge_registry = {**cls.info_merge_registry, key: merge}
+
+    @classmethod
+    def register_visitor(
+        cls, name: str, *, info_merge: Optional[Mapping[str, Callable[[Any, Any], Any]]] = None
+    ) -> Callable[[Callable[..., Generator]], Callable[..., Generator]]:
+        """Register a visitor, to be used as a decorator.
+
+        The decorated function takes the processor as its first argument,
+        otherwise it follows the `Visitor` protocol. Registering on a
+        subclass only affects it and its subclasses.
+
+        :param name: The name of the visitor
+        :param info_merge: The merge semantics of information keys the
+            visitor passes on, see `register_info_key()`
+        :return: The decorator
+        """
+
+        def decorator(func: Callable[..., Generator]) -> Callable[..., Generator]:
+            if name in cls.visitor_registry:
+                raise ValueError(f"Visitor is registered already: {name}")
+            for key, merge in (info_merge or {}).items():
+                cls.register_info_key(key, merge)
+            # Don’t modify the registry of a base class in place.
+            cls.visitor_registry = {**cls.visitor_registry, name: func}
+            return func
+
+        return decorator
+
+    def get_visitor(self, name: str) -> Visitor:
+        """Get a registered visitor for this processor.
+
+        :param name: The name of the visitor
+        :return: The visitor, bound to this processor
+        """
+        try:
+            func = self.visitor_registry[name]
+        except KeyError:
+            raise ValueError(f"Unknown visitor: {name}") from None
+        return func.__get__(self, type(self))
+
+    def _merge_info(self, f1: dict[str, Any], f2: dict[str, Any]) -> dict[str, Any]:
         """Merge dicts containing info of previously run visitors."""
         mf = f1.copy()
         for k, v2 in f2.items():
@@ -434,249 +858,576 @@ class PkgHistoryProcessor:
             except KeyError:
                 mf[k] = v2
             else:
-                if k == "child_must_continue":
-                    mf[k] = v1 or v2
-                elif k == "changelog_removed":
-                    mf[k] = v1 and v2
-                else:
-                    raise KeyError(f"Unknown information key: {k}")
+                try:
+                    merge = self.info_merge_registry[k]
+                except KeyError:
+                    raise KeyError(f"Unknown information key: {k}") from None
+                mf[k] = merge(v1, v2)
         return mf
 
+    def _get_history_topology(
+        self, heads: Sequence[pygit2.Commit], known: Container[bytes] = ()
+    ) -> tuple[dict[bytes, tuple[bytes, ...]], dict[bytes, list[bytes]]]:
+        """Determine parents and children of commits in the history.
+
+        Commits are identified by their raw ids. The commit-graph of the repository is used if
+        available, commit objects are only read for commits missing from it.
+
+        :param heads: The head commits of the history, it is the union of
+            their ancestries
+        :param known: Commits with known results, their ancestors are omitted and they are
+            treated as root commits, like commits at the boundary of a shallow clone
+        :return: Mappings of commits to their parents and children
+        """
+        graph = self.commit_graph
+        commit_parents = {}
+
+        if graph or known or self.shallow_commits or len(heads) != 1:
+            stack = [head.id.raw for head in heads]
+            while stack:
+                oid = stack.pop()
+                if oid in commit_parents:
+                    continue
+                if oid in known or oid in self.shallow_commits:
+                    parent_ids = ()
+                elif graph and oid in graph:
+                    parent_ids = graph.parent_ids(oid)
+                else:
+                    commit = self.repo[oid.hex()]
+                    parent_ids = tuple(parent_id.raw for parent_id in commit.parent_ids)
+                commit_parents[oid] = parent_ids
+                stack.extend(parent_ids)
+        else:
+            # Repository.walk() is quick.
+            for commit in self.repo.walk(heads[0].id):
+                commit_parents[commit.id.raw] = tuple(
+                    parent_id.raw for parent_id in commit.parent_ids
+                )
+
+        # Unfortunately, git only tells us what the parents of a commit are, not what other commits
+        # a commit is parent to (its children).
+        commit_children = defaultdict(list)
+        for oid, parent_ids in commit_parents.items():
+            for parent_id in parent_ids:
+                commit_children[parent_id].append(oid)
+
+        return commit_parents, commit_children
+
     def _run_on_history(
         self,
-        head: pygit2.Commit,
+        heads: Sequence[pygit2.Commit],
         *,
-        visitors: Sequence = (),
+        visitors: Mapping[str, Sequence],
         seed_info: Optional[dict[str, Any]] = None,
-    ) -> dict[pygit2.Commit, dict[str, Any]]:
-        """Process historical commits with visitors and gather results."""
-        # This sets the “playing field” for the head commit, it subs for the partial result of a
-        # child commit which doesn’t exist.
+        known_results: Optional[dict[bytes, dict[str, dict[str, Any]]]] = None,
+        retain_results: bool = True,
+    ) -> dict[pygit2.Commit, dict[str, dict[str, Any]]]:
+        """Process historical commits with visitors and gather results.
+
+        Visitors are grouped by spec file, each group produces its own results for a commit, but
+        all visitors share one traversal of the history.
+
+        With several head commits, the union of their histories is processed, i.e. commits shared
+        by the heads are processed only once. Information from children of a shared commit must
+        not depend on which heads are processed, otherwise the heads are processed one after the
+        other, and the results of commits shared by them are those in the history of the first
+        head.
+
+        Commits with known results (keyed by their raw ids) and their ancestors aren’t processed,
+        their results are passed on to the visitors of their children instead.
+
+        Unless `retain_results` is set, only the results of the head commits are returned. The
+        results, facts and spec file information of other commits are released as soon as all
+        their children have consumed them, i.e. memory use depends on the width of the history,
+        not its length.
+        """
+        known_results = known_results or {}
+        visitors_by_group = visitors
+        heads_seed_info = seed_info
+
+        # Visitors of all groups are handled alike while walking the history, their results are
+        # only gathered by group.
+        group_slices = {}
+        all_visitors = []
+        for name, group_visitors in visitors.items():
+            group_slices[name] = slice(len(all_visitors), len(all_visitors) + len(group_visitors))
+            all_visitors.extend(group_visitors)
+        visitors = all_visitors
+
+        # This sets the “playing field” for the head commits, it subs for the partial result of a
+        # child commit which doesn’t exist. A head commit can have children if it is an ancestor of
+        # another one, their information is merged with this.
         seed_info = {"child_must_continue": True} | (seed_info or {})
 
+        # Commits are tracked by their raw ids, commit objects are only looked up for commits which
+        # are processed by the visitors.
+        commit_parents, commit_children = self._get_history_topology(heads, known_results)
+        commits = {head.id.raw: head for head in heads}
+        head_ids = frozenset(commits)
+
+        # With several heads, track from which heads commits are reached, as bits in a mask.
+        head_bits = (
+            {oid: 1 << index for index, oid in enumerate(commits)} if len(commits) > 1 else {}
+        )
+        head_masks = {}
+
+        def short_id(oid: bytes) -> str:
+            return oid.hex()[:7]
+
         # These map visited commits to their (in-flight) visitor coroutines and tracks if they must
         # continue and other auxiliary information.
         commit_coroutines = {}
         commit_coroutines_info = {}
 
-        # This keeps track of the heads of branches that need to be processed.
-        branch_heads = [head]
-        # This stores the discovered snippets, i.e. linear chains of commits.
-        snippets = []
-
-        # Unfortunately, pygit2 only tells us what the parents of a commit are, not what other
-        # commits a commit is parent to (its children). Fortunately, Repository.walk() is quick.
-        # This maps parent commits to their children.
-        commit_children = defaultdict(list)
-        for commit in self.repo.walk(head.id):
-            for parent in commit.parents:
-                commit_children[parent].append(commit)
-
         ##########################################################################################
-        # To process, first walk the tree from the head commit downward, following all branches.
-        # Check visitors whether they need parent results to do their work, i.e. the history needs
-        # to be processed further, or just traversed.
+        # To process, first walk the history from the head commits downward, following all
+        # branches. Check visitors whether they need parent results to do their work, i.e. the
+        # history needs to be processed further, or just traversed.
         #
         # Here, the “top halves” of visitors get merged information from their child commit(s) as
         # well as from visitors that ran prior on the same commit. In practice: during runtime,
         # `changelog_visitor()` gets information from `release_number_visitor()` for the same
         # commit.
+        #
+        # Commits are scheduled in topological order (Kahn’s algorithm): a commit becomes ready
+        # once all of its children are visited, so every commit is visited exactly once.
         ##########################################################################################
 
-        log.debug("===========================================================")
-        log.debug("Extracting linear history snippets from branched history...")
-        log.debug("===========================================================")
-
-        # While new branch heads are encountered...
-        while branch_heads:
-            commit = branch_heads.pop(0)
-            snippet = []
-            snippets.append(snippet)
+        log.debug("========================================")
+        log.debug("Walking the history from the head(s)...")
+        log.debug("========================================")
 
-            keep_processing = True
+        # The number of children of each commit which aren’t visited yet.
+        pending_children = {oid: len(commit_children[oid]) for oid in commit_parents}
+        ready = deque(oid for oid in commits if not pending_children[oid])
 
-            while True:
-                if commit in commit_coroutines:
-                    # This commit was processed already, so `snippet` can be cut off before it.
-                    log.debug("%s: coroutines exist, skipping", commit.short_id)
-                    break
-
-                if log.isEnabledFor(logging.DEBUG):
-                    log.debug("commit %s: %s", commit.short_id, commit.message.split("\n", 1)[0])
+        # The commits to be processed, children before parents.
+        processed = []
 
-                if commit == head:
-                    # Set the stage for the first commit: Visitors expect to get some information
-                    # from their child commit(s), as there aren’t any yet, fake it.
-                    children_visitors_info = [seed_info for v in visitors]
-                else:
-                    this_children = commit_children[commit]
-                    if not all(child in commit_coroutines for child in this_children):
-                        # There's another branch that leads to this parent, put the remainder on the
-                        # stack.
-                        branch_heads.append(commit)
-
-                        if not snippet:
-                            # Don't keep empty snippets on the stack. Unsure if this can be reached.
-                            snippets.pop()  # pragma: no cover
-
-                        if log.isEnabledFor(logging.DEBUG):
-                            log.debug(
-                                "\tunencountered children, putting remainder of snippet aside"
-                            )
-                            log.debug(
-                                "\tmissing children: %s",
-                                [
-                                    child.short_id
-                                    for child in this_children
-                                    if child not in commit_coroutines
-                                ],
-                            )
-
-                        break  # pragma: has-py310
-
-                    # For all visitor coroutines, merge their produced info, e.g. to determine if
-                    # any of the children must continue.
-                    children_visitors_info = [
-                        reduce(
-                            lambda info, child: self._merge_info(
-                                info, commit_coroutines_info[child][vindex]
-                            ),
-                            this_children,
-                            {},
-                        )
-                        for vindex, v in enumerate(visitors)
-                    ]
+        # The number of parents of each commit which haven’t merged its visitor info yet.
+        pending_info_merges = {oid: len(parents) for oid, parents in commit_parents.items()}
 
-                    log.debug(
-                        "children_visitors_info[]['child_must_continue']: %s",
-                        [info["child_must_continue"] for info in children_visitors_info],
+        def info_by_head(oid: bytes) -> list[list[dict[str, Any]]]:
+            # The information each head would pass on to a commit in its history on its own, if
+            # the commit is shared by several heads. Information which only steers whether or not
+            # commits are processed, and false values are left out, they don’t make a difference.
+            head_infos = []
+            for head_bit in head_bits.values():
+                if not head_masks[oid] & head_bit or head_masks[oid] == head_bit:
+                    continue
+                head_children = [
+                    child for child in commit_children[oid] if head_masks[child] & head_bit
+                ]
+                infos = (
+                    reduce(
+                        lambda info, child: self._merge_info(
+                            info, commit_coroutines_info[child][vindex]
+                        ),
+                        head_children,
+                        seed_info if head_bits.get(oid) == head_bit else {},
                     )
-
-                    keep_processing = keep_processing and any(  # pragma: no branch
-                        info["child_must_continue"] for info in children_visitors_info
+                    for vindex, v in enumerate(visitors)
+                )
+                head_infos.append(
+                    [
+                        {
+                            key: value
+                            for key, value in info.items()
+                            if key != "child_must_continue" and value
+                        }
+                        for info in infos
+                    ]
+                )
+            return head_infos
+
+        def release_visited(oid: bytes) -> None:
+            # Once a commit is visited, all of its children are, too. Nothing needs the info of
+            # children it was the last parent of anymore, nor its own facts and spec file
+            # information.
+            for child in commit_children[oid]:
+                pending_info_merges[child] -= 1
+                if not pending_info_merges[child]:
+                    del commit_coroutines_info[child]
+                    head_masks.pop(child, None)
+            if not commit_parents[oid]:
+                commit_coroutines_info.pop(oid, None)
+                head_masks.pop(oid, None)
+
+            if not retain_results:
+                self._commit_facts.pop(oid, None)
+                for processor in self.specs.values():
+                    processor._rpmverflags_for_commits.pop(oid, None)
+
+        while ready:
+            oid = ready.popleft()
+
+            if oid in known_results:
+                # The results of this commit are known, so it and its ancestors needn’t be
+                # processed.
+                log.debug("%s: results known, skipping", short_id(oid))
+                release_visited(oid)
+                continue
+
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("commit %s", short_id(oid))
+
+            this_children = commit_children[oid]
+
+            if head_bits:
+                head_masks[oid] = reduce(
+                    lambda mask, child: mask | head_masks[child],
+                    this_children,
+                    head_bits.get(oid, 0),
+                )
+                head_infos = info_by_head(oid)
+                if any(infos != head_infos[0] for infos in head_infos[1:]):
+                    # The results of this commit would depend on which heads are processed.
+                    log.debug("%s: heads disagree, processing them separately", short_id(oid))
+                    results = {}
+                    for head in heads:
+                        for commit, result in self._run_on_history(
+                            [head],
+                            visitors=visitors_by_group,
+                            seed_info=heads_seed_info,
+                            known_results=known_results,
+                            retain_results=retain_results,
+                        ).items():
+                            results.setdefault(commit, result)
+                    return results
+
+            if not this_children:
+                # Set the stage for a head commit: Visitors expect to get some information from
+                # their child commit(s), as there aren’t any yet, fake it.
+                children_visitors_info = [seed_info for v in visitors]
+                keep_processing = True
+            else:
+                # For all visitor coroutines, merge their produced info, e.g. to determine if any
+                # of the children must continue.
+                is_head = oid in head_ids
+                children_visitors_info = [
+                    reduce(
+                        lambda info, child: self._merge_info(
+                            info, commit_coroutines_info[child][vindex]
+                        ),
+                        this_children,
+                        seed_info if is_head else {},
                     )
+                    for vindex, v in enumerate(visitors)
+                ]
+                log.debug(
+                    "children_visitors_info[]['child_must_continue']: %s",
+                    [info["child_must_continue"] for info in children_visitors_info],
+                )
 
-                snippet.append(commit)
+                # Head commits are always processed.
+                keep_processing = is_head or any(
+                    info["child_must_continue"] for info in children_visitors_info
+                )
 
-                if keep_processing:
-                    log.debug("Keep processing: commit %s", commit.id)
-                    # Create visitor coroutines for the commit from the functions passed into this
-                    # method. Pass the ordered list of "is there a child whose coroutine of the same
-                    # visitor wants to continue" into it.
-                    commit_coroutines[commit] = coroutines = [
-                        v(commit, children_visitors_info[vi]) for vi, v in enumerate(visitors)
-                    ]
+            if keep_processing and oid in self.shallow_commits:
+                # The results of this commit depend on parents which are missing.
+                if known_results:
+                    raise HistorySeedError(
+                        f"The clone is too shallow for the history seed: parents of commit"
+                        f" {oid.hex()} are missing"
+                    )
+                log.warning("The clone is too shallow, results may be incorrect.")
 
-                    # Consult all visitors for the commit on whether we should continue and store
-                    # the results.
-                    commit_coroutines_info[commit] = [next(c) for c in coroutines]
+            if keep_processing:
+                if oid in commits:
+                    commit = commits[oid]
                 else:
-                    # Only traverse this commit. Traversal is important if parent commits are the
-                    # root of branches that affect the results (computed release number and
-                    # generated changelog).
-                    log.debug("Only traversing: commit %s", commit.id)
-                    commit_coroutines[commit] = coroutines = None
-                    commit_coroutines_info[commit] = [
-                        {"child_must_continue": False} for v in visitors
-                    ]
-
-                if not commit.parents:
-                    log.debug("\tno parents, bailing out")
-                    break
+                    commit = commits[oid] = self.repo[oid.hex()]
+                log.debug("Keep processing: commit %s", commit.id)
+                # Create visitor coroutines for the commit from the functions passed into this
+                # method. Pass the ordered list of "is there a child whose coroutine of the same
+                # visitor wants to continue" into it.
+                commit_coroutines[oid] = [
+                    v(commit, children_visitors_info[vi]) for vi, v in enumerate(visitors)
+                ]
+
+                # Consult all visitors for the commit on whether we should continue and store
+                # the results.
+                commit_coroutines_info[oid] = [next(c) for c in commit_coroutines[oid]]
+                processed.append(oid)
+            else:
+                # Only traverse this commit. Traversal is important if parent commits are the
+                # root of branches that affect the results (computed release number and
+                # generated changelog).
+                log.debug("Only traversing: commit %s", oid.hex())
+                commit_coroutines[oid] = None
+                commit_coroutines_info[oid] = [{"child_must_continue": False} for v in visitors]
 
-                if len(commit.parents) > 1:
-                    # merge commit, store new branch head(s) to follow later
-                    branch_parents = commit.parents[1:]
-                    new_branches = [p for p in branch_parents if p not in commit_coroutines]
-                    branch_heads.extend(new_branches)
-                    if log.isEnabledFor(logging.DEBUG):
-                        log.debug("\tnew branch heads %s", [x.short_id for x in new_branches])
-                        log.debug("\tbranch heads: %s", [x.short_id for x in branch_heads])
+            release_visited(oid)
 
-                # follow (first) parent
-                commit = commit.parents[0]
-                log.debug("\tparent to follow: %s", commit.short_id)
+            for parent_id in commit_parents[oid]:
+                pending_children[parent_id] -= 1
+                if not pending_children[parent_id]:
+                    ready.append(parent_id)
 
         ###########################################################################################
-        # Now, `snippets` contains disjunct lists of commits in new -> old order. Process these in
-        # reverse, one at a time until encountering a commit where we don't know the results of all
-        # parents. Then put the remainder back on the stack to be further processed later until we
-        # run out of snippets with commits.
+        # Now, process the commits which need it in reverse, i.e. parents before children.
         #
         # Here, the “bottom halves” of visitors get results from their parent commit(s) as well as
         # visitors run prior on the same commit, i.e. `release_number_visitor()` ->
         # `changelog_visitor()`.
+        #
+        # Commits are scheduled in topological order again: a commit becomes ready once all of its
+        # parents which are processed have their results.
         ###########################################################################################
 
-        log.debug("=====================================")
-        log.debug("Processing linear history snippets...")
-        log.debug("=====================================")
+        log.debug("==========================")
+        log.debug("Processing the commits...")
+        log.debug("==========================")
+
+        # The number of parents of each commit to be processed whose results are missing.
+        pending_parents = {
+            oid: sum(commit_coroutines.get(p) is not None for p in commit_parents[oid])
+            for oid in processed
+        }
+        ready = deque(oid for oid in reversed(processed) if not pending_parents[oid])
+
+        # The number of children of each commit which haven’t consumed its results yet.
+        pending_consumers = defaultdict(int)
+        for oid in processed:
+            for parent_id in commit_parents[oid]:
+                pending_consumers[parent_id] += 1
 
         # This maps commits to their results.
-        visited_results = {}
-
-        while snippets:
-            snippet = snippets.pop(0)
-            if snippet:
-                log.debug("Processing snippet %s", snippet[0].short_id)
-            while snippet:
-                # Take one commit from the tail end of the snippet and process.
-                commit = snippet.pop()
-
-                if log.isEnabledFor(logging.DEBUG):
-                    log.debug("commit %s: %s", commit.short_id, commit.message.split("\n", 1)[0])
-
-                if commit_coroutines[commit] is None:
-                    # Only traverse, but don't process this commit. Ancestral commits might have to
-                    # be taken into account again, so we can’t simply stop here.
-                    log.debug("\tonly traverse: %s", commit.id)
-                    continue
+        visited_results = dict(known_results)
 
-                for p in commit.parents:
-                    if log.isEnabledFor(logging.DEBUG):
-                        log.debug(
-                            "\t%s: p in visited results: %s", p.short_id, p in visited_results
-                        )
-                        log.debug(
-                            "\tcommit_coroutines[p] is None: %s", commit_coroutines[p] is None
-                        )
-
-                if not all(
-                    p in visited_results or commit_coroutines[p] is None for p in commit.parents
-                ):
-                    # This commit doesn’t have all information it needs to be processed. Put it and
-                    # the remainder of the snippet back to be processed later.
-                    log.debug("\tputting back")
-                    snippet.append(commit)
-                    snippets.append(snippet)
-                    break
+        while ready:
+            oid = ready.popleft()
+
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("commit %s", short_id(oid))
 
-                parent_results = [visited_results.get(p, {}) for p in commit.parents]
+            parent_ids = commit_parents[oid]
 
-                # "Pipe" the (partial) result dictionaries through the second half of all visitors
-                # for the commit.
-                visited_results[commit] = reduce(
+            # "Pipe" the (partial) result records through the second half of all visitors of
+            # each group for the commit.
+            visited_results[oid] = oid_results = {}
+            for name, group_slice in group_slices.items():
+                parent_results = [
+                    visited_results[p][name] if p in visited_results else {} for p in parent_ids
+                ]
+                oid_results[name] = reduce(
                     lambda commit_result, visitor: visitor.send((commit_result, parent_results)),
-                    commit_coroutines[commit],
-                    {"commit-id": commit.id},
+                    commit_coroutines[oid][group_slice],
+                    CommitResult({"commit-id": commits[oid].id}),
                 )
 
-        return visited_results
+            # The visitor coroutines of the commit are done.
+            del commit_coroutines[oid]
+
+            if not retain_results:
+                for parent_id in parent_ids:
+                    pending_consumers[parent_id] -= 1
+                    if not pending_consumers[parent_id] and parent_id not in head_ids:
+                        visited_results.pop(parent_id, None)
+                        commits.pop(parent_id, None)
+
+            for child in commit_children[oid]:
+                if commit_coroutines[child] is not None:
+                    pending_parents[child] -= 1
+                    if not pending_parents[child]:
+                        ready.append(child)
+
+        return {
+            commits[oid]: result
+            for oid, result in visited_results.items()
+            if oid not in known_results
+        }
+
+    @staticmethod
+    def _results_to_dicts(results: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """Convert results of a commit for all spec files to plain dictionaries."""
+        return {
+            name: result.to_dict() if isinstance(result, _Record) else result
+            for name, result in results.items()
+        }
+
+    @staticmethod
+    def _prepare_known_result(result: dict[str, Any], with_changelog: bool) -> dict[str, Any]:
+        """Prepare a known result of a commit to be passed to visitors of its children.
+
+        :param result: The known result, e.g. from a release map or history seed
+        :param with_changelog: Whether the changelog is generated, this
+            requires the known result to contain the full changelog
+        :return: The result as the visitors would have produced it
+        """
+        # Known results can come from JSON, visitors compare commit ids with the object ids of
+        # commits.
+        if isinstance(result["commit-id"], str):
+            result = result | {"commit-id": oid_from_hex(result["commit-id"])}
+
+        if not with_changelog:
+            return result
+
+        if "full-changelog" not in result:
+            raise HistorySeedError(
+                f"The history seed for commit {result['commit-id']} lacks the full changelog"
+            )
+
+        if result["full-changelog"]:
+            changelog = (
+                ChangelogEntry(
+                    {"commit-id": result["commit-id"], "data": result["full-changelog"]}
+                ),
+            )
+        else:
+            changelog = ()
+        return result | {"changelog": changelog}
+
+    def _get_known_head_result(
+        self, head: pygit2.Commit, known_results: dict[bytes, dict[str, dict[str, Any]]]
+    ) -> dict[str, dict[str, Any]]:
+        """Complete the known results of a head commit.
+
+        Known results lack the epoch/version and flags of the spec file,
+        which callers expect in the results of the head commit.
+
+        :param head: The head commit
+        :param known_results: Known results of commits, keyed by their raw ids
+        :return: The results of the head commit for all spec files
+        """
+        return {
+            name: result
+            | {"verflags": self.specs[name]._get_rpmverflags_for_commit(head).to_dict()}
+            for name, result in known_results[head.id.raw].items()
+        }
+
+    def _get_worktree_result(self, head_result: dict[str, Any]) -> CommitResult:
+        """Mimic the visitors for uncommitted changes in the worktree.
+
+        :param head_result: The result of the head commit, if any
+        :return: The result for the worktree
+        """
+        worktree_result = CommitResult()
+
+        verflags = self._get_rpmverflags(self.path, name=self.name)
+        if "error" in verflags:
+            # cringe, but what can you do?
+            verflags |= {
+                "epoch-version": None,
+                "prerelease": False,
+                "extraver": None,
+                "snapinfo": None,
+                "base": 1,
+            }
+
+        # Mimic the bottom half of release_number_visitor
+        worktree_result.verflags = verflags
+        worktree_result.epoch_version = epoch_version = verflags["epoch-version"]
+        if head_result and epoch_version == head_result["epoch-version"]:
+            release_number = head_result["release-number"] + 1
+        else:
+            release_number = 1
+        worktree_result.release_number = release_number
+
+        prerel_str = "0." if verflags["prerelease"] else ""
+        tag_string = "".join(f".{t}" for t in (verflags["extraver"], verflags["snapinfo"]) if t)
+        base = verflags["base"]
+        if base is None:
+            base = 1
+        release_number_with_base = release_number + base - 1
+        worktree_result.release_complete = release_complete = (
+            f"{prerel_str}{release_number_with_base}{tag_string}"
+        )
+
+        # Mimic the bottom half of the changelog visitor for a generic entry
+        if not self.specfile.exists():
+            changelog = ()
+        else:
+            previous_changelog = head_result.get("changelog", ())
+
+            try:
+                signature = self.repo.default_signature
+                authorblurb = f"{signature.name} <{signature.email}>"
+            except AttributeError:
+                # self.repo == None -> no git repo
+                authorblurb = self._get_rpm_packager()
+            except KeyError:
+                authorblurb = "Unknown User <please-configure-git-user@example.com>"
+
+            changelog_entry = ChangelogEntry(
+                {
+                    "commit-id": None,
+                    "authorblurb": authorblurb,
+                    "timestamp": dt.datetime.now(dt.timezone.utc),
+                    "commitlog": "Uncommitted changes",
+                    "epoch-version": epoch_version,
+                    "release-complete": release_complete,
+                }
+            )
+
+            changelog = (changelog_entry,) + previous_changelog
+
+        worktree_result.changelog = changelog
+
+        return worktree_result
 
     def run(
         self,
-        head: Optional[Union[str, pygit2.Commit]] = None,
+        head: Optional[Union[str, pygit2.Commit, Sequence[Union[str, pygit2.Commit]]]] = None,
         *,
-        visitors: Sequence = (),
+        visitors: Union[Sequence[VisitorOrName], Mapping[str, Sequence[VisitorOrName]]] = (),
         all_results: bool = False,
-    ) -> Union[dict[str, Any], dict[pygit2.Commit, dict[str, Any]]]:
-        """Process a package repository including a changed worktree."""
+        known_results: Optional[dict[str, dict[str, Any]]] = None,
+    ) -> Union[dict[str, Any], dict[Optional[pygit2.Commit], dict[str, Any]]]:
+        """Process a package repository including a changed worktree.
+
+        To process several spec files in one traversal of the history,
+        pass visitors as a mapping of spec names to visitors of the
+        respective processors in `specs`. Results, including known results,
+        are then mappings of spec names to the results for each spec file.
+
+        To process several heads, e.g. the tips of different branches, in
+        one traversal of the history, pass them as a sequence. Commits
+        shared by the heads are processed only once, and the result of each
+        head is returned, keyed by the head as passed.
+
+        :param head: The commit to start from, by default the HEAD commit,
+            or a sequence of commits
+        :param visitors: The visitors processing each commit, or a mapping
+            of spec names to visitors. Visitors can be given by their
+            registered names, see `register_visitor()`.
+        :param all_results: Whether to return the results of all processed
+            commits instead of only that of the head commit or worktree
+        :param known_results: Known results of commits, keyed by their
+            (hexadecimal) ids, these commits and their ancestors aren’t
+            processed again and don’t show up in all results
+        :return: The results of the head commit or worktree, of each head
+            commit, or of all processed commits
+        """
+        multi_head = isinstance(head, Sequence) and not isinstance(head, str)
+        if multi_head and not self.repo:
+            raise ValueError(f"Not a git repository: {self.path}")
+
+        by_spec = isinstance(visitors, Mapping)
+        if not by_spec:
+            visitors = {self.name: visitors}
+            if known_results:
+                known_results = {
+                    commit_id: {self.name: result} for commit_id, result in known_results.items()
+                }
+
+        visitors = {
+            name: [
+                self.specs[name].get_visitor(visitor) if isinstance(visitor, str) else visitor
+                for visitor in spec_visitors
+            ]
+            for name, spec_visitors in visitors.items()
+        }
+
         # whether or not the worktree differs and this needs to be reflected in the result(s)
         reflect_worktree = False
 
         if self.repo:
             seed_info = None
-            if not head:
+            if multi_head:
+                heads = [self.repo[h] if isinstance(h, str) else h for h in head]
+            elif not head:
                 head = self.repo[self.repo.head.target]
                 diff_to_head = self.repo.diff(head)
                 reflect_worktree = diff_to_head.stats.files_changed > 0
@@ -686,84 +1437,64 @@ class PkgHistoryProcessor:
                     and "changelog" in head.tree
                 ):
                     seed_info = {"changelog_removed": True}
+                heads = [head]
             elif isinstance(head, str):
-                head = self.repo[head]
+                heads = [self.repo[head]]
+            else:
+                heads = [head]
 
-            visited_results = self._run_on_history(head, visitors=visitors, seed_info=seed_info)
-            head_result = visited_results[head]
+            known_results = {
+                bytes.fromhex(commit_id): {
+                    name: self._prepare_known_result(
+                        spec_results[name],
+                        with_changelog=self.specs[name].changelog_visitor in visitors[name],
+                    )
+                    for name in visitors
+                }
+                for commit_id, spec_results in (known_results or {}).items()
+            }
+            visited_results = self._run_on_history(
+                heads,
+                visitors=visitors,
+                seed_info=seed_info,
+                known_results=known_results,
+                retain_results=all_results,
+            )
+            head_results = [
+                visited_results.get(commit) or self._get_known_head_result(commit, known_results)
+                for commit in heads
+            ]
+            head_result = head_results[0] if heads else None
         else:
             reflect_worktree = True
             visited_results = {}
-            head_result = {}
+            head_result = {name: {} for name in visitors}
 
         if reflect_worktree:
             # Not a git repository, or the git worktree isn't clean.
-            worktree_result = {}
-
-            verflags = self._get_rpmverflags(self.path, name=self.name)
-            if "error" in verflags:
-                # cringe, but what can you do?
-                verflags |= {
-                    "epoch-version": None,
-                    "prerelease": False,
-                    "extraver": None,
-                    "snapinfo": None,
-                    "base": 1,
-                }
-
-            # Mimic the bottom half of release_number_visitor
-            worktree_result["verflags"] = verflags
-            worktree_result["epoch-version"] = epoch_version = verflags["epoch-version"]
-            if head_result and epoch_version == head_result["epoch-version"]:
-                release_number = head_result["release-number"] + 1
-            else:
-                release_number = 1
-            worktree_result["release-number"] = release_number
-
-            prerel_str = "0." if verflags["prerelease"] else ""
-            tag_string = "".join(f".{t}" for t in (verflags["extraver"], verflags["snapinfo"]) if t)
-            base = verflags["base"]
-            if base is None:
-                base = 1
-            release_number_with_base = release_number + base - 1
-            worktree_result["release-complete"] = release_complete = (
-                f"{prerel_str}{release_number_with_base}{tag_string}"
-            )
-
-            # Mimic the bottom half of the changelog visitor for a generic entry
-            if not self.specfile.exists():
-                changelog = ()
-            else:
-                previous_changelog = head_result.get("changelog", ())
-
-                try:
-                    signature = self.repo.default_signature
-                    authorblurb = f"{signature.name} <{signature.email}>"
-                except AttributeError:
-                    # self.repo == None -> no git repo
-                    authorblurb = self._get_rpm_packager()
-                except KeyError:
-                    authorblurb = "Unknown User <please-configure-git-user@example.com>"
-
-                changelog_entry = ChangelogEntry(
-                    {
-                        "commit-id": None,
-                        "authorblurb": authorblurb,
-                        "timestamp": dt.datetime.now(dt.timezone.utc),
-                        "commitlog": "Uncommitted changes",
-                        "epoch-version": epoch_version,
-                        "release-complete": release_complete,
-                    }
-                )
-
-                changelog = (changelog_entry,) + previous_changelog
-
-            worktree_result["changelog"] = changelog
+            worktree_result = {
+                name: self.specs[name]._get_worktree_result(head_result[name]) for name in visitors
+            }
             visited_results[None] = worktree_result
 
         if all_results:
-            return visited_results
+            results = visited_results
+        elif multi_head:
+            results = dict(zip(head, head_results))
         elif reflect_worktree:
-            return worktree_result
+            results = worktree_result
+        else:
+            results = head_result
+
+        # Records are used internally to save memory, hand out plain dictionaries.
+        if all_results or multi_head:
+            results = {commit: self._results_to_dicts(result) for commit, result in results.items()}
+        else:
+            results = self._results_to_dicts(results)
+
+        if by_spec:
+            return results
+        elif all_results or multi_head:
+            return {commit: result[self.name] for commit, result in results.items()}
         else:
-            return head_result
+            return results[self.name]
@@ -2,20 +2,86 @@
 Parse RPM macros using rpm or norpm
 """
 
+import atexit
 import copy
+import glob
+import hashlib
+import logging
+import multiprocessing
 import os
+import pickle
+import re
+import stat
 import sys
+import threading
 from abc import ABC
+from collections import OrderedDict
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError
+from importlib.metadata import version as distribution_version
+from multiprocessing.pool import Pool
+from pathlib import Path
 from tempfile import NamedTemporaryFile
+from typing import Any, Optional, Union
 
 from rpmautospec_core import AUTORELEASE_MACRO
 
 from .compat import rpm
+from .version import __version__
+
+log = logging.getLogger(__name__)
 
 AUTORELEASE_DEFINITION = "E%{?-e*}_S%{?-s*}_P%{?-p:1}%{!?-p:0}_B%{?-b*}"
 
 PYTHON_VERSION = str(sys.version_info[0]) + "." + str(sys.version_info[1])
 
+PARSER_TYPES = ("rpm", "norpm")
+
+# Worker processes are replaced after this many parses by default
+DEFAULT_MAX_PARSES_PER_WORKER = 100
+
+# The files from which rpm and norpm read system and user macros, and Lua modules used by macros
+MACRO_FILE_PATTERNS = (
+    "/usr/lib/rpm/macros",
+    "/usr/lib/rpm/macros.d/macros.*",
+    "/usr/lib/rpm/redhat/macros",
+    "/usr/lib/rpm/platform/*/macros",
+    "/usr/lib/rpm/lua/**/*.lua",
+    "/etc/rpm/macros",
+    "/etc/rpm/macros.*",
+    "~/.config/rpm/macros",
+    "~/.rpmmacros",
+)
+
+# How many parse results are kept in the process-wide parse cache
+PARSE_CACHE_SIZE = 4096
+
+# Spec files referencing more data than this aren’t cached, e.g. downloaded sources, to avoid
+# hashing it all
+MAX_HASHED_SOURCES_SIZE = 4 * 1024 * 1024
+
+# Parse results by content and macro environment, shared by all parsers
+_parse_cache: OrderedDict[bytes, tuple[str, str]] = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+# Source and Patch tags, and arguments of `%include` and `%{load:…}`
+source_tag_re = re.compile(
+    rb"^[ \t]*(Source|Patch)(\d*)[ \t]*:[ \t]*(\S+)", re.IGNORECASE | re.MULTILINE
+)
+include_re = re.compile(
+    rb"^[ \t]*%include[ \t]+(?P<include>\S+)|%\{load:(?P<load>(?:[^{}\s]|\{[^{}\s]*\})+)\}",
+    re.MULTILINE,
+)
+# References to files in the source directory
+source_reference_re = re.compile(
+    rb"%\{?(?P<kind>SOURCE|PATCH)(?P<number>\d+)\}?|%\{(?P<short_kind>S|P):(?P<short_number>\d+)\}"
+)
+sourcedir_reference_re = re.compile(rb"%\{?_sourcedir\}?/(?P<name>.+)")
+
+
+# If set, the directory in which the norpm system macro registry is cached across processes
+NORPM_REGISTRY_CACHE_DIR_ENVVAR = "RPMAUTOSPEC_NORPM_REGISTRY_CACHE"
+
 
 # pylint: disable=too-few-public-methods
 
@@ -74,10 +140,110 @@ class RPMSpecParser(SpecParser):
             rpm.reloadConfig()
 
 
+def _build_norpm_registry():  # pragma: has-norpm
+    from norpm.macrofile import system_macro_registry
+
+    registry = system_macro_registry()
+    registry.known_norpm_hacks()
+    registry["dist"] = ""
+    name, params = AUTORELEASE_MACRO.split("(")
+    params = params.rstrip(")")
+    registry.define(name, (AUTORELEASE_DEFINITION, params))
+    return registry
+
+
+def _norpm_registry_cache_key(fingerprint: str) -> str:
+    """Compute the key of a norpm registry in the disk cache.
+
+    Besides the macro environment, this covers how rpmautospec sets up the
+    registry, which can change between versions.
+
+    :param fingerprint: The fingerprint of the norpm macro environment
+    :return: The key
+    """
+    return hashlib.sha256(
+        "\0".join((fingerprint, __version__, AUTORELEASE_MACRO, AUTORELEASE_DEFINITION)).encode(
+            "utf-8", errors="surrogateescape"
+        )
+    ).hexdigest()
+
+
+def _is_private(stat_result: os.stat_result) -> bool:
+    """Check if a file is owned by the current user and not writable by others."""
+    return stat_result.st_uid == os.getuid() and not stat_result.st_mode & (
+        stat.S_IWGRP | stat.S_IWOTH
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_norpm_registry(fingerprint: Optional[str]):  # pragma: has-norpm
+    """Get the norpm system macro registry set up for parsing.
+
+    Reading and parsing all macro files is done once per process and macro
+    environment. If RPMAUTOSPEC_NORPM_REGISTRY_CACHE is set to a directory,
+    the registry is additionally cached there across processes. As cached
+    registries are unpickled, the directory and files in it must be owned
+    by the current user and not be writable by others, otherwise the cache
+    isn’t used.
+
+    The registry must not be modified, parsers work on copies of it.
+
+    :param fingerprint: The fingerprint of the norpm macro environment,
+        which invalidates cached registries if macro files change, or None
+        to not use the cache directory
+    :return: The registry
+    """
+    cache_dir = os.environ.get(NORPM_REGISTRY_CACHE_DIR_ENVVAR)
+    if not cache_dir or not fingerprint:
+        return _build_norpm_registry()
+
+    cache_dir = Path(cache_dir)
+    cache_file = cache_dir / f"norpm-registry-{_norpm_registry_cache_key(fingerprint)}.pickle"
+
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        cache_dir_stat = cache_dir.stat()
+        cache_dir_usable = stat.S_ISDIR(cache_dir_stat.st_mode) and _is_private(cache_dir_stat)
+    except OSError:
+        cache_dir_usable = False
+
+    if not cache_dir_usable:
+        log.warning(
+            "Not using %s as cache directory, it must be a directory owned by the current user"
+            + " and not writable by others.",
+            cache_dir,
+        )
+        return _build_norpm_registry()
+
+    try:
+        with cache_file.open("rb") as fobj:
+            if _is_private(os.fstat(fobj.fileno())):
+                return pickle.load(fobj)
+    except Exception:
+        # Missing, unreadable or corrupt, just rebuild it.
+        pass
+
+    registry = _build_norpm_registry()
+
+    try:
+        with NamedTemporaryFile(dir=cache_dir, prefix="tmp_norpm_", delete=False) as tmp:
+            try:
+                pickle.dump(registry, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+                tmp.close()
+                os.replace(tmp.name, cache_file)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+    except OSError:
+        # The cache is an optimization, not being able to write it isn’t fatal.
+        pass
+
+    return registry
+
+
 def _create_norpm_classes() -> None:  # pragma: has-norpm
     global NoRPMHooks, NoRPMSpecParser
 
-    from norpm.macrofile import system_macro_registry
     from norpm.specfile import ParserHooks, specfile_expand
 
     class NoRPMHooks(ParserHooks):
@@ -95,12 +261,8 @@ def _create_norpm_classes() -> None:  # pragma: has-norpm
         """Parser using NoRPM to parse spec files"""
 
         def __init__(self) -> None:
-            self.registry = system_macro_registry()
-            self.registry.known_norpm_hacks()
-            self.registry["dist"] = ""
-            name, params = AUTORELEASE_MACRO.split("(")
-            params = params.rstrip(")")
-            self.registry.define(name, (AUTORELEASE_DEFINITION, params))
+            # Shared by all parsers, query() works on a copy.
+            self.registry = _get_norpm_registry(macro_environment_fingerprint("norpm"))
 
         def query(self, _path, specfilename) -> tuple[str, str]:
             registry = copy.deepcopy(self.registry)
@@ -124,28 +286,304 @@ def _create_norpm_classes() -> None:  # pragma: has-norpm
             return epoch_version, release
 
 
+def _create_parser(parser_type: str) -> SpecParser:
+    if parser_type == "rpm":
+        return RPMSpecParser()
+    elif parser_type == "norpm":  # pragma: has-norpm
+        _create_norpm_classes()
+        return NoRPMSpecParser()
+    else:  # pragma: no cover
+        raise SpecParserError(f"Invalid value of RPMAUTOSPEC_SPEC_PARSER: {parser_type}")
+
+
+# The parser owned by a worker process
+_worker_parser: Optional[SpecParser] = None
+
+
+def _init_worker(parser_type: str) -> None:  # pragma: no cover
+    # This runs in worker processes.
+    global _worker_parser
+    _worker_parser = _create_parser(parser_type)
+
+
+def _query_in_worker(path: str, specfilename: str) -> tuple[str, str]:  # pragma: no cover
+    # This runs in worker processes.
+    return _worker_parser.query(path, specfilename)
+
+
+@lru_cache(maxsize=None)
+def _get_worker_pool(parser_type: str, workers: int, max_parses_per_worker: Optional[int]) -> Pool:
+    # Worker processes are started afresh, they don’t inherit (macro) state of this process.
+    pool = multiprocessing.get_context("spawn").Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(parser_type,),
+        maxtasksperchild=max_parses_per_worker,
+    )
+    atexit.register(pool.terminate)
+    return pool
+
+
+class WorkerPoolSpecParser(SpecParser):
+    """Parser delegating to parsers in a pool of persistent worker processes
+
+    Each worker process owns a parser, so the macro state of the calling
+    process is never touched, i.e. this is safe to use in processes which
+    use the RPM Python bindings otherwise. Spec files queried from several
+    threads are parsed in parallel.
+
+    Pools are shared by all parsers with the same configuration.
+    """
+
+    def __init__(
+        self,
+        parser_type: str = "rpm",
+        *,
+        workers: int,
+        max_parses_per_worker: Optional[int] = DEFAULT_MAX_PARSES_PER_WORKER,
+    ) -> None:
+        """Set up parsing spec files in worker processes.
+
+        :param parser_type: The type of parser used in the workers, "rpm"
+            or "norpm"
+        :param workers: The number of worker processes
+        :param max_parses_per_worker: After how many parses a worker
+            process is replaced with a fresh one, or None to keep them
+        """
+        if parser_type not in PARSER_TYPES:
+            raise SpecParserError(f"Invalid value of RPMAUTOSPEC_SPEC_PARSER: {parser_type}")
+        self.pool = _get_worker_pool(parser_type, workers, max_parses_per_worker)
+
+    def query(self, path: str, specfilename: str) -> tuple[str, str]:
+        return self.pool.apply(_query_in_worker, (str(path), str(specfilename)))
+
+
+def macro_environment_fingerprint(parser_type: str) -> Optional[str]:
+    """Fingerprint the environment in which spec files are parsed.
+
+    This covers the parser backend and its version, the value of `%dist`
+    and the names, sizes and modification times of macro files. Other
+    macros aren’t expanded, to not touch the RPM state of the calling
+    process: parsers read macros only from these files, RPMSpecParser
+    resets macros defined in the process after each parse. But `%dist` is
+    commonly defined in the calling process before, and used in releases.
+
+    :param parser_type: The type of parser, "rpm" or "norpm"
+    :return: The fingerprint, or None if the version of the parser backend
+        can’t be determined, so results mustn’t be cached
+    """
+    if parser_type == "rpm":
+        try:
+            backend_version = rpm.__version__
+            dist = rpm.expandMacro("%{?dist}")
+        except Exception:
+            # Parsing with rpm fails, too.
+            return None
+    else:
+        try:
+            backend_version = distribution_version(parser_type)
+        except PackageNotFoundError:
+            return None
+        # See _build_norpm_registry()
+        dist = ""
+
+    if not backend_version:
+        return None
+
+    backend = f"{parser_type}-{backend_version}"
+
+    hasher = hashlib.sha256(f"{backend}\0{dist}\0".encode("utf-8", errors="surrogateescape"))
+    for pattern in MACRO_FILE_PATTERNS:
+        for filename in sorted(glob.glob(os.path.expanduser(pattern), recursive=True)):
+            try:
+                stat_result = os.stat(filename)
+            except OSError:  # pragma: no cover
+                continue
+            hasher.update(
+                f"{filename}\0{stat_result.st_size}\0{stat_result.st_mtime_ns}\0".encode(
+                    "utf-8", errors="surrogateescape"
+                )
+            )
+
+    return hasher.hexdigest()
+
+
+def _resolve_reference(reference: bytes, sources: dict[tuple[bytes, int], bytes]) -> Optional[str]:
+    """Resolve a reference to a file in the directory a spec file is parsed in.
+
+    :param reference: The reference, e.g. the argument of `%include`
+    :param sources: The values of Source and Patch tags, by kind and number
+    :return: The path of the file, relative to the directory, or None if
+        it can’t be resolved without expanding macros
+    """
+    if match := source_reference_re.fullmatch(reference):
+        if match.group("kind"):
+            kind, number = match.group("kind", "number")
+        else:
+            short_kind, number = match.group("short_kind", "short_number")
+            kind = b"SOURCE" if short_kind == b"S" else b"PATCH"
+        try:
+            reference = os.path.basename(sources[kind, int(number)])
+        except KeyError:
+            return None
+    elif match := sourcedir_reference_re.fullmatch(reference):
+        reference = match.group("name")
+
+    if b"%" in reference:
+        return None
+
+    return os.fsdecode(reference)
+
+
+def _referenced_files(spec_data: bytes) -> Optional[set[str]]:
+    """Find the files a spec file references, which can be read when parsing it.
+
+    These are the local files named in Source and Patch tags, and files
+    which are included or loaded. Shell and Lua expansions aren’t
+    inspected, they are assumed to read only files named in tags.
+
+    :param spec_data: The contents of the spec file
+    :return: The paths of the files, relative to the directory the spec
+        file is parsed in, or None if included or loaded files can’t be
+        determined without expanding macros
+    """
+    sources = {
+        (kind.upper(), int(number or 0)): value
+        for kind, number, value in source_tag_re.findall(spec_data)
+    }
+
+    # Sources named with macros usually are downloaded archives, which aren’t read when parsing.
+    files = {
+        os.fsdecode(os.path.basename(value)) for value in sources.values() if b"%" not in value
+    }
+
+    for match in include_re.finditer(spec_data):
+        reference = _resolve_reference(match.group("include") or match.group("load"), sources)
+        if reference is None:
+            return None
+        files.add(reference)
+
+    return files
+
+
+def _parse_cache_key(
+    fingerprint: str, path: Union[Path, str], specfilename: Union[Path, str]
+) -> Optional[bytes]:
+    """Compute the key of a spec file in the parse cache.
+
+    Besides the contents of the spec file, this covers the contents of the
+    files it references, but not where it is located, e.g. an abridged
+    spec file in a temporary location gets the same key each time.
+
+    :return: The key, or None if the spec file shouldn’t be cached
+    """
+    try:
+        spec_data = Path(specfilename).read_bytes()
+    except OSError:
+        return None
+
+    referenced_files = _referenced_files(spec_data)
+    if referenced_files is None:
+        return None
+
+    hasher = hashlib.sha256(fingerprint.encode())
+    hasher.update(hashlib.sha256(spec_data).digest())
+
+    size = 0
+    for filename in sorted(referenced_files):
+        try:
+            with open(os.path.join(path, filename), "rb") as fobj:
+                size += os.fstat(fobj.fileno()).st_size
+                if size > MAX_HASHED_SOURCES_SIZE:
+                    return None
+                file_digest = hashlib.sha256(fobj.read()).digest()
+        except OSError:
+            # E.g. missing files
+            file_digest = b""
+        hasher.update(filename.encode("utf-8", errors="surrogateescape") + b"\0" + file_digest)
+
+    return hasher.digest()
+
+
+def _store_in_lru_cache(cache: OrderedDict, key: Any, value: Any) -> None:
+    # Call with _parse_cache_lock held.
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > PARSE_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _cache_parse_result(key: bytes, result: tuple[str, str]) -> None:
+    with _parse_cache_lock:
+        _store_in_lru_cache(_parse_cache, key, result)
+
+
 class AutoSpecParser(SpecParser):
     """Use either RPMSpecParser or NoRPMSpecParser depending on the current
-    value of the RPMAUTOSPEC_SPEC_PARSER environment variable."""
+    value of the RPMAUTOSPEC_SPEC_PARSER environment variable.
+
+    If RPMAUTOSPEC_SPEC_PARSER_WORKERS is set to a positive number, the
+    parser is run in as many worker processes, which are replaced after
+    the number of parses in RPMAUTOSPEC_SPEC_PARSER_MAX_PARSES.
+
+    If caching is enabled, parse results are cached process-wide by the
+    contents of the spec file and the files it references, and the macro
+    environment, i.e. identical spec files in different repositories are
+    only parsed once. Failures aren’t cached, their error messages refer to
+    the parsed files.
+    """
 
     _concrete_parser: SpecParser
 
-    def __init__(self) -> None:
+    def __init__(self, *, enable_caching: bool = False) -> None:
+        """Set up the parser.
+
+        :param enable_caching: Whether to use the process-wide parse cache
+            (don’t enable in long-running processes)
+        """
         parser_type = os.environ.get("RPMAUTOSPEC_SPEC_PARSER", "rpm").lower()
-        if parser_type == "rpm":
-            self._concrete_parser = RPMSpecParser()
-        elif parser_type == "norpm":  # pragma: has-norpm
-            _create_norpm_classes()
-            self._concrete_parser = NoRPMSpecParser()
-        else:  # pragma: no cover
-            raise SpecParserError(f"Invalid value of RPMAUTOSPEC_SPEC_PARSER: {parser_type}")
+        workers = int(os.environ.get("RPMAUTOSPEC_SPEC_PARSER_WORKERS") or 0)
+        if workers > 0:
+            max_parses_per_worker = int(
+                os.environ.get("RPMAUTOSPEC_SPEC_PARSER_MAX_PARSES")
+                or DEFAULT_MAX_PARSES_PER_WORKER
+            )
+            self._concrete_parser = WorkerPoolSpecParser(
+                parser_type, workers=workers, max_parses_per_worker=max_parses_per_worker
+            )
+        else:
+            self._concrete_parser = _create_parser(parser_type)
+
+        if enable_caching:
+            self.fingerprint = macro_environment_fingerprint(parser_type)
+        else:
+            self.fingerprint = None
 
     def query(self, path: str, specfilename: str) -> tuple[str, str]:
         """
         Query epoch + version and release from a spec file.
 
-        This dispatches to a concrete parser either using rpm or norpm.
+        This dispatches to a concrete parser either using rpm or norpm,
+        unless the result is cached.
 
         Returns: A tuple of (epoch_version, release)
         """
-        return self._concrete_parser.query(path, specfilename)
+        if self.fingerprint:
+            key = _parse_cache_key(self.fingerprint, path, specfilename)
+        else:
+            key = None
+
+        if key:
+            with _parse_cache_lock:
+                cached = _parse_cache.get(key)
+                if cached:
+                    _parse_cache.move_to_end(key)
+            if cached:
+                return cached
+
+        result = self._concrete_parser.query(path, specfilename)
+
+        if key:
+            _cache_parse_result(key, result)
+
+        return result
@@ -0,0 +1,137 @@
+"""Scan RPM spec files.
+
+A spec file is read and decoded once, its lines are kept along with the line numbers of the
+rpmautospec features and the `%prep` section (where the abridged spec file used for parsing is cut
+off), for use in detecting features, parsing and rewriting the spec file.
+"""
+
+import io
+import re
+from collections.abc import Iterator
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+from rpmautospec_core.main import SpecfileFeatures
+
+# These match what rpmautospec_core looks for when checking spec file features.
+autorelease_re = re.compile(r"%(?:autorelease(?:\s|$)|\{\??autorelease(?:\s+[^\}]*)?\})")
+changelog_re = re.compile(r"^%changelog(?:\s.*)?$", re.IGNORECASE)
+autochangelog_re = re.compile(r"\s*%(?:autochangelog|\{\??autochangelog\})\s*")
+autorelease_definition_re = re.compile(r"^\s*%define\s+autorelease\s*\(")
+
+# The whitespace stripped by bytes.strip(), to detect the %prep line as in the raw spec file
+ASCII_WHITESPACE = " \t\n\r\x0b\x0c"
+
+
+class SpecScan:
+    """The lines of a spec file and what was found in them.
+
+    Line numbers start at 1, like in rpmautospec_core.
+    """
+
+    lines: tuple[str, ...]
+    features: SpecfileFeatures
+    prep_lineno: Optional[int]
+
+    def __init__(self, data: Union[bytes, memoryview]):
+        """Scan the contents of a spec file.
+
+        :param data: The contents of the spec file, as bytes or a view of them
+        """
+        # Decode losslessly, and split into lines like a file opened in text mode, but keep line
+        # endings as they are.
+        text = str(data, "utf-8", errors="surrogateescape")
+        self.lines = tuple(io.StringIO(text, newline=""))
+
+        has_autorelease = False
+        changelog_lineno = None
+        autochangelog_lineno = None
+        autorelease_definition_lineno = None
+        prep_lineno = None
+
+        for lineno, line in enumerate(self.lines, start=1):
+            line = line.rstrip("\r\n")
+
+            if changelog_lineno is None:
+                if not has_autorelease and autorelease_re.search(line):
+                    has_autorelease = True
+
+                if changelog_re.match(line):
+                    changelog_lineno = lineno
+
+            if autochangelog_lineno is None and autochangelog_re.match(line):
+                autochangelog_lineno = lineno
+
+            if autorelease_definition_lineno is None and autorelease_definition_re.match(line):
+                autorelease_definition_lineno = lineno
+
+            if prep_lineno is None and line.strip(ASCII_WHITESPACE) == "%prep":
+                prep_lineno = lineno
+
+        self.features = SpecfileFeatures(
+            has_autorelease=has_autorelease,
+            has_autochangelog=bool(autochangelog_lineno),
+            changelog_lineno=changelog_lineno,
+            autochangelog_lineno=autochangelog_lineno,
+            has_autorelease_definition=bool(autorelease_definition_lineno),
+            autorelease_definition_lineno=autorelease_definition_lineno,
+            is_processed=bool(autorelease_definition_lineno),
+        )
+        self.prep_lineno = prep_lineno
+
+    def translated_lines(self) -> Iterator[str]:
+        """Iterate over the lines of the spec file with translated line endings.
+
+        :return: The lines, as if read from a file opened in text mode
+        """
+        for line in self.lines:
+            if line.endswith("\r"):
+                yield line[:-1] + "\n"
+            elif line.endswith("\r\n"):
+                yield line[:-2] + "\n"
+            else:
+                yield line
+
+    def encode(self, stop_lineno: Optional[int] = None) -> bytes:
+        """Encode lines of the spec file.
+
+        :param stop_lineno: The number of the line before which to stop,
+            or None to encode all lines
+        :return: The encoded lines
+        """
+        lines = self.lines if stop_lineno is None else self.lines[: stop_lineno - 1]
+        return "".join(lines).encode("utf-8", errors="surrogateescape")
+
+    def abridged(self) -> bytes:
+        """Encode the lines of the spec file before `%prep`.
+
+        In most cases, these are everything which is needed to parse the
+        spec file for the information rpmautospec wants to extract.
+
+        :return: The encoded abridged spec file
+        """
+        return self.encode(self.prep_lineno)
+
+
+@lru_cache(maxsize=128)
+def _scan_specfile(specpath: Path, mtime_ns: int, size: int) -> SpecScan:
+    return SpecScan(specpath.read_bytes())
+
+
+def scan_specfile(specpath: Union[Path, str], *, enable_caching: bool = True) -> SpecScan:
+    """Scan a spec file.
+
+    :param specpath: The path of the spec file
+    :param enable_caching: Whether to reuse results for the same spec
+        file, by path, modification time and size (disable in long-running
+        processes)
+    :return: The scanned spec file
+    """
+    specpath = Path(specpath).resolve()
+    stat_result = specpath.stat()
+
+    if enable_caching:
+        return _scan_specfile(specpath, stat_result.st_mtime_ns, stat_result.st_size)
+    else:
+        return _scan_specfile.__wrapped__(specpath, stat_result.st_mtime_ns, stat_result.st_size)
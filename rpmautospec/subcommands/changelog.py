@@ -1,34 +1,62 @@
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Optional, Union
 
+from ..changelog import format_changelog, iter_format_changelog
 from ..exc import SpecParseFailure
 from ..pkg_history import PkgHistoryProcessor
 from ..specparser import SpecParserError
 
 
-def _coerce_to_str(str_or_bytes: Union[str, bytes]) -> str:
-    if isinstance(str_or_bytes, bytes):
-        str_or_bytes = str_or_bytes.decode("utf-8", errors="replace")
-    return str_or_bytes
-
-
 def collate_changelog(processor_results: dict[str, Any]) -> str:
-    return "\n\n".join(_coerce_to_str(entry.format()) for entry in processor_results["changelog"])
-
-
-def do_generate_changelog(
-    spec_or_path: Union[Path, str], *, error_on_unparseable_spec: bool = True
-) -> str:
+    return format_changelog(processor_results["changelog"])
+
+
+def do_stream_changelog(
+    spec_or_path: Union[Path, str],
+    *,
+    error_on_unparseable_spec: bool = True,
+    history_seed: Optional[dict[str, dict[str, Any]]] = None,
+) -> Iterator[str]:
+    """Generate the changelog of a package as a stream of chunks.
+
+    The history is processed (and errors raised) right away, changelog
+    entries are only formatted as the chunks are consumed.
+
+    :param spec_or_path: The spec file or directory it is located in.
+    :param error_on_unparseable_spec: Whether to fail if the spec file
+        can’t be parsed
+    :param history_seed: Known results of older commits, keyed by their ids
+    :return: An iterator over the chunks of the changelog
+    """
     try:
         processor = PkgHistoryProcessor(spec_or_path)
     except SpecParserError as exc:
         raise SpecParseFailure(exc) from exc
 
-    result = processor.run(visitors=(processor.release_number_visitor, processor.changelog_visitor))
+    result = processor.run(
+        visitors=(processor.release_number_visitor, processor.changelog_visitor),
+        known_results=history_seed,
+    )
     error = result["verflags"].get("error")
     if error and error_on_unparseable_spec:
         error_detail = result["verflags"]["error-detail"]
         raise SpecParseFailure(
             f"Couldn’t parse spec file {processor.specfile.name}", code=error, detail=error_detail
         )
-    return collate_changelog(result)
+    return iter_format_changelog(result["changelog"])
+
+
+def do_generate_changelog(
+    spec_or_path: Union[Path, str],
+    *,
+    error_on_unparseable_spec: bool = True,
+    history_seed: Optional[dict[str, dict[str, Any]]] = None,
+) -> str:
+    return "".join(
+        do_stream_changelog(
+            spec_or_path,
+            error_on_unparseable_spec=error_on_unparseable_spec,
+            history_seed=history_seed,
+        )
+    )
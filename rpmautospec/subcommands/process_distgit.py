@@ -1,15 +1,17 @@
+import hashlib
 import logging
+import os
 import shutil
 import stat
 import tempfile
 from pathlib import Path
-from typing import Optional, Union
-
-from rpmautospec_core import check_specfile_features
+from typing import Any, Optional, Union
 
+from ..changelog import iter_format_changelog
 from ..exc import SpecParseFailure
 from ..pkg_history import PkgHistoryProcessor
 from ..specparser import SpecParserError
+from ..specscanner import scan_specfile
 from ..version import __version__
 
 log = logging.getLogger(__name__)
@@ -28,24 +30,53 @@ AUTORELEASE_TEMPLATE = """
 }}%{{?-e:.%{{-e*}}}}%{{?-s:.%{{-s*}}}}%{{!?-n:%{{?dist}}}}"""  # noqa: E501
 
 
+def _file_digest(path: Path) -> bytes:
+    hasher = hashlib.sha256()
+    with path.open("rb") as fobj:
+        while chunk := fobj.read(1 << 16):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def _has_same_content(path: Path, other_path: Path) -> bool:
+    """Check if two files have the same content.
+
+    Files of different sizes are told apart without reading them.
+
+    :param path: The path of a file
+    :param other_path: The path of the other file, which may not exist
+    :return: Whether both files have the same content
+    """
+    try:
+        if path.stat().st_size != other_path.stat().st_size:
+            return False
+    except FileNotFoundError:
+        return False
+
+    return _file_digest(path) == _file_digest(other_path)
+
+
 def do_process_distgit(
     spec_or_path: Union[Path, str],
     target: Optional[Union[Path, str]] = None,
     *,
     enable_caching: bool = True,
     error_on_unparseable_spec: bool = True,
+    history_seed: Optional[dict[str, dict[str, Any]]] = None,
 ) -> bool:
     """Process an RPM spec file in a distgit repository.
 
     :param spec_or_path: the spec file or path of the repository
-    :param enable_caching: whether or not spec file feature test results
-        should be cached (disable in long-running processes)
+    :param enable_caching: whether or not spec file feature test and
+        parse results should be cached (disable in long-running processes)
     :param error_on_unparseable_spec: Whether or not failure at parsing
         the current spec file should raise an exception.
+    :param history_seed: Known results of commits, keyed by their ids,
+        history beyond these commits isn’t processed
     :return: whether or not the spec file needed processing
     """
     try:
-        processor = PkgHistoryProcessor(spec_or_path)
+        processor = PkgHistoryProcessor(spec_or_path, enable_caching=enable_caching)
     except SpecParserError as exc:
         raise SpecParseFailure(exc) from exc
 
@@ -54,14 +85,36 @@ def do_process_distgit(
     else:
         target = Path(target)
 
+    try:
+        target_stat = target.stat()
+    except FileNotFoundError:
+        target_stat = None
+
+    # The target is replaced by renaming a file onto it, write through symbolic links instead of
+    # replacing them.
+    real_target = Path(os.path.realpath(target))
+
+    # Only replace the target if that doesn’t change anything but its content, i.e. it’s a regular
+    # file owned by the current user without other hard links, and a file can be created next to
+    # it. Otherwise, e.g. for special files, write it in place.
+    replace_target = (
+        target_stat is None
+        or stat.S_ISREG(target_stat.st_mode)
+        and target_stat.st_nlink == 1
+        and target_stat.st_uid == os.geteuid()
+    ) and os.access(real_target.parent, os.W_OK)
+    if replace_target:
+        target = real_target
+
     # Preserve mode of the target spec file if it is overwritten, otherwise use that of the
     # processed spec file. Otherwise it would inherit the 0600 mode of the temporary file.
-    if target.exists():
-        specfile_mode = stat.S_IMODE(target.stat().st_mode)
+    if target_stat:
+        specfile_mode = stat.S_IMODE(target_stat.st_mode)
     else:
         specfile_mode = stat.S_IMODE(processor.specfile.stat().st_mode)
 
-    features = check_specfile_features(processor.specfile, enable_caching=enable_caching)
+    spec_scan = scan_specfile(processor.specfile, enable_caching=enable_caching)
+    features = spec_scan.features
     needs_autochangelog = (
         features.changelog_lineno is None
         and features.autochangelog_lineno is None
@@ -76,7 +129,7 @@ def do_process_distgit(
     visitors = [processor.release_number_visitor]
     if needs_autochangelog:
         visitors.append(processor.changelog_visitor)
-    result = processor.run(visitors=visitors)
+    result = processor.run(visitors=visitors, known_results=history_seed)
 
     error = result["verflags"].get("error")
     if error and error_on_unparseable_spec:
@@ -87,60 +140,78 @@ def do_process_distgit(
 
     autorelease_number = result["release-number"]
 
-    with (
-        processor.specfile.open("r", encoding="utf-8", errors="surrogateescape") as specfile,
-        tempfile.NamedTemporaryFile(
-            "w", encoding="utf-8", errors="surrogateescape"
-        ) as tmp_specfile,
-    ):
-        # Process the spec file into a temporary file...
-        used_features = []
-
-        if features.has_autorelease:
-            autorelease_blurb_if_needed = AUTORELEASE_TEMPLATE.format(
-                autorelease_number=autorelease_number
-            )
-            used_features.append("autorelease")
-        else:
-            autorelease_blurb_if_needed = ""
-
-        if needs_autochangelog:
-            used_features.append("autochangelog")
-
-        # Write %autorelease macro header
-        print(
-            RPMAUTOSPEC_TEMPLATE.format(
-                version=__version__,
-                used_features=", ".join(used_features),
-                autorelease_blurb_if_needed=autorelease_blurb_if_needed,
-            ),
-            file=tmp_specfile,
-        )
-
-        for lineno, line in enumerate(specfile, start=1):
-            if features.changelog_lineno:
-                if features.has_autochangelog and lineno > features.changelog_lineno:
-                    break
-
+    # Write the processed spec file into a temporary file, next to the target if it is replaced, so
+    # it can be renamed into place atomically.
+    with tempfile.NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        errors="surrogateescape",
+        dir=target.parent if replace_target else None,
+        prefix=f".{target.name}.",
+        delete=False,
+    ) as tmp_specfile:
+        try:
+            # Process the spec file into a temporary file...
+            used_features = []
+
+            if features.has_autorelease:
+                autorelease_blurb_if_needed = AUTORELEASE_TEMPLATE.format(
+                    autorelease_number=autorelease_number
+                )
+                used_features.append("autorelease")
             else:
-                if features.has_autochangelog and lineno == features.autochangelog_lineno:
-                    print("%changelog\n", file=tmp_specfile, end="")
-                    break
-            print(line, file=tmp_specfile, end="")
+                autorelease_blurb_if_needed = ""
 
-        if not features.has_autochangelog and features.changelog_lineno is None:
-            print("\n%changelog\n", file=tmp_specfile, end="")
+            if needs_autochangelog:
+                used_features.append("autochangelog")
 
-        if needs_autochangelog:
-            print("## START: Generated by rpmautospec\n", file=tmp_specfile, end="")
+            # Write %autorelease macro header
             print(
-                "\n\n".join(entry.format() for entry in result["changelog"]),
+                RPMAUTOSPEC_TEMPLATE.format(
+                    version=__version__,
+                    used_features=", ".join(used_features),
+                    autorelease_blurb_if_needed=autorelease_blurb_if_needed,
+                ),
                 file=tmp_specfile,
             )
-            print("## END: Generated by rpmautospec\n", file=tmp_specfile, end="")
 
-        tmp_specfile.flush()
-
-        # ...and copy it back (potentially across device boundaries)
-        shutil.copy2(tmp_specfile.name, target)
-        target.chmod(specfile_mode)
+            for lineno, line in enumerate(spec_scan.translated_lines(), start=1):
+                if features.changelog_lineno:
+                    if features.has_autochangelog and lineno > features.changelog_lineno:
+                        break
+
+                else:
+                    if features.has_autochangelog and lineno == features.autochangelog_lineno:
+                        print("%changelog\n", file=tmp_specfile, end="")
+                        break
+                print(line, file=tmp_specfile, end="")
+
+            if not features.has_autochangelog and features.changelog_lineno is None:
+                print("\n%changelog\n", file=tmp_specfile, end="")
+
+            if needs_autochangelog:
+                print("## START: Generated by rpmautospec\n", file=tmp_specfile, end="")
+                for chunk in iter_format_changelog(result["changelog"]):
+                    tmp_specfile.write(chunk)
+                tmp_specfile.write("\n")
+                print("## END: Generated by rpmautospec\n", file=tmp_specfile, end="")
+
+            tmp_specfile.close()
+
+            if (
+                target_stat
+                and stat.S_ISREG(target_stat.st_mode)
+                and _has_same_content(Path(tmp_specfile.name), target)
+            ):
+                log.debug("Processed spec file is unchanged, not overwriting: %s", target)
+                os.unlink(tmp_specfile.name)
+            elif replace_target:
+                os.chmod(tmp_specfile.name, specfile_mode)
+                os.replace(tmp_specfile.name, target)
+            else:
+                with open(tmp_specfile.name, "rb") as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.unlink(tmp_specfile.name)
+        except BaseException:
+            os.unlink(tmp_specfile.name)
+            raise
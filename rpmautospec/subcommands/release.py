@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Union
+from typing import Any, Optional, Union
 
 from ..exc import SpecParseFailure
 from ..pkg_history import PkgHistoryProcessor
@@ -11,6 +11,7 @@ def do_calculate_release(
     *,
     complete_release: bool = True,
     error_on_unparseable_spec: bool = True,
+    history_seed: Optional[dict[str, dict[str, Any]]] = None,
 ) -> Union[str, int]:
     """Calculate release value (or number) of a package.
 
@@ -19,6 +20,8 @@ def do_calculate_release(
         (without dist tag) or just the number.
     :param error_on_unparseable_spec: Whether or not failure at parsing
         the current spec file should raise an exception.
+    :param history_seed: Known results of commits, keyed by their ids,
+        history beyond these commits isn’t processed
     :return: the release value or number
     """
     try:
@@ -26,7 +29,7 @@ def do_calculate_release(
     except SpecParserError as exc:
         raise SpecParseFailure(exc) from exc
 
-    result = processor.run(visitors=(processor.release_number_visitor,))
+    result = processor.run(visitors=(processor.release_number_visitor,), known_results=history_seed)
     error = result["verflags"].get("error")
     if error and error_on_unparseable_spec:
         error_detail = result["verflags"]["error-detail"]
@@ -40,6 +43,7 @@ def do_calculate_release_number(
     spec_or_path: Union[str, Path],
     *,
     error_on_unparseable_spec: bool = True,
+    history_seed: Optional[dict[str, dict[str, Any]]] = None,
 ) -> int:
     """Calculate release number of a package.
 
@@ -49,8 +53,13 @@ def do_calculate_release_number(
     :param spec_or_path: The spec file or directory it is located in.
     :param error_on_unparseable_spec: Whether or not failure at parsing
         the current spec file should raise an exception.
+    :param history_seed: Known results of commits, keyed by their ids,
+        history beyond these commits isn’t processed
     :return: the release number
     """
     return do_calculate_release(
-        spec_or_path, complete_release=False, error_on_unparseable_spec=error_on_unparseable_spec
+        spec_or_path,
+        complete_release=False,
+        error_on_unparseable_spec=error_on_unparseable_spec,
+        history_seed=history_seed,
     )
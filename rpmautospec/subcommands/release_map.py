@@ -0,0 +1,159 @@
+import json
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from ..exc import HistorySeedError, SpecParseFailure
+from ..pkg_history import PkgHistoryProcessor
+from ..specparser import SpecParserError
+from .changelog import collate_changelog
+
+# Keys every entry of a release map must have, i.e. what’s needed to use it as a known result
+RELEASE_MAP_KEYS = ("commit-id", "epoch-version", "release-number", "release-complete")
+
+
+def read_release_map(lines: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """Read a release map in JSON Lines format.
+
+    :param lines: The lines of the release map
+    :return: The release map entries, keyed by their commit ids
+    :raises HistorySeedError: if a line can’t be read as an entry
+    """
+    release_map = {}
+    for lineno, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise HistorySeedError(
+                f"Can’t read release map entry in line {lineno}", detail=str(exc)
+            ) from exc
+
+        if not isinstance(entry, dict):
+            raise HistorySeedError(f"Release map entry in line {lineno} isn’t an object")
+
+        missing_keys = [key for key in RELEASE_MAP_KEYS if key not in entry]
+        if missing_keys:
+            raise HistorySeedError(
+                f"Release map entry in line {lineno} lacks keys: {', '.join(missing_keys)}"
+            )
+
+        release_map[entry["commit-id"]] = entry
+    return release_map
+
+
+def format_release_map_entry(entry: dict[str, Any]) -> str:
+    """Format an entry of a release map as a line in JSON Lines format.
+
+    :param entry: The release map entry
+    :return: The formatted entry, without a trailing newline
+    """
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+def do_generate_release_map(
+    spec_or_path: Union[Path, str],
+    *,
+    known_entries: Optional[dict[str, dict[str, Any]]] = None,
+    history_seed: Optional[dict[str, dict[str, Any]]] = None,
+    changelog: bool = False,
+) -> list[dict[str, Any]]:
+    """Generate the release map of a package, mapping commits to their releases.
+
+    :param spec_or_path: The spec file or directory it is located in.
+    :param known_entries: Entries of an existing release map, these
+        commits and their ancestors aren’t processed again.
+    :param history_seed: Known results of older commits, keyed by their
+        ids, these commits and their ancestors aren’t processed.
+    :param changelog: Whether to include the changelog entry generated
+        for each commit. The whole history needs to be processed for this,
+        known entries are ignored, the history seed must contain the full
+        changelog.
+    :return: The entries for commits missing from the known entries, with
+        parents before their children
+    """
+    try:
+        processor = PkgHistoryProcessor(spec_or_path)
+    except SpecParserError as exc:
+        raise SpecParseFailure(exc) from exc
+
+    if not processor.repo:
+        raise ValueError(f"Not a git repository: {processor.path}")
+
+    visitors = [processor.complete_history_visitor, processor.release_number_visitor]
+    if changelog:
+        visitors.append(processor.changelog_visitor)
+        # The changelog visitor needs the complete changelogs of parent commits.
+        known_entries = None
+
+    known_results = (history_seed or {}) | (known_entries or {})
+
+    results = processor.run(
+        str(processor.repo.head.target),
+        visitors=visitors,
+        all_results=True,
+        known_results=known_results or None,
+    )
+
+    entries = []
+    for commit, result in results.items():
+        entry = {
+            "commit-id": str(commit.id),
+            "epoch-version": result["epoch-version"],
+            "release-number": result["release-number"],
+            "release-complete": result["release-complete"],
+        }
+        if changelog:
+            # Only the topmost changelog entry can be generated for the commit itself.
+            commit_changelog = [
+                changelog_entry
+                for changelog_entry in result["changelog"][:1]
+                if changelog_entry["commit-id"] == commit.id
+            ]
+            entry["changelog"] = (
+                collate_changelog({"changelog": commit_changelog}) if commit_changelog else None
+            )
+        entries.append(entry)
+
+    return entries
+
+
+def do_generate_history_seed(
+    spec_or_path: Union[Path, str],
+    *,
+    history_seed: Optional[dict[str, dict[str, Any]]] = None,
+) -> dict[str, Any]:
+    """Generate a history seed for the HEAD commit of a package.
+
+    A history seed contains everything needed to process the history
+    following its commit, i.e. the history preceding it can be missing,
+    e.g. in a shallow clone.
+
+    :param spec_or_path: The spec file or directory it is located in.
+    :param history_seed: Known results of older commits, keyed by their ids
+    :return: The history seed entry, in the release map format
+    """
+    try:
+        processor = PkgHistoryProcessor(spec_or_path)
+    except SpecParserError as exc:
+        raise SpecParseFailure(exc) from exc
+
+    if not processor.repo:
+        raise ValueError(f"Not a git repository: {processor.path}")
+
+    head_id = str(processor.repo.head.target)
+    result = processor.run(
+        head_id,
+        visitors=(processor.release_number_visitor, processor.changelog_visitor),
+        known_results=history_seed,
+    )
+
+    return {
+        "commit-id": head_id,
+        "epoch-version": result["epoch-version"],
+        "release-number": result["release-number"],
+        "release-complete": result["release-complete"],
+        "full-changelog": collate_changelog(result),
+    }
@@ -1,5 +1,10 @@
+import gc
+import os
+from io import BytesIO
 from typing import TYPE_CHECKING
 
+import pytest
+
 from rpmautospec._wrappers.minigit2 import blob, native_adaptation
 
 if TYPE_CHECKING:
@@ -7,11 +12,13 @@ if TYPE_CHECKING:
 
 
 class TestBlob:
-    def test_data(self, repo: "Repository") -> None:
-        buffer = b"testdata"
+    buffer = b"testdata"
+
+    @pytest.fixture
+    def obj(self, repo: "Repository") -> blob.Blob:
         native_oid = native_adaptation.git_oid()
         error_code = native_adaptation.lib.git_blob_create_from_buffer(
-            native_oid, repo._native, buffer, len(buffer)
+            native_oid, repo._native, self.buffer, len(self.buffer)
         )
         assert not error_code, "Can’t create blob from buffer"
 
@@ -19,5 +26,39 @@ class TestBlob:
         error_code = native_adaptation.lib.git_blob_lookup(native_blob_p, repo._native, native_oid)
         assert not error_code, "Can’t lookup blob from its oid"
 
-        obj = blob.Blob(_repo=repo, _native=native_blob_p)
-        assert obj.data == buffer
+        return blob.Blob(_repo=repo, _native=native_blob_p)
+
+    def test_memoryview(self, obj: blob.Blob) -> None:
+        view = obj.memoryview()
+
+        assert view.readonly
+        assert view == self.buffer
+
+        # The view keeps the blob content alive.
+        del obj
+        gc.collect()
+
+        assert bytes(view) == self.buffer
+
+    def test___buffer__(self, obj: blob.Blob) -> None:
+        view = obj.__buffer__(0)
+        assert view.readonly
+        assert view == self.buffer
+
+    @pytest.mark.parametrize("testcase", ("fd", "file"))
+    def test_write_to(self, testcase: str, obj: blob.Blob, tmp_path) -> None:
+        if testcase == "fd":
+            path = tmp_path / "blob"
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+            try:
+                assert obj.write_to(fd) == len(self.buffer)
+            finally:
+                os.close(fd)
+            assert path.read_bytes() == self.buffer
+        else:
+            f = BytesIO()
+            assert obj.write_to(f) == len(self.buffer)
+            assert f.getvalue() == self.buffer
+
+    def test_data(self, obj: blob.Blob) -> None:
+        assert obj.data == self.buffer
@@ -6,6 +6,7 @@ from unittest import mock
 import pytest
 
 from rpmautospec._wrappers.minigit2 import commit, signature, tree
+from rpmautospec._wrappers.minigit2.oid import Oid
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -22,12 +23,33 @@ class TestCommit:
 
         head_commit = repo[repo.head.target]
         assert len(head_commit.parents) == 1
-        assert head_commit.parents[0].message.strip() == "Add a file"
+        parent = head_commit.parents[0]
+        assert parent.message.strip() == "Add a file"
+
+        # Parents are interned in the repository
+        assert repo[parent.id] is parent
+
+    def test_parent_ids(self, repo_root: "Path", repo_root_str: str, repo: "Repository") -> None:
+        a_file = repo_root / "a_file"
+        a_file.write_text("A file. Was changed.")
+        subprocess.run(["git", "-C", repo_root_str, "add", str(a_file)])
+        subprocess.run(["git", "-C", repo_root_str, "commit", "-m", "Change a file"])
+
+        head_commit = repo[repo.head.target]
+        assert head_commit.parent_ids == [parent.id for parent in head_commit.parents]
+        assert all(isinstance(parent_id, Oid) for parent_id in head_commit.parent_ids)
+
+    def test_tree_id(self, repo: "Repository") -> None:
+        head_commit = repo[repo.head.target]
+        assert head_commit.tree_id == head_commit.tree.id
 
     def test_tree(self, repo: "Repository") -> None:
         head_commit = repo[repo.head.target]
         assert isinstance(head_commit.tree, tree.Tree)
 
+        # Trees are interned in the repository
+        assert repo[head_commit.tree.id] is head_commit.tree
+
     def test_commit_time(self, repo_root_str: str, repo: "Repository") -> None:
         completed = subprocess.run(
             ["git", "-C", repo_root_str, "log", "-1", "--format=format:%ad", "--date=format:%s"],
@@ -0,0 +1,36 @@
+import pytest
+
+from rpmautospec._wrappers.minigit2 import enums, native_adaptation
+
+
+@pytest.mark.parametrize(
+    "name",
+    (
+        "soname",
+        "version",
+        "version_tuple",
+        "git_config_level_t",
+        "git_diff_options",
+        "git_diff_options_p",
+        "git_diff_options_p_p",
+    ),
+)
+def test_lazy_attributes(name):
+    value = native_adaptation.__getattr__(name)
+
+    assert value is not None
+    assert native_adaptation.lib._lib is not None
+    assert getattr(native_adaptation, name) == value
+
+
+def test_lazy_attributes_unknown():
+    with pytest.raises(AttributeError, match="has no attribute 'foo'"):
+        native_adaptation.foo
+
+
+def test_enums_config_level():
+    assert enums.ConfigLevel.SYSTEM == native_adaptation.git_config_level_t.SYSTEM
+    assert enums.ConfigLevel is enums.ConfigLevel
+
+    with pytest.raises(AttributeError, match="has no attribute 'Foo'"):
+        enums.Foo
@@ -52,13 +52,29 @@ class TestObject:
 
         assert isinstance(head_commit, Commit)
 
+        # The object is interned in the repository
+        with mock.patch.object(lib, "git_object_lookup_prefix") as git_object_lookup_prefix:
+            assert Object._from_oid(repo=repo, oid=oid) is head_commit
+
+        git_object_lookup_prefix.assert_not_called()
+
     def test___repr__(self, repo: "Repository") -> None:
         head_commit = repo[repo.head.target]
 
         assert repr(head_commit) == f"Commit(oid={head_commit.id.hex!r})"
 
     def test___eq__(self, repo: "Repository") -> None:
-        head_commits = [repo[repo.head.target] for i in range(2)]
+        oid = repo.head.target
+        head_commits = [repo[oid]]
+
+        # Bypass the object cache of the repository
+        native = git_object_p()
+        error_code = lib.git_object_lookup(
+            pointer(native), repo._native, pointer(oid._native), git_object_t.ANY
+        )
+        assert error_code == 0
+        head_commits.append(Object._from_native(repo=repo, native=native))
+
         # Verify that different objects are compared
         assert head_commits[0] is not head_commits[1]
 
@@ -67,7 +83,7 @@ class TestObject:
     def test___hash__(self, repo: "Repository") -> None:
         head_commit = repo[repo.head.target]
         assert isinstance(hash(head_commit), int)
-        assert hash(head_commit) == hash(head_commit.id.hex)
+        assert hash(head_commit) == hash(head_commit.id)
 
     def test_id(self, repo: "Repository") -> None:
         head_commit = repo[repo.head.target]
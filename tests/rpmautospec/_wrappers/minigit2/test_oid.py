@@ -20,6 +20,7 @@ class TestOid:
 
         assert oid.hex == str(oid) == oid_hex
         assert oid.hexb == oid_hex.encode("ascii")
+        assert oid.raw == oid_bytes
 
     @pytest.mark.parametrize("testcase", ("oid", "oid-as-str", "oid-as-bytes"))
     def test__from_oid(self, testcase: str) -> None:
@@ -50,6 +51,27 @@ class TestOid:
 
         assert self == other
 
+    def test___eq___other_types(self) -> None:
+        oid = Oid._from_oid("".join(f"{x:02x}" for x in randbytes(constants.GIT_OID_SHA1_SIZE)))
+        assert oid != None  # noqa: E711
+        assert oid != 5
+
+    def test___hash__(self) -> None:
+        oid_bytes = randbytes(constants.GIT_OID_SHA1_SIZE)
+        oid_hex = "".join(f"{x:02x}" for x in oid_bytes)
+
+        oid = Oid._from_oid(oid_hex)
+        other = Oid._from_oid(oid_hex)
+
+        assert hash(oid) == hash(other) == hash(oid_bytes)
+        assert {oid: "value"}[other] == "value"
+        assert len({oid, other}) == 1
+
+        # The raw id is kept in a slot, formatting the id isn’t needed for hashing.
+        assert "raw" not in oid.__dict__
+        assert "hex" not in oid.__dict__
+        assert "hexb" not in oid.__dict__
+
     def test_hexb_hex___str__(self) -> None:
         oid_hex = "".join(f"{x:02x}" for x in randbytes(constants.GIT_OID_SHA1_SIZE))
         oid = Oid._from_oid(oid_hex)
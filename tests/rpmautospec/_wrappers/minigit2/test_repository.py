@@ -2,6 +2,7 @@ import subprocess
 from contextlib import nullcontext
 from ctypes import byref, c_char_p, c_void_p, cast
 from pathlib import Path
+from unittest import mock
 
 import pytest
 
@@ -117,6 +118,26 @@ class TestRepository:
         assert isinstance(repo[repo.head.target], Commit)
         assert repo.head.target.hex == repo[repo.head.target].id.hex
 
+    def test__object_cache(self, repo_root: Path, repo_root_str: str, repo: Repository) -> None:
+        a_file = repo_root / "a_file"
+        a_file.write_text("A file. Was changed.")
+        subprocess.run(["git", "-C", repo_root_str, "commit", "-a", "-m", "Change a file"])
+
+        head_commit = repo[repo.head.target]
+        assert repo[head_commit.id] is head_commit
+        assert repo._get_cached_object(head_commit.id.raw) is head_commit
+
+        with mock.patch.object(repo, "_object_cache_size", 2):
+            parent = head_commit.parents[0]
+            tree = head_commit.tree
+
+            assert list(repo._object_cache.values()) == [parent, tree]
+            assert repo._get_cached_object(head_commit.id.raw) is None
+
+            # Looking up an object marks it as recently used.
+            assert repo._get_cached_object(parent.id.raw) is parent
+            assert list(repo._object_cache.values()) == [tree, parent]
+
     @pytest.mark.parametrize(
         "obj_type, expected",
         (
@@ -28,11 +28,31 @@ class TestTree:
         assert b"a_file" in tree
         assert "not_a_file" not in tree
 
+    def test_entry_id(self, tree: Tree) -> None:
+        with mock.patch.object(lib, "git_tree_entry_to_object") as git_tree_entry_to_object:
+            oid, filemode = tree.entry_id("a_file")
+
+        git_tree_entry_to_object.assert_not_called()
+        assert oid == tree["a_file"].id
+        assert filemode == tree["a_file"].filemode
+
+        with pytest.raises(KeyError):
+            tree.entry_id("not_a_file")
+
     def test___getitem__(self, tree: Tree) -> None:
         blob = tree["a_file"]
         assert blob.name == "a_file"
         assert blob.data == b"A file.\n"
 
+        # The native blob object is shared between lookups
+        with mock.patch.object(lib, "git_tree_entry_to_object") as git_tree_entry_to_object:
+            other_blob = tree["a_file"]
+
+        git_tree_entry_to_object.assert_not_called()
+        assert other_blob is not blob
+        assert other_blob == blob
+        assert other_blob.name == "a_file"
+
     def test___len__(self, tree: Tree) -> None:
         assert len(tree) == 1
 
@@ -0,0 +1,30 @@
+from unittest import mock
+
+import pytest
+
+from rpmautospec._wrappers.minirpm._rpm import native_adaptation, toplevel
+
+
+def test__read_rpm_config():
+    with (
+        mock.patch.object(native_adaptation, "_rpm_config_read", new=False),
+        mock.patch.object(toplevel, "reloadConfig") as reloadConfig,
+    ):
+        native_adaptation._read_rpm_config(native_adaptation.librpm)
+        reloadConfig.assert_called_once_with()
+
+        native_adaptation._read_rpm_config(native_adaptation.librpmio)
+        reloadConfig.assert_called_once_with()
+
+
+@pytest.mark.parametrize("attr", ("soname", "version", "version_tuple"))
+def test_deprecated_lib_attributes(attr):
+    with mock.patch.object(native_adaptation, "librpmio") as librpmio:
+        with pytest.deprecated_call(match=f"use librpmio.{attr} instead"):
+            value = getattr(native_adaptation, f"librpmio_{attr}")
+
+    librpmio.load.assert_called_once_with()
+    assert value is getattr(librpmio, attr)
+
+    with pytest.raises(AttributeError):
+        native_adaptation.librpmio_foo
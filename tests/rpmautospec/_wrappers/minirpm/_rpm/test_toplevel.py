@@ -96,3 +96,14 @@ def test_expandMacro(success: bool):
             librpmio.rpmExpandMacros.assert_called_once_with(None, b"%foo", byref(expanded), 0)
             expanded.value.decode.assert_called_once_with("utf-8", errors="surrogateescape")
             libc.free.assert_called_once_with(cast(expanded, toplevel.c_void_p))
+
+
+def test_getVersion():
+    with (
+        mock.patch.object(toplevel, "librpm") as librpm,
+        mock.patch.object(toplevel, "c_char_p") as c_char_p,
+    ):
+        c_char_p.in_dll.return_value.value = b"4.20.1"
+        assert toplevel.getVersion() == "4.20.1"
+
+    c_char_p.in_dll.assert_called_once_with(librpm.load.return_value, "RPMVERSION")
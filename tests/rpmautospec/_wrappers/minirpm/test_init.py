@@ -0,0 +1,17 @@
+from unittest import mock
+
+import pytest
+
+from rpmautospec._wrappers import minirpm
+
+
+def test___version__():
+    with mock.patch.object(minirpm, "getVersion", return_value="4.20.1") as getVersion:
+        assert minirpm.__version__ == "4.20.1"
+
+    getVersion.assert_called_once_with()
+
+
+def test___getattr__unknown():
+    with pytest.raises(AttributeError, match="has no attribute 'BOOP'"):
+        minirpm.BOOP
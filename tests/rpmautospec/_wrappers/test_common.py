@@ -1,3 +1,5 @@
+import subprocess
+import sys
 from contextlib import nullcontext
 from ctypes import c_int
 from enum import IntEnum
@@ -145,15 +147,106 @@ def test_load_lib(testcase: str) -> None:
             assert version == ".".join(str(x) for x in version_tuple)
 
 
-def test_install_func_decls() -> None:
-    lib = mock.Mock()
-    FUNC_DECLS = {
-        "foo": (None, (c_int,)),
-    }
-
-    common.install_func_decls(lib, FUNC_DECLS)
-
-    for func_name, (restype, argtypes) in FUNC_DECLS.items():
-        func = getattr(lib, func_name)
-        assert func.restype == restype
-        assert func.argtypes == argtypes
+class TestLazyLib:
+    FUNC_DECLS = {"foo": (None, (c_int,))}
+
+    @pytest.fixture
+    def load_lib(self):
+        with mock.patch.object(common, "load_lib") as load_lib:
+            load_lib.return_value = (mock.Mock(), "libfoo.so.1", "1", (1,))
+            yield load_lib
+
+    def test___repr__(self, load_lib) -> None:
+        lib = common.LazyLib("foo")
+        assert repr(lib) == "<LazyLib libfoo (soname=None)>"
+        lib.load()
+        assert repr(lib) == "<LazyLib libfoo (soname='libfoo.so.1')>"
+
+    def test_load(self, load_lib) -> None:
+        lib = common.LazyLib("foo", known_versions=((1,),), load_unknown=False)
+
+        load_lib.assert_not_called()
+
+        assert lib.load() is load_lib.return_value[0]
+        assert lib.load() is load_lib.return_value[0]
+
+        load_lib.assert_called_once_with("foo", known_versions=((1,),), load_unknown=False)
+        assert lib.soname == "libfoo.so.1"
+        assert lib.version == "1"
+        assert lib.version_tuple == (1,)
+
+    @pytest.mark.parametrize(
+        "exc", (common.LibNotFoundError("BOOP"), OSError("BOOP")), ids=("not-found", "os-error")
+    )
+    def test_load_failure(self, exc, load_lib) -> None:
+        load_lib.side_effect = exc
+        lib = common.LazyLib("foo")
+
+        # Callers expect failure to load libraries to be an ImportError, like when they were
+        # loaded on import.
+        with pytest.raises(ImportError, match="BOOP") as excinfo:
+            lib.foo
+
+        assert isinstance(excinfo.value, common.LibError)
+        assert lib._lib is None
+
+    def test___getattr__(self, load_lib) -> None:
+        init = mock.Mock()
+        lib = common.LazyLib("foo", func_decls=self.FUNC_DECLS, init=init)
+        native_lib = load_lib.return_value[0]
+
+        load_lib.assert_not_called()
+        init.assert_not_called()
+
+        func = lib.foo
+
+        load_lib.assert_called_once()
+        init.assert_called_once_with(lib)
+        assert func is native_lib.foo
+        assert func.restype is None
+        assert func.argtypes == (c_int,)
+
+        # Functions are cached, the library initialized only once.
+        assert lib.foo is func
+        assert lib.bar is native_lib.bar
+        init.assert_called_once()
+
+        with pytest.raises(AttributeError):
+            lib._private
+
+    def test_add_func_decls(self, load_lib) -> None:
+        lib = common.LazyLib("foo")
+
+        func = lib.foo
+        lib.add_func_decls(self.FUNC_DECLS | {"bar": (c_int, ())})
+
+        assert func.restype is None
+        assert func.argtypes == (c_int,)
+
+        assert lib.bar.restype is c_int
+        assert lib.bar.argtypes == ()
+
+
+def test_native_libraries_unused_on_import() -> None:
+    # Use a pristine interpreter to check that importing the commonly used code path doesn’t load
+    # and set up native libraries needlessly.
+    code = """
+import sys
+import rpmautospec._wrappers.minigit2
+from rpmautospec._wrappers.minigit2 import native_adaptation as minigit2_na
+from rpmautospec._wrappers.minirpm._rpm import native_adaptation as minirpm_na
+import rpmautospec.subcommands.process_distgit
+
+for lib in (
+    minigit2_na.lib,
+    minirpm_na.libc,
+    minirpm_na.librpm,
+    minirpm_na.librpmio,
+    minirpm_na.librpmbuild,
+):
+    assert lib._lib is None, f"{lib!r} was loaded"
+
+used_funcs = [name for name in vars(minigit2_na.lib) if name.startswith("git_")]
+assert not used_funcs, f"libgit2 functions were set up: {used_funcs}"
+"""
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -1,11 +1,20 @@
+import json
 import logging
 from shutil import SpecialFileError
 from unittest import mock
 
+import click
 import pytest
 
 from rpmautospec.compat import rpm
-from rpmautospec.exc import SpecParseFailure
+from rpmautospec.exc import HistorySeedError, SpecParseFailure
+from rpmautospec.subcommands import (
+    changelog,
+    convert,
+    process_distgit,
+    release,
+    release_map,
+)
 
 from ...common import gen_testrepo
 
@@ -34,23 +43,55 @@ def test_cli_help(cli_runner):
     assert not result.stderr
 
 
-def test_cli(cli_runner):
+@pytest.mark.parametrize(
+    "history_seed", ("without-seed", "with-seed", "with-invalid-seed"), ids=str
+)
+def test_cli(history_seed, tmp_path, cli_runner):
+    seen_obj = {}
+
     @cli_click.cli.command(hidden=True)
-    def test():
-        pass
+    @click.pass_obj
+    def test(obj):
+        seen_obj.update(obj)
+
+    seed_entry = {
+        "commit-id": "abc",
+        "epoch-version": "1.0",
+        "release-number": 5,
+        "release-complete": "5",
+    }
+
+    args = ["test"]
+    if history_seed != "without-seed":
+        history_seed_file = tmp_path / "seed.jsonl"
+        if history_seed == "with-invalid-seed":
+            history_seed_file.write_text('{"commit-id":"abc","release-number":5}\n')
+        else:
+            history_seed_file.write_text(json.dumps(seed_entry) + "\n")
+        args = ["--history-seed", str(history_seed_file), *args]
 
     with mock.patch.object(cli_click, "setup_logging") as setup_logging:
-        result = cli_runner.invoke(cli_click.cli, ["test"])
+        result = cli_runner.invoke(cli_click.cli, args)
+
+    if history_seed == "with-invalid-seed":
+        assert result.exit_code != 0
+        assert "line 1 lacks keys: epoch-version, release-complete" in result.stderr
+        return
 
     assert result.exit_code == 0
 
     setup_logging.assert_called_with(log_level=logging.INFO)
 
+    if history_seed == "with-seed":
+        assert seen_obj["history_seed"] == {"abc": seed_entry}
+    else:
+        assert seen_obj["history_seed"] is None
+
 
 @pytest.mark.parametrize("testcase", ("success", "specfile-parse-failure"))
 def test_generate_changelog(testcase, cli_runner):
     with (
-        mock.patch.object(cli_click, "do_generate_changelog") as do_generate_changelog,
+        mock.patch.object(changelog, "do_stream_changelog") as do_stream_changelog,
         mock.patch.object(cli_click, "pager") as pager,
     ):
         pager_sentinel = object()
@@ -59,22 +100,25 @@ def test_generate_changelog(testcase, cli_runner):
         ctx_obj = {
             "pager": pager_sentinel,
             "error_on_unparseable_spec": error_on_unparseable_spec_sentinel,
+            "history_seed": object(),
         }
 
         if "specfile-parse-failure" in testcase:
-            do_generate_changelog.side_effect = cli_click.SpecParseFailure("BOO")
+            do_stream_changelog.side_effect = cli_click.SpecParseFailure("BOO")
 
         result = cli_runner.invoke(cli_click.generate_changelog, ["some_path"], obj=ctx_obj)
 
-        do_generate_changelog.assert_called_once_with(
-            "some_path", error_on_unparseable_spec=error_on_unparseable_spec_sentinel
+        do_stream_changelog.assert_called_once_with(
+            "some_path",
+            error_on_unparseable_spec=error_on_unparseable_spec_sentinel,
+            history_seed=ctx_obj["history_seed"],
         )
 
         if "success" in testcase:
             assert result.exit_code == 0
 
             pager.page.assert_called_once_with(
-                do_generate_changelog.return_value, enabled=pager_sentinel
+                do_stream_changelog.return_value, enabled=pager_sentinel
             )
         else:
             assert result.exit_code != 0
@@ -84,7 +128,7 @@ def test_generate_changelog(testcase, cli_runner):
 
 
 class TestConvertCommand:
-    @mock.patch.object(cli_click, "PkgConverter")
+    @mock.patch.object(convert, "PkgConverter")
     def test_convert_empty_commit_message(self, PkgConverter, cli_runner, specfile):
         result = cli_runner.invoke(
             cli_click.convert, ["--commit", "--message=", str(specfile)], catch_exceptions=False
@@ -92,7 +136,7 @@ class TestConvertCommand:
         assert result.exit_code != 0
         assert "Error: Commit message cannot be empty" in result.stderr
 
-    @mock.patch.object(cli_click, "PkgConverter")
+    @mock.patch.object(convert, "PkgConverter")
     def test_convert_no_changes(self, PkgConverter, cli_runner, specfile):
         result = cli_runner.invoke(
             cli_click.convert,
@@ -102,7 +146,7 @@ class TestConvertCommand:
         assert result.exit_code != 0
         assert "Error: All changes are disabled" in result.stderr
 
-    @mock.patch.object(cli_click, "PkgConverter")
+    @mock.patch.object(convert, "PkgConverter")
     @pytest.mark.parametrize(
         "with_release, with_changelog",
         ((True, True), (True, False), (False, True)),
@@ -167,13 +211,13 @@ class TestConvertCommand:
             ("__init__", ValueError),
             ("__init__", FileNotFoundError),
             ("__init__", SpecialFileError),
-            ("__init__", cli_click.FileUntrackedError),
-            ("__init__", cli_click.FileModifiedError),
+            ("__init__", convert.FileUntrackedError),
+            ("__init__", convert.FileModifiedError),
             ("convert_to_autorelease", SpecParseFailure),
             ("convert_to_autochangelog", SpecParseFailure),
         ),
     )
-    @mock.patch.object(cli_click, "PkgConverter")
+    @mock.patch.object(convert, "PkgConverter")
     def test_rewrap_exceptions(self, PkgConverter, method, exception, cli_runner, specfile):
         if method == "__init__":
             PkgConverter.side_effect = exception("BOOP")
@@ -200,14 +244,14 @@ def test_process_distgit(testcase, tmp_path, locale, cli_runner):
     unpacked_repo_dir, test_spec_file_path = gen_testrepo(tmp_path, "rawhide")
 
     args = [str(test_spec_file_path), str(output_spec_file)]
-    ctx_obj = {"error_on_unparseable_spec": object()}
+    ctx_obj = {"error_on_unparseable_spec": object(), "history_seed": None}
 
     if override_locale:
         locale.setlocale(locale.LC_ALL, override_locale)
 
     with (
         mock.patch.object(
-            cli_click, "do_process_distgit", wraps=cli_click.do_process_distgit
+            process_distgit, "do_process_distgit", wraps=process_distgit.do_process_distgit
         ) as do_process_distgit_fn,
         mock.patch.object(rpm, "setLogFile"),  # rpm can’t cope with fake sys.stderr
     ):
@@ -219,6 +263,7 @@ def test_process_distgit(testcase, tmp_path, locale, cli_runner):
         str(test_spec_file_path),
         str(output_spec_file),
         error_on_unparseable_spec=ctx_obj["error_on_unparseable_spec"],
+        history_seed=ctx_obj["history_seed"],
     )
 
     if "specfile-parse-failure" in testcase:
@@ -234,9 +279,9 @@ def test_calculate_release(testcase, cli_runner):
     specfile_parse_failure = "specfile-parse-failure" in testcase
 
     args = ["/foo/bar", "--complete-release" if complete_release else "--number-only"]
-    ctx_obj = {"error_on_unparseable_spec": object()}
+    ctx_obj = {"error_on_unparseable_spec": object(), "history_seed": object()}
 
-    with mock.patch.object(cli_click, "do_calculate_release") as do_calculate_release:
+    with mock.patch.object(release, "do_calculate_release") as do_calculate_release:
         if specfile_parse_failure:
             do_calculate_release.side_effect = cli_click.SpecParseFailure("GNA")
         else:
@@ -251,6 +296,7 @@ def test_calculate_release(testcase, cli_runner):
         "/foo/bar",
         complete_release=complete_release,
         error_on_unparseable_spec=ctx_obj["error_on_unparseable_spec"],
+        history_seed=ctx_obj["history_seed"],
     )
 
     if specfile_parse_failure:
@@ -260,3 +306,128 @@ def test_calculate_release(testcase, cli_runner):
         assert result.exit_code == 0
         expected_rel = "8" if complete_release else "6"
         assert f"Calculated release number: {expected_rel}" in result.stdout
+
+
+@pytest.mark.parametrize(
+    "testcase",
+    (
+        "stdout",
+        "new-file",
+        "existing-file",
+        "invalid-file",
+        "specfile-parse-failure",
+        "history-seed-error",
+        "not-a-repo",
+    ),
+)
+def test_release_map(testcase, tmp_path, cli_runner):
+    entries = [
+        {"commit-id": "abc", "epoch-version": "1.0", "release-number": 1, "release-complete": "1"},
+        {"commit-id": "def", "epoch-version": "1.0", "release-number": 2, "release-complete": "2"},
+    ]
+    output = tmp_path / "release-map.jsonl"
+    args = ["/foo/bar"]
+    ctx_obj = {"history_seed": object()}
+    known_entries = None
+
+    if "file" in testcase:
+        args = ["--output", str(output), *args]
+        if testcase == "existing-file":
+            output.write_text(json.dumps(entries[0], separators=(",", ":")) + "\n")
+            known_entries = {"abc": entries[0]}
+        elif testcase == "invalid-file":
+            output.write_text(json.dumps(entries[0]) + "\n{boo\n")
+
+    with mock.patch.object(release_map, "do_generate_release_map") as do_generate_release_map:
+        if testcase == "specfile-parse-failure":
+            do_generate_release_map.side_effect = SpecParseFailure("BOO")
+        elif testcase == "history-seed-error":
+            do_generate_release_map.side_effect = HistorySeedError("Lacks the full changelog")
+        elif testcase == "not-a-repo":
+            do_generate_release_map.side_effect = ValueError("Not a git repository: /foo")
+        else:
+            do_generate_release_map.return_value = entries
+
+        result = cli_runner.invoke(cli_click.release_map, args, obj=ctx_obj)
+
+    if testcase == "invalid-file":
+        do_generate_release_map.assert_not_called()
+        assert result.exit_code != 0
+        assert f"Error: {output}: Can’t read release map entry in line 2" in result.stderr
+        return
+
+    do_generate_release_map.assert_called_once_with(
+        "/foo/bar",
+        known_entries=known_entries,
+        history_seed=ctx_obj["history_seed"],
+        changelog=False,
+    )
+
+    if testcase == "specfile-parse-failure":
+        assert result.exit_code != 0
+        assert "Error: BOO" in result.stderr
+        return
+    elif testcase == "history-seed-error":
+        assert result.exit_code != 0
+        assert "Error: Lacks the full changelog" in result.stderr
+        return
+    elif testcase == "not-a-repo":
+        assert result.exit_code != 0
+        assert "Error: Not a git repository: /foo" in result.stderr
+        return
+
+    assert result.exit_code == 0
+
+    expected_lines = [json.dumps(entry, separators=(",", ":")) for entry in entries]
+    if testcase == "stdout":
+        assert result.stdout.splitlines() == expected_lines
+    else:
+        assert not result.stdout
+        assert output.read_text().splitlines() == expected_lines
+
+
+@pytest.mark.parametrize(
+    "testcase", ("stdout", "file", "specfile-parse-failure", "history-seed-error", "not-a-repo")
+)
+def test_history_seed(testcase, tmp_path, cli_runner):
+    entry = {"commit-id": "abc", "release-number": 1, "full-changelog": "* Boo"}
+    output = tmp_path / "seed.jsonl"
+    args = ["/foo/bar"]
+    ctx_obj = {"history_seed": object()}
+
+    if testcase == "file":
+        output.write_text('{"commit-id":"def"}\n')
+        args = ["--output", str(output), *args]
+
+    with mock.patch.object(release_map, "do_generate_history_seed") as do_generate_history_seed:
+        if testcase == "specfile-parse-failure":
+            do_generate_history_seed.side_effect = SpecParseFailure("BOO")
+        elif testcase == "history-seed-error":
+            do_generate_history_seed.side_effect = HistorySeedError("Too shallow")
+        elif testcase == "not-a-repo":
+            do_generate_history_seed.side_effect = ValueError("Not a git repository: /foo")
+        else:
+            do_generate_history_seed.return_value = entry
+
+        result = cli_runner.invoke(cli_click.history_seed, args, obj=ctx_obj)
+
+    do_generate_history_seed.assert_called_once_with(
+        "/foo/bar", history_seed=ctx_obj["history_seed"]
+    )
+
+    if testcase == "specfile-parse-failure":
+        assert result.exit_code != 0
+        assert "Error: BOO" in result.stderr
+    elif testcase == "history-seed-error":
+        assert result.exit_code != 0
+        assert "Error: Too shallow" in result.stderr
+    elif testcase == "not-a-repo":
+        assert result.exit_code != 0
+        assert "Error: Not a git repository: /foo" in result.stderr
+    else:
+        assert result.exit_code == 0
+        expected_line = '{"commit-id":"abc","release-number":1,"full-changelog":"* Boo"}'
+        if testcase == "stdout":
+            assert result.stdout.splitlines() == [expected_line]
+        else:
+            assert output.read_text().splitlines() == ['{"commit-id":"def"}', expected_line]
@@ -6,28 +6,114 @@ import pytest
 from rpmautospec.cli import pager
 
 
-@pytest.mark.parametrize("testcase", ("enabled-withenv", "enabled-withoutenv", "disabled"))
+@pytest.mark.parametrize(
+    "testcase",
+    (
+        "not-a-tty",
+        "manpager",
+        "pager",
+        "less",
+        "dumb-terminal",
+        "more",
+        "no-pager",
+    ),
+)
 @mock.patch.dict(os.environ)
-def test_page(testcase):
+def test__get_pager_command(testcase):
+    for name in ("MANPAGER", "PAGER", "TERM"):
+        os.environ.pop(name, None)
+
+    if testcase == "manpager":
+        os.environ["MANPAGER"] = "most"
+        os.environ["PAGER"] = "more"
+    elif testcase == "pager":
+        os.environ["PAGER"] = "more"
+    elif testcase == "dumb-terminal":
+        os.environ["TERM"] = "dumb"
+
+    with (
+        mock.patch.object(pager, "sys") as sys,
+        mock.patch.object(pager.shutil, "which") as which,
+    ):
+        sys.stdin.isatty.return_value = sys.stdout.isatty.return_value = testcase != "not-a-tty"
+        if testcase == "more":
+            which.side_effect = lambda cmd: "/usr/bin/more" if cmd == "more" else None
+        elif testcase == "no-pager":
+            which.return_value = None
+        else:
+            which.side_effect = lambda cmd: f"/usr/bin/{cmd}"
+
+        command = pager._get_pager_command()
+
+    if testcase == "manpager":
+        assert command == "most"
+    elif testcase == "pager":
+        assert command == "more"
+    elif testcase == "less":
+        assert command == "less"
+    elif testcase == "more":
+        assert command == "more"
+    else:
+        assert command is None
+
+
+@pytest.mark.parametrize("testcase", ("complete", "quit-early"))
+def test__pipe_to_pager(testcase, tmp_path):
+    output = tmp_path / "output"
+    consumed = []
+
+    def chunks():
+        for chunk in ("Hello", ", ", "World!"):
+            consumed.append(chunk)
+            yield chunk
+
+    if testcase == "complete":
+        pager._pipe_to_pager(chunks(), f"cat > {output}")
+        assert output.read_text() == "Hello, World!\n"
+    else:
+        with mock.patch.object(pager.subprocess, "Popen") as Popen:
+            pipe = Popen.return_value.stdin.__enter__.return_value
+            pipe.write.side_effect = [None, BrokenPipeError()]
+            pager._pipe_to_pager(chunks(), "less")
+
+        Popen.return_value.wait.assert_called_once_with()
+        assert consumed == ["Hello", ", "]
+
+
+@pytest.mark.parametrize(
+    "testcase", ("enabled-withenv", "enabled-withoutenv", "enabled-nopager", "disabled")
+)
+@pytest.mark.parametrize("chunked", (False, True), ids=("text", "chunks"))
+@mock.patch.dict(os.environ)
+def test_page(testcase, chunked, capsys):
     """Test the page() function."""
     if "withenv" in testcase:
         os.environ["RPMAUTOSPEC_LESS"] = "KMXF"
     else:
         os.environ.pop("RPMAUTOSPEC_LESS", None)
 
+    text = iter(("Hello", "!")) if chunked else "Hello!"
+
     with (
-        mock.patch.object(pager.pydoc, "pager") as pydoc_pager,
-        mock.patch.object(pager, "print") as print,
+        mock.patch.object(pager, "_get_pager_command") as _get_pager_command,
+        mock.patch.object(pager, "_pipe_to_pager") as _pipe_to_pager,
     ):
-        pager.page("Hello!", enabled="enabled" in testcase)
+        _get_pager_command.return_value = None if "nopager" in testcase else "less"
+        pager.page(text, enabled="enabled" in testcase)
+
+    if "disabled" in testcase or "nopager" in testcase:
+        _pipe_to_pager.assert_not_called()
+        assert capsys.readouterr().out == "Hello!\n"
+    else:
+        _pipe_to_pager.assert_called_once()
+        chunks, command = _pipe_to_pager.call_args.args
+        assert "".join(chunks) == "Hello!"
+        assert command == "less"
+        assert capsys.readouterr().out == ""
 
     if "disabled" in testcase:
-        pydoc_pager.assert_not_called()
-        print.assert_called_with("Hello!")
+        _get_pager_command.assert_not_called()
+    elif "withenv" in testcase:
+        assert os.environ["LESS"] == "KMXF"
     else:
-        print.assert_not_called()
-        pydoc_pager.assert_called_with("Hello!")
-        if "withenv" in testcase:
-            assert os.environ["LESS"] == "KMXF"
-        else:
-            assert os.environ["LESS"] == "FXMK"
+        assert os.environ["LESS"] == "FXMK"
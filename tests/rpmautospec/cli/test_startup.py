@@ -0,0 +1,141 @@
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+import pytest
+
+from ...common import gen_testrepo
+
+pytest.importorskip("click")
+
+# These must only be imported when a subcommand needs them.
+LAZY_MODULES = {
+    "pygit2",
+    "pydoc",
+    "rpm",
+    "rpmautospec_core",
+    "rpmautospec.compat",
+    "rpmautospec.pkg_history",
+    "rpmautospec.specparser",
+    "rpmautospec.subcommands.changelog",
+    "rpmautospec.subcommands.convert",
+    "rpmautospec.subcommands.process_distgit",
+    "rpmautospec.subcommands.release",
+    "rpmautospec.subcommands.release_map",
+    "rpmautospec.version",
+}
+
+
+class StartupProfile(NamedTuple):
+    imported_modules: frozenset[str]
+    stdout: str
+
+
+def profile_startup(code: str) -> StartupProfile:
+    """Run code in a fresh interpreter and determine which modules it imports.
+
+    Wall-clock time depends too much on the environment the tests run in to be checked against
+    absolute numbers, use best_wall_clock_time() to compare against a baseline instead.
+
+    :param code: The code to run
+    :return: The names of imported modules and what the code printed
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        encoding="utf-8",
+    )
+
+    imported_modules = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, module = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+        imported_modules.add(module.strip())
+
+    return StartupProfile(frozenset(imported_modules), completed.stdout)
+
+
+def best_wall_clock_time(code: str, runs: int = 3) -> float:
+    """Run code in fresh interpreters and determine the shortest wall-clock time it took.
+
+    :param code: The code to run
+    :param runs: How often to run the code
+    :return: The shortest time in seconds
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def test_cli_startup():
+    imported_modules = profile_startup("from rpmautospec.cli import cli").imported_modules
+
+    assert "rpmautospec.cli" in imported_modules
+    assert not LAZY_MODULES & imported_modules
+
+
+def test_calculate_release_startup(tmp_path):
+    unpacked_repo_dir, test_spec_file_path = gen_testrepo(tmp_path, "rawhide")
+
+    profile = profile_startup(
+        "import sys\n"
+        + "from rpmautospec.cli import cli\n"
+        + f"sys.argv = ['rpmautospec', 'calculate-release', {str(test_spec_file_path)!r}]\n"
+        + "cli()\n"
+    )
+
+    unneeded_modules = {
+        "pydoc",
+        "rpmautospec.subcommands.changelog",
+        "rpmautospec.subcommands.convert",
+        "rpmautospec.subcommands.process_distgit",
+    }
+
+    assert profile.stdout == "Calculated release number: 11\n"
+    assert "rpmautospec.subcommands.release" in profile.imported_modules
+    assert not unneeded_modules & profile.imported_modules
+
+
+def test_process_distgit_startup(tmp_path):
+    unpacked_repo_dir, test_spec_file_path = gen_testrepo(tmp_path, "rawhide")
+    target_spec_file_path = tmp_path / "processed.spec"
+
+    run_process_distgit = (
+        "import sys\n"
+        + "from rpmautospec.cli import cli\n"
+        + "sys.argv = ['rpmautospec', 'process-distgit',"
+        + f" {str(test_spec_file_path)!r}, {str(target_spec_file_path)!r}]\n"
+        + "cli(standalone_mode=False)\n"
+    )
+
+    profile = profile_startup(run_process_distgit)
+
+    unneeded_modules = {
+        "pydoc",
+        "rpmautospec.subcommands.convert",
+        "rpmautospec.subcommands.release_map",
+    }
+
+    assert "release_number = 11;" in target_spec_file_path.read_text()
+    assert "rpmautospec.subcommands.process_distgit" in profile.imported_modules
+    assert not unneeded_modules & profile.imported_modules
+
+    # Wall-clock time depends on the environment, so compare against importing all subcommands
+    # up front in the same environment, with a generous allowance for noise.
+    eager_imports = "".join(
+        f"import {module}\n"
+        for module in sorted(LAZY_MODULES)
+        if module.startswith("rpmautospec.subcommands.")
+    )
+    lazy_time = best_wall_clock_time(run_process_distgit)
+    eager_time = best_wall_clock_time(eager_imports + run_process_distgit)
+
+    assert lazy_time < eager_time * 1.5
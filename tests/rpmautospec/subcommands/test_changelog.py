@@ -8,11 +8,6 @@ from rpmautospec.exc import SpecParseFailure
 from rpmautospec.subcommands import changelog
 
 
-@pytest.mark.parametrize("testval", ("text", b"text"), ids=("str", "bytes"))
-def test__coerce_to_str(testval):
-    assert changelog._coerce_to_str(testval) == "text"
-
-
 def test_collate_changelog():
     now = dt.datetime(2024, 1, 23, 12, 0)
 
@@ -54,6 +49,22 @@ def test_do_generate_changelog(repo):
     assert "- Initial commit" in result
 
 
+def test_do_stream_changelog(repo):
+    with mock.patch.object(ChangelogEntry, "format", autospec=True) as format:
+        format.side_effect = lambda entry: f"ENTRY {entry['commit-id']}"
+        chunks = changelog.do_stream_changelog(repo.workdir)
+
+        # Entries are only formatted when the chunks are consumed.
+        format.assert_not_called()
+        assert next(chunks).startswith("ENTRY ")
+        format.assert_called_once()
+
+        rest = list(chunks)
+
+    assert rest[0] == "\n\n"
+    assert rest[1].startswith("ENTRY ")
+
+
 def test_do_generate_changelog_processor_error(repo, monkeypatch):
     monkeypatch.setenv("RPMAUTOSPEC_SPEC_PARSER", "BOO")
     with pytest.raises(SpecParseFailure):
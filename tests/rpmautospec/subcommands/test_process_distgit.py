@@ -1,6 +1,7 @@
 import difflib
 import os
 import re
+import stat
 import tempfile
 from contextlib import nullcontext
 from pathlib import Path
@@ -15,6 +16,7 @@ except ImportError:
     norpm = None
 
 from rpmautospec.exc import SpecParseFailure
+from rpmautospec.specparser import SpecParserError
 from rpmautospec.subcommands import process_distgit
 from rpmautospec.version import __version__
 
@@ -324,9 +326,10 @@ def test_do_process_distgit(
     processor_run.assert_called()
 
     test_spec_file_stat = os.stat(test_spec_file_path)
-    attrs = ["mode", "ino", "dev", "uid", "gid"]
+    attrs = ["mode", "uid", "gid"]
     if not overwrite_specfile:
-        attrs.extend(["size", "mtime", "ctime"])
+        # An overwritten spec file is replaced atomically, i.e. by a new inode.
+        attrs.extend(["ino", "dev", "size", "mtime", "ctime"])
 
     for attr in attrs:
         assert getattr(test_spec_file_stat, "st_" + attr) == getattr(
@@ -474,3 +477,139 @@ def test_do_process_distgit_processor_error(repo, monkeypatch):
     monkeypatch.setenv("RPMAUTOSPEC_SPEC_PARSER", "BOO")
     with pytest.raises(SpecParseFailure):
         process_distgit.do_process_distgit(repo.workdir, None, enable_caching=False)
+
+
+@pytest.mark.parametrize("enable_caching", (True, False), ids=("caching", "no-caching"))
+def test_do_process_distgit_enable_caching(enable_caching, repo):
+    with (
+        mock.patch.object(
+            process_distgit, "PkgHistoryProcessor", side_effect=SpecParserError("BOO")
+        ) as PkgHistoryProcessor,
+        pytest.raises(SpecParseFailure),
+    ):
+        process_distgit.do_process_distgit(repo.workdir, enable_caching=enable_caching)
+
+    PkgHistoryProcessor.assert_called_once_with(repo.workdir, enable_caching=enable_caching)
+
+
+@pytest.mark.parametrize("testcase", ("new-target", "unchanged-target", "changed-target"))
+def test_do_process_distgit_write(testcase, repo, specfile, tmp_path):
+    target_dir = tmp_path / "target"
+    target_dir.mkdir()
+    target = target_dir / "processed.spec"
+    specfile.chmod(0o640)
+
+    if testcase != "new-target":
+        process_distgit.do_process_distgit(repo.workdir, target, enable_caching=False)
+        orig_target_stat = target.stat()
+        if testcase == "changed-target":
+            target.write_text(target.read_text() + "\n")
+            orig_target_stat = target.stat()
+
+    with mock.patch.object(
+        process_distgit, "_file_digest", wraps=process_distgit._file_digest
+    ) as _file_digest:
+        process_distgit.do_process_distgit(repo.workdir, target, enable_caching=False)
+
+    target_stat = target.stat()
+
+    if testcase == "unchanged-target":
+        # The target isn’t replaced if its content wouldn’t change.
+        assert target_stat.st_ino == orig_target_stat.st_ino
+        assert target_stat.st_mtime_ns == orig_target_stat.st_mtime_ns
+        assert _file_digest.call_count == 2
+    else:
+        # Files of different sizes aren’t hashed.
+        _file_digest.assert_not_called()
+        if testcase == "changed-target":
+            assert target_stat.st_ino != orig_target_stat.st_ino
+
+    assert stat.S_IMODE(target_stat.st_mode) == 0o640
+    assert "## START: Generated by rpmautospec" in target.read_text()
+    assert [path.name for path in target_dir.iterdir()] == ["processed.spec"]
+
+
+def test_do_process_distgit_write_symlink(repo, specfile, tmp_path):
+    real_dir = tmp_path / "real"
+    real_dir.mkdir()
+    real_target = real_dir / "processed.spec"
+    real_target.write_text("")
+    real_target.chmod(0o640)
+
+    link_dir = tmp_path / "link"
+    link_dir.mkdir()
+    target = link_dir / "processed.spec"
+    target.symlink_to(real_target)
+
+    process_distgit.do_process_distgit(repo.workdir, target, enable_caching=False)
+
+    # The link is kept, the file it points to is written.
+    assert target.is_symlink()
+    assert target.resolve() == real_target
+    assert "## START: Generated by rpmautospec" in real_target.read_text()
+    assert stat.S_IMODE(real_target.stat().st_mode) == 0o640
+    assert [path.name for path in real_dir.iterdir()] == ["processed.spec"]
+    assert [path.name for path in link_dir.iterdir()] == ["processed.spec"]
+
+
+@pytest.mark.parametrize("testcase", ("hard-link", "dir-not-writable", "special-file"))
+def test_do_process_distgit_write_in_place(testcase, repo, specfile, tmp_path):
+    target_dir = tmp_path / "target"
+    target_dir.mkdir()
+    target = target_dir / "processed.spec"
+    access = os.access
+
+    if testcase == "special-file":
+        read_fd, write_fd = os.pipe()
+        target = Path(f"/dev/fd/{write_fd}")
+    else:
+        target.write_text("")
+        target.chmod(0o604)
+        orig_target_stat = target.stat()
+        if testcase == "hard-link":
+            os.link(target, target_dir / "other.spec")
+
+    def access_dir_not_writable(path, mode, *args, **kwargs):
+        if testcase == "dir-not-writable" and Path(path) == target_dir:
+            return False
+        return access(path, mode, *args, **kwargs)
+
+    try:
+        with mock.patch.object(process_distgit.os, "access", wraps=access_dir_not_writable):
+            process_distgit.do_process_distgit(repo.workdir, target, enable_caching=False)
+    finally:
+        if testcase == "special-file":
+            os.close(write_fd)
+
+    if testcase == "special-file":
+        with os.fdopen(read_fd, encoding="utf-8") as fp:
+            assert "## START: Generated by rpmautospec" in fp.read()
+        return
+
+    # The target is written in place, not replaced.
+    target_stat = target.stat()
+    assert target_stat.st_ino == orig_target_stat.st_ino
+    assert stat.S_IMODE(target_stat.st_mode) == 0o604
+    assert "## START: Generated by rpmautospec" in target.read_text()
+
+    if testcase == "hard-link":
+        assert (target_dir / "other.spec").read_text() == target.read_text()
+        assert sorted(path.name for path in target_dir.iterdir()) == [
+            "other.spec",
+            "processed.spec",
+        ]
+    else:
+        assert [path.name for path in target_dir.iterdir()] == ["processed.spec"]
+
+
+def test_do_process_distgit_write_failure(repo, specfile):
+    orig_content = specfile.read_text()
+
+    with (
+        mock.patch.object(process_distgit.os, "replace", side_effect=OSError("BOOP")),
+        pytest.raises(OSError, match="BOOP"),
+    ):
+        process_distgit.do_process_distgit(repo.workdir, enable_caching=False)
+
+    assert specfile.read_text() == orig_content
+    assert not [path for path in specfile.parent.iterdir() if path.name.startswith(".test.spec")]
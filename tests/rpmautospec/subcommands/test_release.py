@@ -83,5 +83,8 @@ class TestRelease:
 
             assert result is retval_sentinel
             do_calculate_release.assert_called_once_with(
-                "some.spec", complete_release=False, error_on_unparseable_spec=True
+                "some.spec",
+                complete_release=False,
+                error_on_unparseable_spec=True,
+                history_seed=None,
             )
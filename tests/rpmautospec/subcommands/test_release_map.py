@@ -0,0 +1,182 @@
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from rpmautospec.exc import HistorySeedError, SpecParseFailure
+from rpmautospec.specparser import SpecParserError
+from rpmautospec.subcommands import changelog, process_distgit, release, release_map
+
+
+class TestReleaseMap:
+    """Test the rpmautospec.subcommands.release_map module"""
+
+    def test_read_and_format_release_map(self):
+        entries = [
+            {
+                "commit-id": "abc",
+                "epoch-version": "1.0",
+                "release-number": 1,
+                "release-complete": "1",
+            },
+            {
+                "commit-id": "def",
+                "epoch-version": "1.0",
+                "release-number": 2,
+                "release-complete": "2",
+            },
+        ]
+
+        lines = [release_map.format_release_map_entry(entry) + "\n" for entry in entries]
+        assert lines[0] == (
+            '{"commit-id":"abc","epoch-version":"1.0","release-number":1,"release-complete":"1"}\n'
+        )
+
+        assert release_map.read_release_map(lines + ["\n"]) == {
+            entry["commit-id"]: entry for entry in entries
+        }
+
+    @pytest.mark.parametrize(
+        "line, message",
+        (
+            ("{boo", "Can’t read release map entry in line 2"),
+            ("[1, 2]", "Release map entry in line 2 isn’t an object"),
+            ('{"commit-id": "def"}', "line 2 lacks keys: epoch-version, release-number"),
+        ),
+        ids=("invalid-json", "not-an-object", "missing-keys"),
+    )
+    def test_read_release_map_invalid(self, line, message):
+        lines = [
+            '{"commit-id":"abc","epoch-version":"1.0","release-number":1,"release-complete":"1"}\n',
+            line + "\n",
+        ]
+
+        with pytest.raises(HistorySeedError, match=message):
+            release_map.read_release_map(lines)
+
+    @pytest.mark.parametrize("testcase", ("normal", "changelog", "known-entries", "history-seed"))
+    def test_do_generate_release_map(self, testcase, repo, specfile):
+        changelog = testcase == "changelog"
+        head_commit = repo[repo.head.target]
+        commit_ids = [str(commit.id) for commit in repo.walk(head_commit.id)]
+
+        entries = release_map.do_generate_release_map(specfile, changelog=changelog)
+
+        # Parents come before their children.
+        assert [entry["commit-id"] for entry in entries] == commit_ids[::-1]
+
+        head_entry = entries[-1]
+        assert head_entry["release-number"] == len(commit_ids)
+        assert head_entry["release-complete"] == str(len(commit_ids))
+        assert head_entry["epoch-version"] == "1.0"
+
+        if changelog:
+            assert "- Did something!" in head_entry["changelog"]
+        else:
+            assert "changelog" not in head_entry
+
+        if testcase == "known-entries":
+            known_entries = {entry["commit-id"]: entry for entry in entries[:-1]}
+            assert release_map.do_generate_release_map(specfile, known_entries=known_entries) == [
+                head_entry
+            ]
+        elif testcase == "history-seed":
+            history_seed = {entry["commit-id"]: entry for entry in entries[:-1]}
+            assert release_map.do_generate_release_map(specfile, history_seed=history_seed) == [
+                head_entry
+            ]
+
+    def test_do_generate_release_map_skipped_changelog(self, repo, specfile):
+        head_commit = repo[repo.head.target]
+
+        with mock.patch.object(release_map, "PkgHistoryProcessor") as PkgHistoryProcessor:
+            processor = PkgHistoryProcessor.return_value
+            processor.run.return_value = {
+                head_commit: {
+                    "epoch-version": "1.0",
+                    "release-number": 2,
+                    "release-complete": "2",
+                    "changelog": ({"commit-id": "something else"},),
+                }
+            }
+
+            (entry,) = release_map.do_generate_release_map(specfile, changelog=True)
+
+        assert entry["changelog"] is None
+
+    def test_do_generate_release_map_without_repo(self, specfile):
+        with pytest.raises(ValueError, match="Not a git repository"):
+            release_map.do_generate_release_map(Path(specfile))
+
+    def test_do_generate_release_map_spec_parse_failure(self, specfile):
+        with (
+            mock.patch.object(
+                release_map, "PkgHistoryProcessor", side_effect=SpecParserError("BOO")
+            ),
+            pytest.raises(SpecParseFailure),
+        ):
+            release_map.do_generate_release_map(specfile)
+
+    @pytest.mark.parametrize("testcase", ("normal", "seeded"))
+    def test_do_generate_history_seed(self, testcase, repo, specfile):
+        head_commit = repo[repo.head.target]
+
+        if testcase == "seeded":
+            parent_seed = {
+                "commit-id": str(head_commit.parents[0].id),
+                "epoch-version": "1.0",
+                "release-number": 41,
+                "release-complete": "41",
+                "full-changelog": "* Thu Jan 01 1970 Jane Doe <jane@example.com> - 1.0-41\n- Old",
+            }
+            history_seed = {parent_seed["commit-id"]: parent_seed}
+        else:
+            history_seed = None
+
+        seed = release_map.do_generate_history_seed(specfile, history_seed=history_seed)
+
+        assert seed["commit-id"] == str(head_commit.id)
+        assert seed["epoch-version"] == "1.0"
+        assert "- Did something!" in seed["full-changelog"]
+
+        if testcase == "seeded":
+            assert seed["release-number"] == 42
+            assert seed["release-complete"] == "42"
+            assert seed["full-changelog"].endswith(parent_seed["full-changelog"])
+        else:
+            assert seed["release-number"] == 2
+            assert seed["release-complete"] == "2"
+
+    def test_history_seed_of_head(self, repo, specfile, tmp_path):
+        seed = release_map.do_generate_history_seed(specfile)
+        history_seed = {seed["commit-id"]: seed}
+
+        # The worktree is clean, i.e. the head commit is the seed.
+        assert seed["commit-id"] == str(repo.head.target)
+
+        assert release.do_calculate_release(
+            specfile, history_seed=history_seed
+        ) == release.do_calculate_release(specfile)
+
+        assert changelog.do_generate_changelog(
+            specfile, history_seed=history_seed
+        ) == changelog.do_generate_changelog(specfile)
+
+        seeded_target = tmp_path / "seeded.spec"
+        target = tmp_path / "unseeded.spec"
+        process_distgit.do_process_distgit(specfile, seeded_target, history_seed=history_seed)
+        process_distgit.do_process_distgit(specfile, target)
+        assert seeded_target.read_text() == target.read_text()
+
+    def test_do_generate_history_seed_without_repo(self, specfile):
+        with pytest.raises(ValueError, match="Not a git repository"):
+            release_map.do_generate_history_seed(Path(specfile))
+
+    def test_do_generate_history_seed_spec_parse_failure(self, specfile):
+        with (
+            mock.patch.object(
+                release_map, "PkgHistoryProcessor", side_effect=SpecParserError("BOO")
+            ),
+            pytest.raises(SpecParseFailure),
+        ):
+            release_map.do_generate_history_seed(specfile)
@@ -1,7 +1,9 @@
 import datetime as dt
 import locale
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from textwrap import TextWrapper
 from unittest import mock
 
 import pytest
@@ -30,7 +32,10 @@ def test_TimeLocaleManager(testcase):
         if testcase != "success-immediately":
             expected_calls.append(mock.call(locale.LC_TIME, "C"))
 
-        with changelog.TimeLocaleManager("en_US", "C"):
+        with pytest.deprecated_call():
+            time_locale_manager = changelog.TimeLocaleManager("en_US", "C")
+
+        with time_locale_manager:
             # testing __enter__()
             assert setlocale.call_args_list == expected_calls
             setlocale.reset_mock()
@@ -39,6 +44,31 @@ def test_TimeLocaleManager(testcase):
         setlocale.assert_called_once_with(locale.LC_TIME, "BOO")
 
 
+@pytest.mark.parametrize(
+    "timestamp",
+    # One date in every month, i.e. also on every weekday, and dates with single- and 4-digit years
+    [dt.datetime(2024, month, month * 2, 12, 34, 56) for month in range(1, 13)]
+    + [dt.date(1970, 1, 1), dt.date(9, 1, 1), dt.date(9999, 12, 31)],
+    ids=str,
+)
+def test_format_changelog_date(timestamp):
+    with mock.patch.object(locale, "setlocale") as setlocale:
+        formatted = changelog.format_changelog_date(timestamp)
+
+    setlocale.assert_not_called()
+
+    # The locale fixture sets the C.UTF-8 locale.
+    assert formatted == timestamp.strftime("%a %b %d %Y")
+
+
+def test_format_changelog_date_threads():
+    timestamps = [dt.datetime(1970, 1, 1) + dt.timedelta(days=days) for days in range(0, 20000, 7)]
+    expected = [timestamp.strftime("%a %b %d %Y") for timestamp in timestamps]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(changelog.format_changelog_date, timestamps)) == expected
+
+
 def _read_commitlog_changelog_testdata():
     if not TESTDATA:
         for commitlog_path in sorted(COMMITLOG_CHANGELOG_DIR.glob("commit*.txt")):
@@ -179,3 +209,55 @@ class TestChangelogEntry:
 
         formatted_changelog_entry = changelog_entry.format()
         assert formatted_changelog_entry == expected_changelog_entry.rstrip("\n")
+
+    @pytest.mark.parametrize(
+        "item, fast_path",
+        (
+            pytest.param("Short item", True, id="short"),
+            pytest.param(" ".join(f"word{i}" for i in range(40)), True, id="long"),
+            pytest.param("x" * 73 + " " + "y" * 73 + " z", True, id="words-at-width"),
+            pytest.param("x" * 74, False, id="overlong-word"),
+            pytest.param("", False, id="empty"),
+            pytest.param("Item with trailing space ", False, id="trailing-space"),
+            pytest.param("Item with  double space", False, id="double-space"),
+            pytest.param("Item\twith tab", False, id="tab"),
+            pytest.param("Item with a hyphen-ated word " * 5, False, id="hyphens"),
+            pytest.param("Ünïcödé item " * 10, False, id="non-ascii"),
+        ),
+    )
+    def test_fill_changelog_item(self, item, fast_path):
+        linewrapper = changelog.ChangelogEntry.linewrapper
+        expected = TextWrapper(
+            width=linewrapper.width, subsequent_indent=linewrapper.subsequent_indent
+        ).fill(f"- {item}")
+
+        with mock.patch.object(linewrapper, "fill", wraps=linewrapper.fill) as fill:
+            assert changelog.ChangelogEntry.fill_changelog_item(item) == expected
+
+        if fast_path:
+            fill.assert_not_called()
+        else:
+            fill.assert_called_once_with(f"- {item}")
+
+
+def test_format_changelog():
+    entries = (
+        changelog.ChangelogEntry(
+            {
+                "timestamp": dt.datetime(1970, 1, 2, 0, 0, 0),
+                "authorblurb": "An Author <anauthor@example.com>",
+                "epoch-version": "1.0",
+                "release-complete": "2",
+                "commitlog": "Update",
+            }
+        ),
+        changelog.ChangelogEntry({"data": "* Thu Jan 01 1970 S <s@example.com> - 1.0-1\n- Ü"}),
+        changelog.ChangelogEntry({"data": b"- Bytes \xff"}),
+    )
+
+    assert changelog.format_changelog(entries) == (
+        "* Fri Jan 02 1970 An Author <anauthor@example.com> - 1.0-2\n- Update\n\n"
+        + "* Thu Jan 01 1970 S <s@example.com> - 1.0-1\n- Ü\n\n"
+        + "- Bytes �"
+    )
+    assert changelog.format_changelog(()) == ""
@@ -0,0 +1,336 @@
+import hashlib
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from rpmautospec import commit_graph
+
+from ..common import create_commit
+
+HAS_GIT = shutil.which("git") is not None
+
+
+def oid(n: int) -> bytes:
+    return hashlib.sha1(str(n).encode()).digest()
+
+
+def serialize_commit_graph(entries: dict[bytes, tuple[bytes, tuple[bytes, ...], int]]) -> bytes:
+    """Serialize commits into the commit-graph file format.
+
+    Generation numbers aren’t computed, the field is set to zero which git
+    accepts as “not computed”.
+
+    :param entries: A mapping of raw commit ids to tuples of their raw tree
+        ids, raw parent ids and commit times; it must contain all ancestors
+    :return: The content of the commit-graph file
+    """
+    oids = sorted(entries)
+    positions = {c: pos for pos, c in enumerate(oids)}
+
+    fanout = b"".join(
+        struct.pack(">L", sum(1 for c in oids if c[0] <= byte)) for byte in range(256)
+    )
+
+    commit_data = bytearray()
+    extra_edges = bytearray()
+    for c in oids:
+        tree_id, parents, commit_time = entries[c]
+        parent_positions = [positions[p] for p in parents]
+
+        parent1 = parent_positions[0] if parent_positions else commit_graph.PARENT_NONE
+        if len(parent_positions) > 2:
+            parent2 = commit_graph.PARENT_OCTOPUS | (len(extra_edges) // 4)
+            for pos in parent_positions[1:-1]:
+                extra_edges += struct.pack(">L", pos)
+            extra_edges += struct.pack(">L", commit_graph.EDGE_LAST | parent_positions[-1])
+        elif len(parent_positions) == 2:
+            parent2 = parent_positions[1]
+        else:
+            parent2 = commit_graph.PARENT_NONE
+
+        commit_data += commit_graph.COMMIT_DATA.pack(
+            tree_id, parent1, parent2, (commit_time >> 32) & 0x3, commit_time & 0xFFFFFFFF
+        )
+
+    chunks = [
+        (commit_graph.CHUNK_OID_FANOUT, fanout),
+        (commit_graph.CHUNK_OID_LOOKUP, b"".join(oids)),
+        (commit_graph.CHUNK_COMMIT_DATA, bytes(commit_data)),
+    ]
+    if extra_edges:
+        chunks.append((commit_graph.CHUNK_EXTRA_EDGES, bytes(extra_edges)))
+
+    content = bytearray(
+        commit_graph.HEADER.pack(
+            commit_graph.SIGNATURE,
+            commit_graph.VERSION,
+            commit_graph.HASH_VERSION_SHA1,
+            len(chunks),
+            0,
+        )
+    )
+    offset = commit_graph.HEADER.size + (len(chunks) + 1) * commit_graph.CHUNK_LOOKUP_ENTRY.size
+    for chunk_id, chunk in chunks:
+        content += commit_graph.CHUNK_LOOKUP_ENTRY.pack(chunk_id, offset)
+        offset += len(chunk)
+    content += commit_graph.CHUNK_LOOKUP_ENTRY.pack(b"\0\0\0\0", offset)
+
+    for _, chunk in chunks:
+        content += chunk
+
+    content += hashlib.sha1(content).digest()
+
+    return bytes(content)
+
+
+@pytest.fixture
+def history() -> dict[bytes, tuple[bytes, tuple[bytes, ...], int]]:
+    """A history with a merge and an octopus merge.
+
+    1 - 2 - 3 ------ 5 - 6
+          \\       / /
+           4 ----- /
+            \\     /
+             7 ---
+    """
+    parents = {
+        1: (),
+        2: (1,),
+        3: (2,),
+        4: (2,),
+        7: (4,),
+        5: (3, 4, 7),
+        6: (5,),
+    }
+    return {
+        oid(n): (oid(100 + n), tuple(oid(p) for p in parent_ns), 1_700_000_000 + n)
+        for n, parent_ns in parents.items()
+    }
+
+
+def test_round_trip(history):
+    data = serialize_commit_graph(history)
+
+    assert data[:4] == commit_graph.SIGNATURE
+    assert hashlib.sha1(data[:-20]).digest() == data[-20:]
+
+    graph = commit_graph.CommitGraph([data])
+
+    assert len(graph) == len(history)
+    assert list(graph) == sorted(history)
+    assert oid(1) in graph
+    assert oid(1000) not in graph
+
+    for c, (tree_id, parent_ids, commit_time) in history.items():
+        entry = graph[c]
+        assert entry.tree_id == tree_id
+        assert entry.parent_ids == parent_ids
+        assert entry.commit_time == commit_time
+        assert graph.parent_ids(c) == parent_ids
+
+    with pytest.raises(KeyError):
+        graph[oid(1000)]
+
+
+def test_commit_time_high_bits():
+    commit_time = (1 << 33) + 5
+    data = serialize_commit_graph({oid(1): (oid(101), (), commit_time)})
+
+    graph = commit_graph.CommitGraph([data])
+
+    assert graph[oid(1)].commit_time == commit_time
+
+
+def test_layers(history):
+    base = serialize_commit_graph(history)
+    top = serialize_commit_graph({oid(8): (oid(108), (), 1_700_000_008)})
+
+    graph = commit_graph.CommitGraph([base, top])
+
+    assert len(graph) == len(history) + 1
+    assert list(graph) == sorted(history) + [oid(8)]
+    assert graph[oid(8)].tree_id == oid(108)
+    assert graph.parent_ids(oid(6)) == (oid(5),)
+
+
+@pytest.mark.parametrize(
+    "testcase",
+    (
+        "single-file",
+        "chain",
+        "missing",
+        "too-short",
+        "wrong-signature",
+        "wrong-version",
+        "wrong-hash-version",
+        "missing-chunk",
+        "commit-data-mismatch",
+        "unreadable",
+    ),
+)
+def test_from_git_dir(testcase, history, tmp_path):
+    info_dir = tmp_path / "objects" / "info"
+    info_dir.mkdir(parents=True)
+
+    data = serialize_commit_graph(history)
+    header = bytearray(data[: commit_graph.HEADER.size])
+
+    if testcase == "too-short":
+        data = data[:4]
+    elif testcase == "wrong-signature":
+        data = b"GRPH" + data[4:]
+    elif testcase == "wrong-version":
+        header[4] = 2
+        data = bytes(header) + data[len(header) :]
+    elif testcase == "wrong-hash-version":
+        header[5] = 2
+        data = bytes(header) + data[len(header) :]
+    elif testcase == "missing-chunk":
+        data = data.replace(commit_graph.CHUNK_COMMIT_DATA, b"XXXX", 1)
+    elif testcase == "commit-data-mismatch":
+        data = data.replace(commit_graph.CHUNK_OID_LOOKUP, b"XXXX", 1).replace(
+            commit_graph.CHUNK_OID_FANOUT, commit_graph.CHUNK_OID_LOOKUP, 1
+        )
+
+    if testcase == "chain":
+        graphs_dir = info_dir / "commit-graphs"
+        graphs_dir.mkdir()
+        (graphs_dir / "commit-graph-chain").write_text("abcd\n")
+        (graphs_dir / "graph-abcd.graph").write_bytes(data)
+    elif testcase == "unreadable":
+        (info_dir / "commit-graph").mkdir()
+    elif testcase != "missing":
+        (info_dir / "commit-graph").write_bytes(data)
+
+    graph = commit_graph.CommitGraph.from_git_dir(tmp_path)
+
+    if testcase in ("single-file", "chain"):
+        assert isinstance(graph, commit_graph.CommitGraph)
+        assert set(graph) == set(history)
+    else:
+        assert graph is None
+
+
+def test_git_common_dir(tmp_path):
+    assert commit_graph.git_common_dir(tmp_path) == tmp_path
+
+    worktree_git_dir = tmp_path / "worktrees" / "foo"
+    worktree_git_dir.mkdir(parents=True)
+    (worktree_git_dir / "commondir").write_text("../..\n")
+
+    assert commit_graph.git_common_dir(worktree_git_dir) == tmp_path.resolve()
+
+
+@pytest.mark.parametrize(
+    "testcase",
+    (
+        "compatible",
+        "compatible-packed-refs",
+        "compatible-empty-replace-dir",
+        "shallow",
+        "grafts",
+        "replace-ref",
+        "replace-ref-packed",
+    ),
+)
+def test_commit_graph_incompatibility(testcase, history, tmp_path):
+    info_dir = tmp_path / "objects" / "info"
+    info_dir.mkdir(parents=True)
+    (info_dir / "commit-graph").write_bytes(serialize_commit_graph(history))
+
+    replace_dir = tmp_path / "refs" / "replace"
+    packed_refs = f"{oid(1).hex()} refs/heads/main\n"
+
+    if testcase == "compatible-packed-refs":
+        (tmp_path / "packed-refs").write_text(packed_refs)
+    elif testcase == "compatible-empty-replace-dir":
+        replace_dir.mkdir(parents=True)
+    elif testcase == "shallow":
+        (tmp_path / "shallow").write_text(f"{oid(2).hex()}\n")
+    elif testcase == "grafts":
+        (tmp_path / "info").mkdir()
+        (tmp_path / "info" / "grafts").write_text(f"{oid(2).hex()}\n")
+    elif testcase == "replace-ref":
+        replace_dir.mkdir(parents=True)
+        (replace_dir / oid(2).hex()).write_text(f"{oid(3).hex()}\n")
+    elif testcase == "replace-ref-packed":
+        (tmp_path / "packed-refs").write_text(
+            packed_refs + f"{oid(3).hex()} refs/replace/{oid(2).hex()}\n"
+        )
+
+    reason = commit_graph.commit_graph_incompatibility(tmp_path)
+    graph = commit_graph.CommitGraph.from_git_dir(tmp_path)
+
+    if testcase.startswith("compatible"):
+        assert reason is None
+        assert graph is not None
+    else:
+        assert reason
+        # Parents in the commit-graph might be wrong, don’t use it.
+        assert graph is None
+
+
+@pytest.mark.skipif(not HAS_GIT, reason="git is not available")
+class TestGitWrittenCommitGraph:
+    @pytest.fixture
+    def merge_repo(self, repo, specfile, specfile_content):
+        head_commit = repo[repo.head.target]
+
+        specfile.write_text(specfile_content + "\n\n")
+        branch_commit = create_commit(
+            repo, reference_name=None, message="Branch", parents=[head_commit.id]
+        )["commit"]
+
+        # Merge the branch as second parent, its own parent is then reachable on two paths.
+        create_commit(
+            repo,
+            message="Merge",
+            tree_id=head_commit.tree.id,
+            parents=[head_commit.id, branch_commit.id],
+        )
+
+        return repo
+
+    @staticmethod
+    def git_commit_graph_write(git_dir: str, *args: str) -> None:
+        subprocess.run(
+            ["git", "--git-dir", git_dir, "commit-graph", "write", "--reachable", *args],
+            check=True,
+            capture_output=True,
+        )
+
+    @pytest.mark.parametrize("split", (False, True), ids=("single-file", "split"))
+    def test_read(self, split, merge_repo):
+        repo = merge_repo
+        head_commit = repo[repo.head.target]
+        walked = {c.id.raw: c for c in repo.walk(head_commit.id)}
+
+        self.git_commit_graph_write(repo.path, *(("--split",) if split else ()))
+
+        graph = commit_graph.CommitGraph.from_git_dir(repo.path)
+
+        assert set(graph) == set(walked)
+        for c, commit in walked.items():
+            entry = graph[c]
+            assert entry.tree_id == commit.tree_id.raw
+            assert entry.parent_ids == tuple(p.raw for p in commit.parent_ids)
+            assert entry.commit_time == commit.commit_time
+
+    def test_linked_worktree(self, repo, tmp_path):
+        worktree_path = tmp_path / "worktree"
+        subprocess.run(
+            ["git", "--git-dir", repo.path, "worktree", "add", "--detach", str(worktree_path)],
+            check=True,
+            capture_output=True,
+        )
+        worktree_repo = type(repo)(str(worktree_path))
+        assert Path(worktree_repo.path).resolve() != Path(repo.path).resolve()
+
+        self.git_commit_graph_write(worktree_repo.path)
+
+        # The commit-graph belongs with the objects shared by all worktrees.
+        assert (Path(repo.path) / "objects" / "info" / "commit-graph").exists()
+        assert repo.head.target.raw in commit_graph.CommitGraph.from_git_dir(worktree_repo.path)
@@ -1,5 +1,7 @@
 from unittest import mock
 
+import pytest
+
 from rpmautospec import compat
 
 
@@ -8,3 +10,68 @@ def test_minimal_blob_io():
     blob = mock.Mock(data=test_data)
     with compat.MinimalBlobIO(blob) as f:
         assert f.read() == test_data
+
+
+@pytest.mark.parametrize("uses_minigit2", (False, True), ids=("pygit2", "minigit2"))
+def test_blob_memoryview(uses_minigit2: bool) -> None:
+    test_data = b"Hello"
+    blob = mock.Mock()
+    blob.memoryview.return_value = memoryview(test_data)
+
+    with (
+        mock.patch.object(compat, "uses_minigit2", new=uses_minigit2),
+        mock.patch.object(compat, "memoryview", create=True) as memoryview_builtin,
+    ):
+        memoryview_builtin.return_value = memoryview(test_data)
+        view = compat.blob_memoryview(blob)
+
+    assert view == test_data
+    if uses_minigit2:
+        blob.memoryview.assert_called_once_with()
+        memoryview_builtin.assert_not_called()
+    else:
+        memoryview_builtin.assert_called_once_with(blob)
+
+
+@pytest.mark.parametrize("uses_minigit2", (False, True), ids=("pygit2", "minigit2"))
+def test_oid_from_hex(uses_minigit2: bool) -> None:
+    with (
+        mock.patch.object(compat, "uses_minigit2", new=uses_minigit2),
+        mock.patch.object(compat, "pygit2") as pygit2,
+    ):
+        oid = compat.oid_from_hex("0123abcd")
+
+    if uses_minigit2:
+        assert oid is pygit2.Oid._from_oid.return_value
+        pygit2.Oid._from_oid.assert_called_once_with("0123abcd")
+    else:
+        assert oid is pygit2.Oid.return_value
+        pygit2.Oid.assert_called_once_with(hex="0123abcd")
+
+
+@pytest.mark.parametrize("uses_minigit2", (False, True), ids=("pygit2", "minigit2"))
+@pytest.mark.parametrize("exists", (True, False), ids=("exists", "missing"))
+def test_tree_entry_id(exists: bool, uses_minigit2: bool) -> None:
+    tree = mock.MagicMock()
+    if exists:
+        tree.entry_id.return_value = (mock.sentinel.oid, mock.sentinel.filemode)
+        tree.__getitem__.return_value = mock.Mock(
+            id=mock.sentinel.oid, filemode=mock.sentinel.filemode
+        )
+    else:
+        tree.entry_id.side_effect = tree.__getitem__.side_effect = KeyError("path")
+
+    with mock.patch.object(compat, "uses_minigit2", new=uses_minigit2):
+        result = compat.tree_entry_id(tree, "path")
+
+    if exists:
+        assert result == (mock.sentinel.oid, mock.sentinel.filemode)
+    else:
+        assert result is None
+
+    if uses_minigit2:
+        tree.entry_id.assert_called_once_with("path")
+        tree.__getitem__.assert_not_called()
+    else:
+        tree.__getitem__.assert_called_once_with("path")
+        tree.entry_id.assert_not_called()
@@ -0,0 +1,28 @@
+import pytest
+
+import rpmautospec
+from rpmautospec.subcommands import process_distgit, release
+from rpmautospec.version import __version__
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    (
+        ("__version__", __version__),
+        ("process_distgit", process_distgit.do_process_distgit),
+        ("calculate_release", release.do_calculate_release),
+        ("calculate_release_number", release.do_calculate_release_number),
+    ),
+)
+def test___getattr__(name, expected):
+    assert getattr(rpmautospec, name) is expected
+    assert name in vars(rpmautospec)
+
+
+def test___getattr___unknown():
+    with pytest.raises(AttributeError, match="has no attribute 'foo'"):
+        rpmautospec.foo
+
+
+def test___dir__():
+    assert {"__version__", "specfile_uses_rpmautospec", "process_distgit"} <= set(dir(rpmautospec))
@@ -1,7 +1,12 @@
 import datetime as dt
+import gc
+import operator
 import os
 import re
+import shutil
 import stat
+import subprocess
+import weakref
 from calendar import LocaleTextCalendar
 from contextlib import nullcontext
 from pathlib import Path
@@ -10,9 +15,12 @@ from unittest import mock
 
 import pytest
 
-from rpmautospec import pkg_history
+from rpmautospec import compat, pkg_history
+from rpmautospec._wrappers import minigit2
 from rpmautospec.compat import pygit2, rpm
+from rpmautospec.exc import HistorySeedError
 from rpmautospec.specparser import SpecParserError
+from rpmautospec.subcommands.changelog import collate_changelog
 
 from ..common import SPEC_FILE_TEMPLATE, create_commit
 
@@ -55,6 +63,63 @@ def test__checkout_tree_files(repopath, specfile, repo, tmp_path):
     assert symlink_dst.resolve() == specfile_dst
 
 
+def test_commit_result():
+    result = pkg_history.CommitResult({"release-number": 5})
+
+    assert not hasattr(result, "__dict__")
+    assert result.release_number == 5
+    assert result["release-number"] == 5
+    assert "epoch-version" not in result
+    assert result.get("epoch-version") is None
+    with pytest.raises(KeyError):
+        result["epoch-version"]
+    with pytest.raises(KeyError):
+        result["sources-changes"]
+
+    result["epoch-version"] = "1.0"
+    result["sources-changes"] = 2
+    assert result.epoch_version == "1.0"
+    assert list(result) == ["epoch-version", "release-number", "sources-changes"]
+    assert len(result) == 3
+    assert result == {"release-number": 5, "epoch-version": "1.0", "sources-changes": 2}
+    assert repr(result) == (
+        "CommitResult({'epoch-version': '1.0', 'release-number': 5, 'sources-changes': 2})"
+    )
+
+    merged = result | {"release-number": 6}
+    assert isinstance(merged, pkg_history.CommitResult)
+    assert merged["release-number"] == 6
+    assert result["release-number"] == 5
+    assert result.__or__(None) is NotImplemented
+
+    result |= {"release-complete": "5"}
+    assert result.release_complete == "5"
+
+    del result["epoch-version"]
+    del result["sources-changes"]
+    assert result == {"release-number": 5, "release-complete": "5"}
+    for key in ("epoch-version", "sources-changes", "changelog"):
+        with pytest.raises(KeyError):
+            del result[key]
+
+    verflags = pkg_history.RPMVerFlags({"error": "specfile-missing", "boo": 1, "bah": 2})
+    assert verflags == {"error": "specfile-missing", "boo": 1, "bah": 2}
+    with pytest.raises(KeyError):
+        del pkg_history.RPMVerFlags()["boo"]
+    assert verflags.copy() == verflags
+    assert verflags.copy() is not verflags
+
+    result.verflags = verflags
+    as_dict = result.to_dict()
+    assert type(as_dict) is dict
+    assert type(as_dict["verflags"]) is dict
+    assert as_dict == {
+        "release-number": 5,
+        "release-complete": "5",
+        "verflags": {"error": "specfile-missing", "boo": 1, "bah": 2},
+    }
+
+
 @pytest.fixture
 def processor(request: pytest.FixtureRequest, repo):
     specfile_parser = None
@@ -240,6 +305,29 @@ class TestPkgHistoryProcessor:
         else:
             assert processor.repo
 
+    @pytest.mark.parametrize("enable_caching", (False, True), ids=("no-caching", "caching"))
+    def test___init___enable_caching(self, enable_caching, specfile):
+        with mock.patch.object(pkg_history, "AutoSpecParser") as AutoSpecParser:
+            processor = pkg_history.PkgHistoryProcessor(specfile, enable_caching=enable_caching)
+
+        AutoSpecParser.assert_called_once_with(enable_caching=enable_caching)
+        assert processor.specparser is AutoSpecParser.return_value
+        assert processor.enable_caching is enable_caching
+
+    @pytest.mark.parametrize("enable_caching", (True, False), ids=("caching", "no-caching"))
+    def test__get_rpmverflags_enable_caching(self, enable_caching, specfile):
+        processor = pkg_history.PkgHistoryProcessor(specfile, enable_caching=enable_caching)
+
+        with (
+            mock.patch.object(processor.specparser, "query", side_effect=SpecParserError("BOO")),
+            mock.patch.object(
+                pkg_history, "scan_specfile", wraps=pkg_history.scan_specfile
+            ) as scan_specfile,
+        ):
+            processor._get_rpmverflags(specfile.parent, specfile.stem, log_error=False)
+
+        scan_specfile.assert_called_once_with(specfile, enable_caching=enable_caching)
+
     @pytest.mark.parametrize(
         "with_exception", (False, True), ids=("without-exception", "with-exception")
     )
@@ -387,14 +475,18 @@ class TestPkgHistoryProcessor:
             assert result["epoch-version"] == "1.0"
 
             if not needs_full_repo:
-                _get_rpmverflags.assert_called_once_with(mock.ANY, processor.name, log_error=False)
+                _get_rpmverflags.assert_called_once_with(
+                    mock.ANY, processor.name, log_error=False, spec_scan=mock.ANY
+                )
                 _checkout_tree_files.assert_not_called()
             else:
                 calls_in_order.assert_has_calls(
                     (
-                        mock.call._get_rpmverflags(mock.ANY, processor.name, log_error=False),
+                        mock.call._get_rpmverflags(
+                            mock.ANY, processor.name, log_error=False, spec_scan=mock.ANY
+                        ),
                         mock.call._checkout_tree_files(head_commit, head_commit.tree, mock.ANY),
-                        mock.call._get_rpmverflags(mock.ANY, processor.name),
+                        mock.call._get_rpmverflags(mock.ANY, processor.name, spec_scan=mock.ANY),
                     )
                 )
 
@@ -412,11 +504,13 @@ class TestPkgHistoryProcessor:
 
             if testcase == "needs-full-repo":
                 assert _get_rpmverflags.call_args_list == [
-                    mock.call(mock.ANY, processor.name, log_error=False),
-                    mock.call(mock.ANY, processor.name),
+                    mock.call(mock.ANY, processor.name, log_error=False, spec_scan=mock.ANY),
+                    mock.call(mock.ANY, processor.name, spec_scan=mock.ANY),
                 ]
             else:
-                _get_rpmverflags.assert_called_once_with(mock.ANY, processor.name, log_error=False)
+                _get_rpmverflags.assert_called_once_with(
+                    mock.ANY, processor.name, log_error=False, spec_scan=mock.ANY
+                )
 
             # Check that value is cached
 
@@ -426,6 +520,59 @@ class TestPkgHistoryProcessor:
 
             _get_rpmverflags.assert_not_called()
 
+    @pytest.mark.parametrize(
+        "testcase", ("same-spec", "same-tree-needs-full-repo", "other-tree-needs-full-repo")
+    )
+    def test__get_rpmverflags_for_commit_shared(self, testcase, specfile, repo, processor):
+        parent_commit = repo[repo.head.target]
+        needs_full_repo = "needs-full-repo" in testcase
+
+        if "same-tree" in testcase:
+            head_commit = create_commit(
+                repo, tree_id=parent_commit.tree.id, message="Nothing changed"
+            )["commit"]
+        else:
+            (specfile.parent / "sources").write_text("Something else changed.\n")
+            head_commit = create_commit(repo, message="Add sources")["commit"]
+
+        assert head_commit.tree[specfile.name].id == parent_commit.tree[specfile.name].id
+
+        with mock.patch.object(
+            processor, "_get_rpmverflags", wraps=processor._get_rpmverflags
+        ) as _get_rpmverflags:
+            if needs_full_repo:
+                _get_rpmverflags.side_effect = [{"error": "specfile-parse-error"}, mock.DEFAULT] * 2
+
+            parent_result = processor._get_rpmverflags_for_commit(parent_commit)
+            _get_rpmverflags.reset_mock()
+            result = processor._get_rpmverflags_for_commit(head_commit)
+
+        if testcase == "other-tree-needs-full-repo":
+            # Other files could have changed what the spec file includes.
+            assert _get_rpmverflags.call_count == 2
+            assert result == parent_result
+        else:
+            _get_rpmverflags.assert_not_called()
+            assert result is parent_result
+
+    def test__get_commit_facts(self, specfile, repo, processor):
+        head_commit = repo[repo.head.target]
+
+        facts = processor._get_commit_facts(head_commit)
+
+        assert facts.parent_ids == tuple(head_commit.parent_ids)
+        assert facts.tree_id == head_commit.tree.id
+        assert facts.spec_ids == {processor.name: head_commit.tree[specfile.name].id}
+        assert facts.changelog_id is None
+        assert facts.message == head_commit.message
+        assert facts.authorblurb == f"{head_commit.author.name} <{head_commit.author.email}>"
+        assert facts.timestamp == dt.datetime.fromtimestamp(
+            head_commit.commit_time, dt.timezone.utc
+        )
+
+        # Check that facts are cached
+        assert processor._get_commit_facts(head_commit) is facts
+
     @pytest.mark.parametrize("testcase", ("normal", "key-error"))
     def test__merge_info(self, testcase, processor):
         f1 = {"child_must_continue": False, "changelog_removed": False}
@@ -443,6 +590,87 @@ class TestPkgHistoryProcessor:
                 "changelog_removed": False,
             }
 
+    def test_register_info_key(self, repo):
+        class Processor(pkg_history.PkgHistoryProcessor):
+            pass
+
+        Processor.register_info_key("boo", max)
+        # Registering the same semantics again is fine.
+        Processor.register_info_key("boo", max)
+
+        with pytest.raises(ValueError, match="other merge semantics: boo"):
+            Processor.register_info_key("boo", min)
+
+        with pytest.raises(ValueError, match="other merge semantics: child_must_continue"):
+            Processor.register_info_key("child_must_continue", max)
+
+        processor = Processor(repo.workdir)
+        assert processor._merge_info({"child_must_continue": False, "boo": 1}, {"boo": 5}) == {
+            "child_must_continue": False,
+            "boo": 5,
+        }
+
+        # The registration doesn’t leak into the base class.
+        assert "boo" not in pkg_history.PkgHistoryProcessor.info_merge_registry
+
+    def test_get_visitor(self, processor):
+        assert processor.get_visitor("release-number") == processor.release_number_visitor
+        assert processor.get_visitor("changelog") == processor.changelog_visitor
+        assert processor.get_visitor("complete-history") == processor.complete_history_visitor
+
+        with pytest.raises(ValueError, match="Unknown visitor: boo"):
+            processor.get_visitor("boo")
+
+    def test_register_visitor(self, specfile, specfile_content, repo, processor):
+        sources = specfile.parent / "sources"
+        sources.write_text("SHA512 (boo-1.0.tar.gz) = 123\n")
+        create_commit(repo, message="Upload sources")
+        specfile.write_text(specfile_content + "\n")
+        create_commit(repo, message="Rebuild\n\n[bump release: 10]")
+
+        class Processor(pkg_history.PkgHistoryProcessor):
+            pass
+
+        @Processor.register_visitor("sources-changes", info_merge={"sources_seen": operator.or_})
+        def sources_changes_visitor(self, commit, child_info):
+            sources_id = commit.tree["sources"].id if "sources" in commit.tree else None
+            parent_sources_ids = [
+                parent.tree["sources"].id if "sources" in parent.tree else None
+                for parent in commit.parents
+            ]
+            sources_changed = sources_id not in parent_sources_ids if commit.parents else True
+            commit_result, parent_results = yield {
+                "child_must_continue": True,
+                "sources_seen": child_info.get("sources_seen", False) or sources_changed,
+            }
+            commit_result["sources-changes"] = sum(
+                (res.get("sources-changes", 0) for res in parent_results), int(sources_changed)
+            )
+            yield commit_result
+
+        with pytest.raises(ValueError, match="registered already: sources-changes"):
+            Processor.register_visitor("sources-changes")(lambda: None)
+
+        # The registrations don’t leak into the base class.
+        assert "sources-changes" not in pkg_history.PkgHistoryProcessor.visitor_registry
+        assert "sources_seen" not in pkg_history.PkgHistoryProcessor.info_merge_registry
+        with pytest.raises(ValueError, match="Unknown visitor: sources-changes"):
+            processor.get_visitor("sources-changes")
+
+        processor = Processor(repo.workdir)
+        processor.repo = repo
+
+        with mock.patch.object(
+            processor, "_get_history_topology", wraps=processor._get_history_topology
+        ) as _get_history_topology:
+            result = processor.run(visitors=["release-number", "sources-changes"])
+
+        _get_history_topology.assert_called_once()
+
+        # The custom visitor ran in the same traversal as the built-in one.
+        assert result["release-number"] == 10
+        assert result["sources-changes"] == 2
+
     @pytest.mark.parametrize(
         "testcase",
         (
@@ -452,6 +680,7 @@ class TestPkgHistoryProcessor:
             "locale-set",
             "without-repo",
             "with-merge",
+            "with-merge-commit-graph",
             "missing-specfile",
             "missing-specfile-missing-default-signature",
             "dirty",
@@ -460,6 +689,9 @@ class TestPkgHistoryProcessor:
     )
     @pytest.mark.repo_config(converted=True)
     def test_run(self, testcase, specfile, specfile_content, repo, processor, locale):
+        if "commit-graph" in testcase and not shutil.which("git"):
+            pytest.skip("git is not available")
+
         if testcase == "locale-set":
             locale.setlocale(locale.LC_ALL, "de_DE.UTF-8")
 
@@ -470,6 +702,8 @@ class TestPkgHistoryProcessor:
         if "without-repo" in testcase:
             rmtree(repo.path)
             processor = pkg_history.PkgHistoryProcessor(repo.workdir)
+            assert processor.commit_graph is None
+            assert processor.shallow_commits == frozenset()
             head_commit = None
         else:
             head_commit = repo[repo.head.target]
@@ -488,6 +722,14 @@ class TestPkgHistoryProcessor:
             )
             head_commit = result["commit"]
 
+            if "commit-graph" in testcase:
+                # The merge commit below won’t be in the commit-graph.
+                subprocess.run(
+                    ["git", "--git-dir", repo.path, "commit-graph", "write", "--reachable"],
+                    check=True,
+                    capture_output=True,
+                )
+
             # … and then revert by a merge using the previous tree. Seriously.
             parent_commit = head_commit.parents[0]
             result = create_commit(
@@ -502,6 +744,11 @@ class TestPkgHistoryProcessor:
             head_commit = result["commit"]
             expected_release += 2
 
+            if "commit-graph" in testcase:
+                assert processor.commit_graph
+            else:
+                assert processor.commit_graph is None
+
         if "missing-specfile" in testcase:
             specfile.unlink()
 
@@ -537,6 +784,10 @@ class TestPkgHistoryProcessor:
         else:
             assert all(isinstance(key, str) for key in res)
 
+        # Records used internally aren’t handed out.
+        assert type(res) is dict
+        assert type(res["verflags"]) is dict
+
         if "missing-specfile" in testcase:
             assert res["epoch-version"] is None
             assert not res["changelog"]
@@ -598,6 +849,487 @@ class TestPkgHistoryProcessor:
         assert verflags["prerelease"] is None
         assert verflags["snapinfo"] is None
 
+    @pytest.mark.parametrize("testcase", ("known-ancestors", "known-head"))
+    def test_run_known_results(self, testcase, specfile, specfile_content, repo, processor):
+        fork_commit = repo[repo.head.target]
+
+        specfile.write_text(specfile_content + "\n\n")
+        side_commit = create_commit(
+            repo, reference_name=None, message="Side", parents=[fork_commit.id]
+        )["commit"]
+        specfile.write_text(specfile_content + "\n")
+        main_commit = create_commit(repo, message="Main")["commit"]
+        merge_commit = create_commit(
+            repo, message="Merge", parents=[main_commit.id, side_commit.id]
+        )["commit"]
+
+        visitors = [processor.complete_history_visitor, processor.release_number_visitor]
+        head = str(merge_commit.id)
+
+        full_results = processor.run(head, visitors=visitors, all_results=True)
+
+        # The complete history is processed.
+        assert {commit.id for commit in full_results} == {
+            commit.id for commit in repo.walk(merge_commit.id)
+        }
+
+        full_results = {str(commit.id): result for commit, result in full_results.items()}
+
+        if testcase == "known-head":
+            known_results = full_results
+        else:
+            known_results = {
+                commit_id: result
+                for commit_id, result in full_results.items()
+                if commit_id not in (str(main_commit.id), head)
+            }
+
+        results = processor.run(
+            head, visitors=visitors, all_results=True, known_results=known_results
+        )
+
+        if testcase == "known-head":
+            assert results == {}
+        else:
+            assert {str(commit.id) for commit in results} == {str(main_commit.id), head}
+            for commit, result in results.items():
+                assert result["release-number"] == full_results[str(commit.id)]["release-number"]
+
+        head_result = processor.run(head, visitors=visitors, known_results=known_results)
+        assert head_result["release-number"] == full_results[head]["release-number"]
+
+    def test_run_merge_heavy_history(self, specfile, specfile_content, repo, processor):
+        # Criss-cross merges of two branches
+        main_tip = side_tip = repo.head.target
+        for idx in range(5):
+            specfile.write_text(specfile_content + "\n" * (idx + 1))
+            new_main_tip = create_commit(
+                repo, reference_name=None, message=f"Main {idx}", parents=[main_tip, side_tip]
+            )["oid"]
+            side_tip = create_commit(
+                repo, reference_name=None, message=f"Side {idx}", parents=[side_tip, main_tip]
+            )["oid"]
+            main_tip = new_main_tip
+        head = create_commit(
+            repo, reference_name=None, message="Merge", parents=[main_tip, side_tip]
+        )["commit"]
+
+        visited = []
+
+        def visitor(commit, child_info):
+            commit_result, parent_results = yield {"child_must_continue": True}
+            visited.append(commit.id)
+            # Parents are processed before their children.
+            assert all(result["commit-id"] in visited for result in parent_results)
+            yield commit_result
+
+        results = processor.run(head, visitors=[visitor], all_results=True)
+
+        # Every commit is processed exactly once.
+        assert len(visited) == len(set(visited))
+        assert set(visited) == {commit.id for commit in repo.walk(head.id)}
+        assert [commit.id for commit in results] == visited
+
+    @pytest.mark.parametrize("all_results", (False, True), ids=("head-result", "all-results"))
+    def test_run_releases_results(self, all_results, specfile, specfile_content, repo, processor):
+        for idx in range(10):
+            specfile.write_text(specfile_content + "\n" * (idx + 1))
+            create_commit(repo, message=f"Change {idx}")
+        head = repo[repo.head.target]
+
+        class Marker:
+            pass
+
+        markers = []
+        alive_counts = []
+
+        def visitor(commit, child_info):
+            commit_result, parent_results = yield {"child_must_continue": True}
+            marker = Marker()
+            commit_result["marker"] = marker
+            markers.append(weakref.ref(marker))
+            alive_counts.append(sum(ref() is not None for ref in markers))
+            yield commit_result
+
+        results = processor.run(head, visitors=[visitor], all_results=all_results)
+        num_commits = len(list(repo.walk(head.id)))
+
+        if all_results:
+            assert len(results) == num_commits
+            assert alive_counts == list(range(1, num_commits + 1))
+        else:
+            # The results of a commit are released once its child has consumed them.
+            assert results["marker"] is markers[-1]()
+            assert max(alive_counts) == 2
+            assert sum(ref() is not None for ref in markers) == 1
+            assert not processor._commit_facts
+
+    @pytest.mark.parametrize("all_results", (False, True), ids=("head-result", "all-results"))
+    def test_run_releases_commit_state(self, all_results, specfile, specfile_content, repo):
+        extras_specfile = specfile.parent / "test-extras.spec"
+        for idx in range(10):
+            # Older commits are only traversed for the release number because of the update.
+            version = "2.0" if idx >= 5 else "1.0"
+            for path in (specfile, extras_specfile):
+                path.write_text(
+                    specfile_content.replace("Version: 1.0", f"Version: {version}")
+                    + "\n" * (idx + 1)
+                )
+            create_commit(repo, message=f"Change {idx}")
+        head = repo[repo.head.target]
+        num_commits = len(list(repo.walk(head.id)))
+
+        processor = pkg_history.PkgHistoryProcessor(specfile, spec_names=["test-extras"])
+        visitors = {
+            name: (spec_processor.release_number_visitor, spec_processor.changelog_visitor)
+            for name, spec_processor in processor.specs.items()
+        }
+        visitors["test"] = visitors["test"][:1]
+
+        class Info(dict):
+            pass
+
+        infos = []
+        alive_counts = []
+
+        def make_info():
+            info = Info(child_must_continue=True)
+            infos.append(weakref.ref(info))
+            alive_counts.append(sum(ref() is not None for ref in infos))
+            return info
+
+        def visitor(commit, child_info):
+            # Don’t keep a reference to the info in the coroutine.
+            commit_result, parent_results = yield make_info()
+            yield commit_result
+
+        visitors["test"] += (visitor,)
+
+        results = processor.run(head, visitors=visitors, all_results=all_results)
+
+        if all_results:
+            assert len(results) == num_commits
+        else:
+            assert results["test"]["release-number"] == 5
+            assert len(results["test-extras"]["changelog"]) == 10
+
+        # Visitor info of a commit is released once its parents have merged it.
+        assert len(alive_counts) == num_commits
+        assert max(alive_counts) <= 2
+        assert not any(ref() for ref in infos)
+
+        # Facts and spec file information are only kept if all results are retained.
+        spec_processors = processor.specs.values()
+        if all_results:
+            assert len(processor._commit_facts) == num_commits
+            assert all(len(p._rpmverflags_for_commits) == num_commits for p in spec_processors)
+        else:
+            assert not processor._commit_facts
+            assert not any(p._rpmverflags_for_commits for p in spec_processors)
+
+    def test_run_releases_commits(self, specfile, specfile_content, repo, processor):
+        for idx in range(10):
+            specfile.write_text(specfile_content + "\n" * (idx + 1))
+            create_commit(repo, message=f"Change {idx}")
+        num_commits = len(list(repo.walk(repo.head.target)))
+
+        # Commit objects of pygit2 can’t be referenced weakly, use minigit2 without interning
+        # objects, so only the processor can keep commits alive.
+        processor.repo = minigit2.Repository(repo.path)
+        processor.repo._object_cache_size = 0
+        head = processor.repo[processor.repo.head.target]
+
+        commit_refs = []
+
+        def visitor(commit, child_info):
+            commit_refs.append(weakref.ref(commit))
+            commit_result, parent_results = yield {"child_must_continue": True}
+            yield commit_result
+
+        with mock.patch.object(compat, "uses_minigit2", True):
+            result = processor.run(
+                head,
+                visitors=[processor.release_number_visitor, processor.changelog_visitor, visitor],
+            )
+
+        assert result["release-number"] == num_commits
+        assert len(commit_refs) == num_commits
+
+        # Only the head commit is still referenced (here), neither by the processor nor through
+        # parents cached in commit objects.
+        gc.collect()
+        assert [ref() for ref in commit_refs if ref()] == [head]
+        assert [
+            obj
+            for obj in gc.get_objects()
+            if isinstance(obj, minigit2.Commit) and obj._repo is processor.repo
+        ] == [head]
+
+    def test_run_several_heads(self, specfile, specfile_content, repo, processor):
+        fork_commit = repo[repo.head.target]
+
+        specfile.write_text(specfile_content + "\n\n")
+        branch_commit = create_commit(
+            repo, reference_name=None, message="Branch", parents=[fork_commit.id]
+        )["commit"]
+        specfile.write_text(specfile_content + "\n")
+        main_commit = create_commit(repo, message="Main")["commit"]
+        specfile.write_text(specfile_content.replace("Version: 1.0", "Version: 2.0"))
+        main_commit = create_commit(repo, message="Update to 2.0")["commit"]
+
+        visitors = ["release-number", "changelog"]
+        # The fork commit is an ancestor of both other heads.
+        heads = [str(main_commit.id), branch_commit, str(fork_commit.id)]
+
+        with mock.patch.object(
+            processor, "_get_history_topology", wraps=processor._get_history_topology
+        ) as _get_history_topology:
+            results = processor.run(heads, visitors=visitors)
+            all_results = processor.run(heads, visitors=visitors, all_results=True)
+
+        # All heads are processed in one traversal of the history each time.
+        assert _get_history_topology.call_count == 2
+        assert list(results) == heads
+        assert {commit.id for commit in all_results} == {
+            commit.id for head in (main_commit, branch_commit) for commit in repo.walk(head.id)
+        }
+
+        for head, result in results.items():
+            single_result = processor.run(head, visitors=visitors)
+            assert result["release-number"] == single_result["release-number"]
+            assert [entry["commit-id"] for entry in result["changelog"]] == [
+                entry["commit-id"] for entry in single_result["changelog"]
+            ]
+
+        fork_release_number = results[str(fork_commit.id)]["release-number"]
+        assert results[str(main_commit.id)]["release-number"] == 1
+        assert results[branch_commit]["release-number"] == fork_release_number + 1
+
+        assert processor.run([], visitors=visitors) == {}
+
+        rmtree(repo.path)
+        processor = pkg_history.PkgHistoryProcessor(repo.workdir)
+        with pytest.raises(ValueError, match="Not a git repository"):
+            processor.run(heads, visitors=visitors)
+
+    @pytest.mark.repo_config(converted=True)
+    def test_run_several_heads_disagreeing(self, specfile, specfile_content, repo, processor):
+        fork_commit = repo[repo.head.target]
+
+        (specfile.parent / "changelog").unlink()
+        branch_commit = create_commit(
+            repo, reference_name=None, message="Remove changelog", parents=[fork_commit.id]
+        )["commit"]
+        repo.checkout_tree(fork_commit.tree, strategy=pygit2.enums.CheckoutStrategy.FORCE)
+        specfile.write_text(specfile_content + "\n")
+        main_commit = create_commit(repo, message="Main")["commit"]
+
+        visitors = ["release-number", "changelog"]
+        # Only the branch removes the changelog, what its history contributes to the changelog
+        # depends on the head.
+        heads = [branch_commit, main_commit]
+
+        with mock.patch.object(
+            processor, "_get_history_topology", wraps=processor._get_history_topology
+        ) as _get_history_topology:
+            results = processor.run(heads, visitors=visitors)
+
+        # The heads are processed separately.
+        assert _get_history_topology.call_count == 3
+
+        for head, result in results.items():
+            single_result = processor.run(head, visitors=visitors)
+            assert result["release-number"] == single_result["release-number"]
+            assert [entry["commit-id"] for entry in result["changelog"]] == [
+                entry["commit-id"] for entry in single_result["changelog"]
+            ]
+
+        # The old changelog is left out for the branch only.
+        assert len(results[branch_commit]["changelog"]) < len(results[main_commit]["changelog"])
+
+    @pytest.mark.parametrize("dirty_worktree", (False, True), ids=("clean", "dirty"))
+    def test_run_several_specs(self, dirty_worktree, specfile, specfile_content, repo):
+        extras_specfile = specfile.parent / "test-extras.spec"
+        extras_specfile.write_text(specfile_content.replace("Version: 1.0", "Version: 2.0"))
+        create_commit(repo, message="Add extras")
+        specfile.write_text(specfile_content + "\n")
+        create_commit(repo, message="Change main spec file")
+        extras_specfile.write_text(specfile_content.replace("Version: 1.0", "Version: 2.1"))
+        create_commit(repo, message="Update extras")
+        if dirty_worktree:
+            specfile.write_text(specfile_content + "\n\n")
+
+        processor = pkg_history.PkgHistoryProcessor(
+            specfile, spec_names=["test-extras", "test", "test-extras"]
+        )
+        assert list(processor.specs) == ["test", "test-extras"]
+        assert processor.specs["test"] is processor
+        extras_processor = processor.specs["test-extras"]
+        assert extras_processor.specfile == extras_specfile
+        assert extras_processor._rpmverflags_for_commits is not processor._rpmverflags_for_commits
+
+        visitors = {
+            name: (spec_processor.release_number_visitor, spec_processor.changelog_visitor)
+            for name, spec_processor in processor.specs.items()
+        }
+
+        with mock.patch.object(
+            processor, "_get_history_topology", wraps=processor._get_history_topology
+        ) as _get_history_topology:
+            results = processor.run(visitors=visitors)
+            all_results = processor.run(visitors=visitors, all_results=True)
+
+        # Both spec files are processed in one traversal of the history.
+        assert _get_history_topology.call_count == 2
+        assert set(results) == {"test", "test-extras"}
+        assert all(set(result) == {"test", "test-extras"} for result in all_results.values())
+        if dirty_worktree:
+            assert {
+                name: result["release-number"] for name, result in all_results[None].items()
+            } == {name: result["release-number"] for name, result in results.items()}
+
+        for name, spec_path in (("test", specfile), ("test-extras", extras_specfile)):
+            single_processor = pkg_history.PkgHistoryProcessor(spec_path)
+            expected = single_processor.run(
+                visitors=(
+                    single_processor.release_number_visitor,
+                    single_processor.changelog_visitor,
+                )
+            )
+            for key in ("epoch-version", "release-number", "release-complete"):
+                assert results[name][key] == expected[key]
+            assert [entry["commit-id"] for entry in results[name]["changelog"]] == [
+                entry["commit-id"] for entry in expected["changelog"]
+            ]
+
+        assert results["test-extras"]["epoch-version"] == "2.1"
+        assert results["test-extras"]["release-number"] == (2 if dirty_worktree else 1)
+
+    @pytest.mark.skipif(not shutil.which("git"), reason="git is not available")
+    @pytest.mark.parametrize(
+        "testcase",
+        (
+            "seeded",
+            "seeded-release-only",
+            "seeded-without-changelog",
+            "seeded-empty-changelog",
+            "too-shallow",
+            "unseeded",
+        ),
+    )
+    def test_run_shallow(self, testcase, tmp_path, specfile, specfile_content, repo, caplog):
+        for i in range(3):
+            specfile.write_text(specfile_content + "\n" * (i + 2))
+            create_commit(repo, message=f"Change #{i}")
+
+        # HEAD~2 is the seed commit
+        processor = pkg_history.PkgHistoryProcessor(specfile)
+        seed_commit = repo[repo.head.target].parents[0].parents[0]
+        seed_commit_id = str(seed_commit.id)
+
+        visitors = [processor.release_number_visitor]
+        if testcase != "seeded-release-only":
+            visitors.append(processor.changelog_visitor)
+
+        full_result = processor.run(visitors=visitors)
+        seed_result = processor.run(seed_commit_id, visitors=visitors)
+        seed = {
+            "commit-id": seed_commit_id,
+            "epoch-version": seed_result["epoch-version"],
+            "release-number": seed_result["release-number"],
+            "release-complete": seed_result["release-complete"],
+        }
+        if testcase not in ("seeded-release-only", "seeded-without-changelog"):
+            if testcase == "seeded-empty-changelog":
+                seed["full-changelog"] = ""
+            else:
+                seed["full-changelog"] = collate_changelog(seed_result)
+
+        # The seed commit is the boundary of the shallow clone, its parents are missing.
+        depth = 2 if "too-shallow" in testcase else 3
+        clone_path = tmp_path / "clone" / "test"
+        subprocess.run(
+            ["git", "clone", "--depth", str(depth), f"file://{repo.workdir}", str(clone_path)],
+            check=True,
+            capture_output=True,
+        )
+
+        shallow_processor = pkg_history.PkgHistoryProcessor(clone_path / specfile.name)
+        assert len(shallow_processor.shallow_commits) == 1
+        shallow_visitors = [getattr(shallow_processor, visitor.__name__) for visitor in visitors]
+
+        if testcase == "unseeded":
+            known_results = None
+        else:
+            known_results = {seed_commit_id: seed}
+
+        if testcase in ("too-shallow", "seeded-without-changelog"):
+            expectation = pytest.raises(HistorySeedError)
+        else:
+            expectation = nullcontext()
+
+        with expectation as excinfo:
+            result = shallow_processor.run(visitors=shallow_visitors, known_results=known_results)
+
+        if testcase == "too-shallow":
+            assert "too shallow" in str(excinfo.value)
+            return
+        elif testcase == "seeded-without-changelog":
+            assert "lacks the full changelog" in str(excinfo.value)
+            return
+
+        if testcase == "unseeded":
+            assert "The clone is too shallow" in caplog.text
+            assert result["release-number"] < full_result["release-number"]
+            return
+
+        assert result["release-number"] == full_result["release-number"]
+        assert result["release-complete"] == full_result["release-complete"]
+
+        if testcase == "seeded":
+            assert collate_changelog(result) == collate_changelog(full_result)
+        elif testcase == "seeded-empty-changelog":
+            assert len(result["changelog"]) == 2
+
+    def test_run_merge_over_seed(self, specfile, specfile_content, repo, processor):
+        visitors = [processor.release_number_visitor, processor.changelog_visitor]
+
+        seed_commit = repo[repo.head.target]
+        seed_commit_id = str(seed_commit.id)
+        seed_result = processor.run(seed_commit_id, visitors=visitors)
+        seed = {
+            "commit-id": seed_commit_id,
+            "epoch-version": seed_result["epoch-version"],
+            "release-number": seed_result["release-number"],
+            "release-complete": seed_result["release-complete"],
+            "full-changelog": collate_changelog(seed_result),
+        }
+
+        # Merge a side branch, keeping the tree of the seed commit, i.e. the changelog follows it.
+        specfile.write_text(specfile_content + "\n")
+        side_commit = create_commit(
+            repo, reference_name=None, message="Side", parents=[seed_commit.id]
+        )["commit"]
+        merge_commit = create_commit(
+            repo,
+            reference_name=None,
+            tree_id=seed_commit.tree.id,
+            message="Merge",
+            parents=[seed_commit.id, side_commit.id],
+        )["commit"]
+
+        full_result = processor.run(merge_commit, visitors=visitors)
+        result = processor.run(
+            merge_commit, visitors=visitors, known_results={seed_commit_id: seed}
+        )
+
+        assert result["release-number"] == full_result["release-number"]
+        assert collate_changelog(result) == collate_changelog(full_result)
+
+        seed_entry = result["changelog"][-1]
+        assert isinstance(seed_entry["commit-id"], type(seed_commit.id))
+        assert seed_entry["commit-id"] == seed_commit.id
+
     @pytest.mark.repo_config(uses_rpmautospec=False, converted=False, add_commit=False)
     def test_run__with_wonky_history(self, repo, processor):
         workdir = Path(repo.workdir)
@@ -0,0 +1,465 @@
+import os
+import pickle
+import stat
+from collections import OrderedDict
+from unittest import mock
+
+import pytest
+
+from rpmautospec import specparser
+
+SPECFILE = """Name: foo
+Epoch: 2
+Version: 1.0
+Release: %autorelease -b 5
+
+%description
+Foo
+"""
+
+
+@pytest.mark.parametrize("parser_type", ("rpm", "norpm"))
+def test_worker_pool_spec_parser(parser_type, tmp_path):
+    if parser_type == "norpm":
+        pytest.importorskip("norpm")
+
+    specpath = tmp_path / "foo.spec"
+    specpath.write_text(SPECFILE)
+    brokenpath = tmp_path / "broken.spec"
+    brokenpath.write_text("Name: broken\n")
+
+    parser = specparser.WorkerPoolSpecParser(parser_type, workers=2, max_parses_per_worker=1)
+    other_parser = specparser.WorkerPoolSpecParser(parser_type, workers=2, max_parses_per_worker=1)
+
+    # Pools are shared.
+    assert parser.pool is other_parser.pool
+
+    # Workers are replaced after each parse, results don’t depend on that.
+    for _ in range(3):
+        assert parser.query(tmp_path, specpath) == ("2:1.0", "E_S_P0_B5")
+
+    with pytest.raises(specparser.SpecParserError):
+        parser.query(tmp_path, brokenpath)
+
+
+def test_worker_pool_spec_parser_invalid_parser_type():
+    with pytest.raises(specparser.SpecParserError, match="Invalid value"):
+        specparser.WorkerPoolSpecParser("illegal", workers=2)
+
+
+@pytest.mark.parametrize(
+    "workers, max_parses", (("", ""), ("0", ""), ("3", ""), ("3", "10")), ids=str
+)
+@mock.patch.dict(os.environ)
+def test_auto_spec_parser_workers(workers, max_parses):
+    os.environ["RPMAUTOSPEC_SPEC_PARSER"] = "rpm"
+    os.environ["RPMAUTOSPEC_SPEC_PARSER_WORKERS"] = workers
+    os.environ["RPMAUTOSPEC_SPEC_PARSER_MAX_PARSES"] = max_parses
+
+    with mock.patch.object(specparser, "_get_worker_pool") as _get_worker_pool:
+        parser = specparser.AutoSpecParser()
+
+    if workers in ("", "0"):
+        _get_worker_pool.assert_not_called()
+        assert isinstance(parser._concrete_parser, specparser.RPMSpecParser)
+    else:
+        _get_worker_pool.assert_called_once_with(
+            "rpm", 3, int(max_parses) if max_parses else specparser.DEFAULT_MAX_PARSES_PER_WORKER
+        )
+        assert isinstance(parser._concrete_parser, specparser.WorkerPoolSpecParser)
+        assert parser._concrete_parser.pool is _get_worker_pool.return_value
+
+
+class Explosive:
+    def __reduce__(self):
+        return (pytest.fail, ("Unpickled a file writable by others",))
+
+
+@pytest.fixture
+def rpm():
+    with mock.patch.object(specparser, "rpm") as rpm:
+        rpm.__version__ = "4.20.0"
+        rpm.expandMacro.return_value = ".fc42"
+        yield rpm
+
+
+@pytest.fixture
+def parse_cache(rpm):
+    with mock.patch.object(specparser, "_parse_cache", OrderedDict()) as parse_cache:
+        yield parse_cache
+
+
+def test_macro_environment_fingerprint(rpm, tmp_path):
+    pytest.importorskip("norpm")
+
+    macrofile = tmp_path / "macros.foo"
+    macrofile.write_text("%foo bar\n")
+    luafile = tmp_path / "lua" / "fedora" / "common.lua"
+    luafile.parent.mkdir(parents=True)
+    luafile.write_text("return {}\n")
+    macro_file_patterns = (str(tmp_path / "macros.*"), str(tmp_path / "lua" / "**" / "*.lua"))
+
+    expandMacro = rpm.expandMacro
+
+    with mock.patch.object(specparser, "MACRO_FILE_PATTERNS", macro_file_patterns):
+        fingerprint = specparser.macro_environment_fingerprint("rpm")
+        norpm_fingerprint = specparser.macro_environment_fingerprint("norpm")
+        assert fingerprint
+        assert specparser.macro_environment_fingerprint("rpm") == fingerprint
+        assert norpm_fingerprint != fingerprint
+
+        # The backend version is covered.
+        rpm.__version__ = "4.21.0"
+        assert specparser.macro_environment_fingerprint("rpm") != fingerprint
+        rpm.__version__ = "4.20.0"
+
+        # %dist is covered, for rpm.
+        expandMacro.return_value = ".fc41"
+        assert specparser.macro_environment_fingerprint("rpm") != fingerprint
+        assert specparser.macro_environment_fingerprint("norpm") == norpm_fingerprint
+        expandMacro.side_effect = Exception("BOOP")
+        assert specparser.macro_environment_fingerprint("rpm") is None
+        expandMacro.side_effect = None
+        expandMacro.return_value = ".fc42"
+        assert specparser.macro_environment_fingerprint("rpm") == fingerprint
+
+        for path in (macrofile, luafile):
+            os.utime(path, ns=(0, 0))
+            assert specparser.macro_environment_fingerprint("rpm") != fingerprint
+            fingerprint = specparser.macro_environment_fingerprint("rpm")
+
+    # No other macros are expanded, the RPM state of the process isn’t touched.
+    assert {call.args for call in expandMacro.call_args_list} == {("%{?dist}",)}
+
+
+@pytest.mark.parametrize("testcase", ("rpm-no-version", "rpm-empty-version", "norpm-missing"))
+def test_macro_environment_fingerprint_without_version(testcase, rpm):
+    parser_type = testcase.split("-", 1)[0]
+
+    if testcase == "rpm-no-version":
+        # E.g. minirpm if librpm can’t be loaded
+        del rpm.__version__
+    elif testcase == "rpm-empty-version":
+        rpm.__version__ = ""
+
+    with mock.patch.object(
+        specparser, "distribution_version", side_effect=specparser.PackageNotFoundError
+    ):
+        fingerprint = specparser.macro_environment_fingerprint(parser_type)
+
+    # Results can’t be cached safely.
+    assert fingerprint is None
+
+
+@pytest.mark.parametrize(
+    "spec_data, expected",
+    (
+        (b"Name: foo\n", set()),
+        (
+            b"Source0: https://example.com/%{name}-%{version}.tar.gz\n"
+            + b"Source1: https://example.com/macros.foo\n"
+            + b"Source2: https://example.com/dl/local.inc\n"
+            + b"Patch1: foo.patch\n",
+            {"macros.foo", "local.inc", "foo.patch"},
+        ),
+        (
+            b"Source1: macros.foo\nPatch: foo.patch\n%include %{SOURCE1}\n%{load:%{P:0}}\n",
+            {"macros.foo", "foo.patch"},
+        ),
+        (b"%include %{_sourcedir}/inc/macros.foo\n", {"inc/macros.foo"}),
+        (b"%{load:%_sourcedir/macros.foo}\n", {"macros.foo"}),
+        (b"%include macros.foo\n", {"macros.foo"}),
+        (b"Source0: %{name}.inc\n%include %{SOURCE0}\n", None),
+        (b"%include %{SOURCE1}\n", None),
+        (b"%{load:%{name}.inc}\n", None),
+    ),
+    ids=(
+        "nothing",
+        "tags",
+        "include-load-tags",
+        "include-sourcedir",
+        "load-sourcedir",
+        "include-literal",
+        "include-macro-tag",
+        "include-missing-tag",
+        "load-macro",
+    ),
+)
+def test__referenced_files(spec_data, expected):
+    assert specparser._referenced_files(spec_data) == expected
+
+
+@mock.patch.dict(os.environ, {"RPMAUTOSPEC_SPEC_PARSER": "rpm"})
+@pytest.mark.parametrize("enable_caching", (True, False), ids=("caching", "no-caching"))
+def test_auto_spec_parser_cache(enable_caching, parse_cache, tmp_path):
+    pkgdirs = [tmp_path / name for name in ("foo", "foo-fork", "bar")]
+    for pkgdir in pkgdirs:
+        pkgdir.mkdir()
+        (pkgdir / "foo.spec").write_text("Source1: macros.inc\n" + SPECFILE)
+        (pkgdir / "macros.inc").write_text("%bar 1\n")
+    (pkgdirs[1] / "foo-1.0.tar.gz").write_text("not referenced")
+    (pkgdirs[1] / "dangling").symlink_to("missing")
+    (pkgdirs[-1] / "macros.inc").write_text("%bar 2\n")
+
+    parser = specparser.AutoSpecParser(enable_caching=enable_caching)
+
+    with mock.patch.object(parser, "_concrete_parser") as concrete_parser:
+        concrete_parser.query.return_value = ("1.0", "1")
+
+        # Byte-identical spec files in different repositories are parsed once.
+        for pkgdir in pkgdirs[:2]:
+            assert parser.query(pkgdir, pkgdir / "foo.spec") == ("1.0", "1")
+        # … unless referenced files differ.
+        assert parser.query(pkgdirs[-1], pkgdirs[-1] / "foo.spec") == ("1.0", "1")
+        # Other parsers share the cache.
+        other_parser = specparser.AutoSpecParser(enable_caching=enable_caching)
+        with mock.patch.object(other_parser, "_concrete_parser", concrete_parser):
+            assert other_parser.query(pkgdirs[0], pkgdirs[0] / "foo.spec") == ("1.0", "1")
+
+        if enable_caching:
+            assert concrete_parser.query.call_count == 2
+            assert len(parse_cache) == 2
+        else:
+            assert concrete_parser.query.call_count == 4
+            assert not parse_cache
+
+        # Errors aren’t cached, their messages refer to the parsed files.
+        concrete_parser.query.reset_mock()
+        concrete_parser.query.side_effect = [
+            specparser.SpecParserError(f"BOOP {pkgdir}") for pkgdir in pkgdirs[:2]
+        ]
+        for pkgdir in pkgdirs[:2]:
+            (pkgdir / "foo.spec").write_text("Name: foo\n")
+            with pytest.raises(specparser.SpecParserError, match=f"BOOP {pkgdir}"):
+                parser.query(pkgdir, pkgdir / "foo.spec")
+        assert concrete_parser.query.call_count == 2
+
+        # Missing spec files aren’t cached.
+        concrete_parser.query.reset_mock()
+        concrete_parser.query.side_effect = None
+        parser.query(pkgdirs[0], pkgdirs[0] / "missing.spec")
+        parser.query(pkgdirs[0], pkgdirs[0] / "missing.spec")
+        assert concrete_parser.query.call_count == 2
+
+
+@mock.patch.dict(os.environ, {"RPMAUTOSPEC_SPEC_PARSER": "rpm"})
+def test_auto_spec_parser_cache_keys(parse_cache, tmp_path):
+    pkgdir = tmp_path / "foo"
+    pkgdir.mkdir()
+    specpath = pkgdir / "foo.spec"
+    specpath.write_text("Source1: macros.inc\n%include %{SOURCE1}\n" + SPECFILE)
+    includepath = pkgdir / "macros.inc"
+    includepath.write_text("%bar 1\n")
+    otherpath = pkgdir / "README"
+    otherpath.write_text("Foo")
+    abridged_dir = tmp_path / "tmp"
+    abridged_dir.mkdir()
+
+    parser = specparser.AutoSpecParser(enable_caching=True)
+
+    with mock.patch.object(parser, "_concrete_parser") as concrete_parser:
+        concrete_parser.query.return_value = ("1.0", "1")
+
+        # Copies of the spec file elsewhere, e.g. temporary ones, share the cached result.
+        for index in range(3):
+            abridged = abridged_dir / f"rpmautospec-abridged-foo-{index}.spec"
+            abridged.write_bytes(specpath.read_bytes())
+            assert parser.query(pkgdir, abridged) == ("1.0", "1")
+        concrete_parser.query.assert_called_once()
+        assert len(parse_cache) == 1
+
+        # Changes to files which aren’t referenced don’t matter.
+        otherpath.write_text("Bar")
+        parser.query(pkgdir, specpath)
+        concrete_parser.query.assert_called_once()
+
+        # Changes to referenced files do.
+        includepath.write_text("%bar 2\n")
+        parser.query(pkgdir, specpath)
+        assert concrete_parser.query.call_count == 2
+
+        # Missing files, too.
+        includepath.unlink()
+        for _ in range(2):
+            parser.query(pkgdir, specpath)
+        assert concrete_parser.query.call_count == 3
+        assert len(parse_cache) == 3
+
+        # Spec files including files which can’t be determined without parsing aren’t cached.
+        specpath.write_text("%include %{name}.inc\n" + SPECFILE)
+        for _ in range(2):
+            parser.query(pkgdir, specpath)
+        assert concrete_parser.query.call_count == 5
+        assert len(parse_cache) == 3
+
+
+@mock.patch.dict(os.environ, {"RPMAUTOSPEC_SPEC_PARSER": "rpm"})
+@pytest.mark.parametrize("testcase", ("sources-too-big", "cache-full"))
+def test_auto_spec_parser_cache_limits(testcase, parse_cache, tmp_path):
+    specpaths = []
+    for name in ("foo", "bar"):
+        specpath = tmp_path / name / f"{name}.spec"
+        specpath.parent.mkdir()
+        specpath.write_text("Source1: macros.inc\n" + SPECFILE.replace("foo", name))
+        (specpath.parent / "macros.inc").write_text("%bar 1\n")
+        specpaths.append(specpath)
+
+    parser = specparser.AutoSpecParser(enable_caching=True)
+
+    with (
+        mock.patch.object(parser, "_concrete_parser") as concrete_parser,
+        mock.patch.object(specparser, "MAX_HASHED_SOURCES_SIZE", 4),
+        mock.patch.object(specparser, "PARSE_CACHE_SIZE", 1),
+    ):
+        concrete_parser.query.return_value = ("1.0", "1")
+        if testcase == "sources-too-big":
+            parser.query(specpaths[0].parent, specpaths[0])
+            assert not parse_cache
+        else:
+            specparser.MAX_HASHED_SOURCES_SIZE = 1024
+            for specpath in specpaths:
+                parser.query(specpath.parent, specpath)
+            assert len(parse_cache) == 1
+            parser.query(specpaths[1].parent, specpaths[1])
+            assert concrete_parser.query.call_count == 2
+            # The least recently used entry was evicted.
+            parser.query(specpaths[0].parent, specpaths[0])
+            assert concrete_parser.query.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "testcase",
+    (
+        "no-disk-cache",
+        "disk-cache",
+        "disk-cache-corrupt",
+        "disk-cache-unwritable",
+        "disk-cache-replace-fails",
+        "disk-cache-dir-not-private",
+        "disk-cache-file-not-private",
+    ),
+)
+@mock.patch.dict(os.environ)
+def test_norpm_registry_cache(testcase, tmp_path):
+    pytest.importorskip("norpm")
+
+    cache_dir = tmp_path / "cache"
+    if testcase != "no-disk-cache":
+        os.environ[specparser.NORPM_REGISTRY_CACHE_DIR_ENVVAR] = str(cache_dir)
+    else:
+        os.environ.pop(specparser.NORPM_REGISTRY_CACHE_DIR_ENVVAR, None)
+
+    cache_names = [
+        f"norpm-registry-{specparser._norpm_registry_cache_key(fingerprint)}.pickle"
+        for fingerprint in ("abcd", "efgh")
+    ]
+
+    if testcase == "disk-cache-corrupt":
+        cache_dir.mkdir()
+        (cache_dir / cache_names[0]).write_bytes(b"BOOP")
+    elif testcase == "disk-cache-unwritable":
+        cache_dir.write_text("Not a directory")
+    elif testcase == "disk-cache-dir-not-private":
+        cache_dir.mkdir()
+        cache_dir.chmod(0o777)
+    elif testcase == "disk-cache-file-not-private":
+        cache_dir.mkdir()
+        # Not loaded, it would blow up.
+        (cache_dir / cache_names[0]).write_bytes(pickle.dumps(Explosive()))
+        (cache_dir / cache_names[0]).chmod(0o666)
+
+    cache_writable = testcase in ("disk-cache", "disk-cache-corrupt", "disk-cache-file-not-private")
+
+    specparser._get_norpm_registry.cache_clear()
+    with (
+        mock.patch.object(
+            specparser, "_build_norpm_registry", wraps=specparser._build_norpm_registry
+        ) as _build_norpm_registry,
+        mock.patch.object(specparser.os, "replace", wraps=os.replace) as replace,
+    ):
+        if testcase == "disk-cache-replace-fails":
+            replace.side_effect = OSError("BOOP")
+
+        registry = specparser._get_norpm_registry("abcd")
+        # Cached in the process
+        assert specparser._get_norpm_registry("abcd") is registry
+        _build_norpm_registry.assert_called_once_with()
+
+        # Cached on disk, if enabled
+        specparser._get_norpm_registry.cache_clear()
+        other_registry = specparser._get_norpm_registry("abcd")
+        assert other_registry is not registry
+        assert other_registry.to_dict() == registry.to_dict()
+        assert _build_norpm_registry.call_count == (1 if cache_writable else 2)
+
+        # Changed macro environments invalidate cached registries.
+        _build_norpm_registry.reset_mock()
+        specparser._get_norpm_registry("efgh")
+        _build_norpm_registry.assert_called_once_with()
+
+    specparser._get_norpm_registry.cache_clear()
+
+    if testcase == "disk-cache-unwritable":
+        assert cache_dir.read_text() == "Not a directory"
+    elif testcase in ("disk-cache-replace-fails", "disk-cache-dir-not-private"):
+        # Temporary files are cleaned up, nothing is written into directories writable by others.
+        assert not any(cache_dir.iterdir())
+    elif cache_writable:
+        assert sorted(path.name for path in cache_dir.iterdir()) == sorted(cache_names)
+        for name in cache_names:
+            assert stat.S_IMODE((cache_dir / name).stat().st_mode) == 0o600
+
+
+@mock.patch.dict(os.environ)
+def test_norpm_registry_cache_without_fingerprint(tmp_path):
+    pytest.importorskip("norpm")
+
+    cache_dir = tmp_path / "cache"
+    os.environ[specparser.NORPM_REGISTRY_CACHE_DIR_ENVVAR] = str(cache_dir)
+
+    specparser._get_norpm_registry.cache_clear()
+    with mock.patch.object(
+        specparser, "_build_norpm_registry", wraps=specparser._build_norpm_registry
+    ) as _build_norpm_registry:
+        specparser._get_norpm_registry(None)
+    specparser._get_norpm_registry.cache_clear()
+
+    # Without a fingerprint, registries aren’t stored on disk.
+    _build_norpm_registry.assert_called_once_with()
+    assert not cache_dir.exists()
+
+
+def test_norpm_registry_cache_key():
+    key = specparser._norpm_registry_cache_key("abcd")
+
+    assert specparser._norpm_registry_cache_key("abcd") == key
+    assert specparser._norpm_registry_cache_key("efgh") != key
+
+    # Registries cached by other versions of rpmautospec aren’t used.
+    with mock.patch.object(specparser, "__version__", "0.0.1"):
+        assert specparser._norpm_registry_cache_key("abcd") != key
+    with mock.patch.object(specparser, "AUTORELEASE_DEFINITION", "BOOP"):
+        assert specparser._norpm_registry_cache_key("abcd") != key
+
+
+@mock.patch.dict(os.environ, {"RPMAUTOSPEC_SPEC_PARSER": "norpm"})
+def test_norpm_registry_shared(tmp_path):
+    pytest.importorskip("norpm")
+
+    specpath = tmp_path / "foo.spec"
+    specpath.write_text(SPECFILE)
+
+    specparser._get_norpm_registry.cache_clear()
+    with mock.patch.object(
+        specparser, "_build_norpm_registry", wraps=specparser._build_norpm_registry
+    ) as _build_norpm_registry:
+        parsers = [specparser.AutoSpecParser(enable_caching=False) for _ in range(2)]
+    specparser._get_norpm_registry.cache_clear()
+
+    _build_norpm_registry.assert_called_once_with()
+    assert parsers[0]._concrete_parser.registry is parsers[1]._concrete_parser.registry
+
+    # Parsing doesn’t leak into the shared registry.
+    for parser in parsers:
+        assert parser.query(tmp_path, specpath) == ("2:1.0", "E_S_P0_B5")
+    assert "name" not in parsers[0]._concrete_parser.registry.db
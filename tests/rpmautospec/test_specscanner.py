@@ -0,0 +1,114 @@
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from rpmautospec_core import check_specfile_features
+
+from rpmautospec import specscanner
+
+__HERE__ = Path(__file__)
+
+TEST_SPECFILES_DIR = __HERE__.parent.parent / "test-data" / "test-specfiles"
+
+SPECFILE = b"""Name: foo
+Version: 1.0
+Release: %autorelease
+
+%description
+\xff Not UTF-8
+
+%prep -q
+%prep
+%autosetup
+
+%files
+
+%changelog\r
+%autochangelog
+"""
+
+
+@pytest.mark.parametrize(
+    "specpath",
+    [
+        *sorted(TEST_SPECFILES_DIR.glob("*.spec")),
+        __HERE__.parent.parent
+        / "test-data"
+        / "repodata"
+        / "dummy-test-package-gloster.spec.expected",
+    ],
+    ids=lambda path: path.name,
+)
+def test_features(specpath):
+    spec_scan = specscanner.SpecScan(specpath.read_bytes())
+
+    assert spec_scan.features == check_specfile_features(specpath, enable_caching=False)
+
+
+@pytest.mark.parametrize("data_type", (bytes, memoryview))
+def test_spec_scan(data_type):
+    spec_scan = specscanner.SpecScan(data_type(SPECFILE))
+
+    # Lines are split like in a file opened in text mode, their endings are kept.
+    assert spec_scan.lines[13] == "%changelog\r\n"
+    assert len(spec_scan.lines) == 15
+    assert list(spec_scan.translated_lines())[13] == "%changelog\n"
+
+    assert spec_scan.features.has_autorelease
+    assert spec_scan.features.changelog_lineno == 14
+    assert spec_scan.features.autochangelog_lineno == 15
+    assert not spec_scan.features.is_processed
+
+    assert spec_scan.prep_lineno == 9
+
+    assert spec_scan.encode() == SPECFILE
+    assert spec_scan.encode(3) == b"Name: foo\nVersion: 1.0\n"
+    assert spec_scan.abridged() == SPECFILE[: SPECFILE.index(b"%prep\n")]
+
+
+def test_spec_scan_line_endings():
+    data = b"Name: foo\rVersion: 1.0\r\nRelease: 1\n%prep\r\nfoo"
+    spec_scan = specscanner.SpecScan(data)
+
+    assert spec_scan.lines == (
+        "Name: foo\r",
+        "Version: 1.0\r\n",
+        "Release: 1\n",
+        "%prep\r\n",
+        "foo",
+    )
+    assert list(spec_scan.translated_lines()) == [
+        "Name: foo\n",
+        "Version: 1.0\n",
+        "Release: 1\n",
+        "%prep\n",
+        "foo",
+    ]
+    assert spec_scan.prep_lineno == 4
+    assert spec_scan.encode() == data
+    assert spec_scan.abridged() == b"Name: foo\rVersion: 1.0\r\nRelease: 1\n"
+
+
+def test_spec_scan_without_prep():
+    spec_scan = specscanner.SpecScan(b"Name: foo\nVersion: 1.0")
+
+    assert spec_scan.prep_lineno is None
+    assert spec_scan.abridged() == b"Name: foo\nVersion: 1.0"
+
+
+@pytest.mark.parametrize("enable_caching", (True, False), ids=("caching", "no-caching"))
+def test_scan_specfile(enable_caching, tmp_path):
+    specpath = tmp_path / "foo.spec"
+    specpath.write_bytes(SPECFILE)
+
+    with mock.patch.object(specscanner, "SpecScan", wraps=specscanner.SpecScan) as SpecScan:
+        first = specscanner.scan_specfile(str(specpath), enable_caching=enable_caching)
+        second = specscanner.scan_specfile(specpath, enable_caching=enable_caching)
+
+    assert first.lines == second.lines
+    if enable_caching:
+        assert first is second
+        SpecScan.assert_called_once_with(SPECFILE)
+    else:
+        assert first is not second
+        assert SpecScan.call_count == 2